@@ -0,0 +1,66 @@
+''' Script to produce documentation figures of all benchmarks at once.
+    Every benchmark directory in tests/ is scanned for csv files that have
+    a gold version, and one figure is drawn per property found in both.
+    Figures are drawn in parallel and only redrawn if their csv files changed.
+    Pictures are generated in the "figures" subdirectory directly, ready for LaTeX compilation
+    Requirements:
+      * you MUST run the tests first as the script reads csv files from the tests results
+    Usage:
+      python draw_fig_all_benchmarks.py [--png] [--force] [--serial]
+'''
+
+import os, sys, multiprocessing, traceback
+from os.path import expanduser
+
+import matplotlib
+matplotlib.use('Agg') # figures are saved to file, no display needed
+
+from utilities import findBenchmarkFigures, createFigBenchmark
+
+def _createFig(args):
+  ''' Worker drawing one figure, returns (figure description, error message) '''
+  (redback_dir, figure, figure_format, only_if_changed) = args
+  (benchmark_dir_short_name, csv_shortfilename, x_property_name, y_property_name) = figure
+  try:
+    createFigBenchmark(redback_dir, benchmark_dir_short_name, csv_shortfilename,
+                       x_property_name, y_property_name, do_show=False,
+                       figure_format=figure_format, only_if_changed=only_if_changed)
+  except Exception:
+    return (figure, traceback.format_exc())
+  return (figure, None)
+
+def createAllFigs(redback_dir=os.path.join(expanduser('~'),'projects','redback'),
+                  figure_format='pdf', nb_processes=None, force=False):
+  ''' Create figures for all benchmarks
+      @param[in] figure_format - string, 'pdf' or 'png'
+      @param[in] nb_processes - int, number of worker processes (default: all
+        cores, 1 to run serially)
+      @param[in] force - bool, redraw figures even if their csv files did not change
+      @return number of figures that failed
+  '''
+  figures = findBenchmarkFigures(redback_dir)
+  print 'Found {0} figures to draw'.format(len(figures))
+  tasks = [(redback_dir, figure, figure_format, not force) for figure in figures]
+  if nb_processes == 1:
+    results = map(_createFig, tasks)
+  else:
+    pool = multiprocessing.Pool(nb_processes)
+    try:
+      results = pool.map(_createFig, tasks, chunksize=1)
+    finally:
+      pool.close()
+      pool.join()
+  nb_failures = 0
+  for (figure, error_msg) in results:
+    if error_msg is not None:
+      nb_failures += 1
+      print >>sys.stderr, 'Could not draw figure {0}:\n{1}'.format(figure, error_msg)
+  return nb_failures
+
+if __name__ == '__main__':
+  figure_format = 'png' if '--png' in sys.argv else 'pdf'
+  nb_processes = 1 if '--serial' in sys.argv else None
+  nb_failures = createAllFigs(figure_format=figure_format, nb_processes=nb_processes,
+                              force='--force' in sys.argv)
+  print 'Finished ({0} failures)'.format(nb_failures)
+  sys.exit(1 if nb_failures else 0)
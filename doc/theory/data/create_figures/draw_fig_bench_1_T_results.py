@@ -1,9 +1,11 @@
-import os, csv
+import os
 import numpy as np
 import pylab as P
 import matplotlib.pyplot as plt
 from scipy.optimize import curve_fit
 
+from utilities import readCsvCached
+
 csv_dir = os.path.join(os.path.expanduser('~'), 'projects/redback/tests/benchmark_1_T')
 
 ########################################################
@@ -16,25 +18,9 @@ filenames['D'] = os.path.join(csv_dir, 'bench1_d_out.csv')
 times = {}
 temperatures = {}
 for key in ['A', 'B', 'C', 'D']:
-  times[key] = []
-  temperatures[key] = []
-for key in ['A', 'B', 'C', 'D']:
-  with open(filenames[key]) as csvfile:
-    myreader = csv.reader(csvfile, delimiter=' ', quotechar='|')
-    index_line = 0
-    for line in myreader:
-      index_line += 1
-      if index_line == 1:
-        tmp = line[0].split(',')
-        assert tmp[0].lower() == 'time'
-        assert tmp[1].lower() == 'middle_temp'
-        continue
-      if not line:
-        continue
-      # read data
-      tmp = line[0].split(',')
-      times[key].append(float(tmp[0]))
-      temperatures[key].append(float(tmp[1]))
+  data = readCsvCached(filenames[key], ['time', 'middle_temp'])
+  times[key] = data['time']
+  temperatures[key] = data['middle_temp']
 
 # First figure, A and B (converging to lower branch)
 fig = plt.figure()
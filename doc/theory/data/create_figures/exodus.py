@@ -0,0 +1,415 @@
+''' Reader of Exodus II files (netCDF classic and 64-bit offset formats)
+    produced by redback, without netCDF library.
+    Only the header is parsed when opening a file: variables are memory
+    mapped and read lazily, so that a single time step or the time series of
+    a few nodes or elements only reads the corresponding parts of the file.
+    Requirements: numpy
+    Usage:
+      with ExodusFile('bench_out.e') as exodus:
+        times = exodus.times()
+        temp = exodus.nodalVariable('temp', step=-1) # last time step
+        series = exodus.nodalTimeSeries('temp', exodus.nearestNode([0, 0, 0]))
+      python exodus.py [--benchmark [size in GB]]
+'''
+
+import os, sys, time, shutil, tempfile
+import numpy as np
+
+# netCDF header tags and types (big endian)
+NC_DIMENSION = 10
+NC_VARIABLE = 11
+NC_ATTRIBUTE = 12
+NC_TYPES = {1:'>i1', 2:'S1', 3:'>i2', 4:'>i4', 5:'>f4', 6:'>f8'}
+STREAMING_NUMRECS = 0xFFFFFFFF # number of records not written yet
+
+class NetCDFVariable(object):
+  ''' Description of a variable in the header of a netCDF file '''
+  def __init__(self, name, dimensions, shape, dtype, begin, vsize, is_record, attributes):
+    self.name = name
+    self.dimensions = dimensions # tuple of dimension names
+    self.shape = shape # tuple (first dimension is the number of records for record variables)
+    self.dtype = np.dtype(dtype)
+    self.begin = begin # offset (bytes) of the data (of the first record) in the file
+    self.vsize = vsize # size (bytes) of the data (of one record)
+    self.is_record = is_record
+    self.attributes = attributes
+
+class NetCDFFile(object):
+  ''' Memory mapped netCDF classic (CDF1) or 64-bit offset (CDF2) file
+      Variables are numpy arrays backed by the file mapping (no data is
+      read until the array elements are accessed).
+  '''
+
+  def __init__(self, filename):
+    self.filename = filename
+    self._file = open(filename, 'rb')
+    try:
+      self._parseHeader()
+    except Exception:
+      self._file.close()
+      raise
+    self._mmap = None
+    self._arrays = {} # variables already mapped, key=variable name
+
+  def close(self):
+    self._arrays = {}
+    self._mmap = None
+    self._file.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+  def __contains__(self, name):
+    return name in self.variables
+
+  def __getitem__(self, name):
+    ''' Memory mapped array of variable (read only, data read on access) '''
+    if name not in self._arrays:
+      if name not in self.variables:
+        raise KeyError('Variable "{0}" not found in "{1}"'.format(name, self.filename))
+      self._arrays[name] = self._mapVariable(self.variables[name])
+    return self._arrays[name]
+
+  def _read(self, size):
+    data = self._file.read(size)
+    if len(data) != size:
+      raise Exception, 'Truncated header in "{0}"'.format(self.filename)
+    return data
+
+  def _readInt(self):
+    return int(np.frombuffer(self._read(4), '>u4')[0])
+
+  def _readOffset(self):
+    return int(np.frombuffer(self._read(8), '>u8')[0]) if self.version == 2 else self._readInt()
+
+  def _readName(self):
+    size = self._readInt()
+    return self._read(size + (-size % 4))[:size]
+
+  def _readValues(self, nc_type):
+    ''' Values of an attribute (string for char attributes) '''
+    nb = self._readInt()
+    dtype = np.dtype(NC_TYPES[nc_type])
+    size = nb*dtype.itemsize
+    data = self._read(size + (-size % 4))[:size]
+    if nc_type == 2:
+      return data.rstrip('\0')
+    return np.frombuffer(data, dtype).astype(dtype.newbyteorder('='))
+
+  def _readList(self, tag, read_item):
+    ''' List of header items (ABSENT or tag followed by items) '''
+    (list_tag, nb) = (self._readInt(), self._readInt())
+    if list_tag == 0 and nb == 0:
+      return []
+    if list_tag != tag:
+      raise Exception, 'Invalid header in "{0}" (tag {1} instead of {2})'.format(self.filename, list_tag, tag)
+    return [read_item() for i in range(nb)]
+
+  def _readAttribute(self):
+    name = self._readName()
+    return (name, self._readValues(self._readInt()))
+
+  def _readDimension(self):
+    return (self._readName(), self._readInt())
+
+  def _readVariable(self):
+    name = self._readName()
+    dim_ids = [self._readInt() for i in range(self._readInt())]
+    attributes = dict(self._readList(NC_ATTRIBUTE, self._readAttribute))
+    nc_type = self._readInt()
+    vsize = self._readInt()
+    begin = self._readOffset()
+    if nc_type not in NC_TYPES:
+      raise Exception, 'Unknown type {0} of variable "{1}" in "{2}"'.format(nc_type, name, self.filename)
+    dimensions = tuple(self._dimension_names[dim_id] for dim_id in dim_ids)
+    is_record = bool(dim_ids) and dim_ids[0] == self._record_dim_id
+    shape = tuple(self._dimension_sizes[dim_id] for dim_id in dim_ids)
+    return NetCDFVariable(name, dimensions, shape, NC_TYPES[nc_type], begin, vsize, is_record, attributes)
+
+  def _parseHeader(self):
+    magic = self._read(4)
+    if magic[:3] != 'CDF' or ord(magic[3]) not in (1, 2):
+      raise Exception, '"{0}" is not a netCDF classic or 64-bit offset file'.format(self.filename)
+    self.version = ord(magic[3])
+    numrecs = self._readInt()
+    dimensions = self._readList(NC_DIMENSION, self._readDimension)
+    self._dimension_names = [name for (name, size) in dimensions]
+    self._dimension_sizes = [size for (name, size) in dimensions]
+    record_dims = [i for (i, (name, size)) in enumerate(dimensions) if size == 0]
+    self._record_dim_id = record_dims[0] if record_dims else None
+    self.attributes = dict(self._readList(NC_ATTRIBUTE, self._readAttribute))
+    variables = self._readList(NC_VARIABLE, self._readVariable)
+    # records of all record variables are interleaved
+    record_variables = [variable for variable in variables if variable.is_record]
+    self.record_size = sum(variable.vsize for variable in record_variables)
+    if len(record_variables) == 1:
+      # no padding when there is a single record variable
+      variable = record_variables[0]
+      self.record_size = int(np.prod(variable.shape[1:]))*variable.dtype.itemsize
+    if record_variables and (numrecs == STREAMING_NUMRECS or numrecs*self.record_size >
+                             os.path.getsize(self.filename) - record_variables[0].begin):
+      # header not updated yet (file being written): only complete records are used
+      begin = min(variable.begin for variable in record_variables)
+      numrecs = max(0, (os.path.getsize(self.filename) - begin)//self.record_size) if self.record_size else 0
+    self.numrecs = numrecs
+    if self._record_dim_id is not None:
+      self._dimension_sizes[self._record_dim_id] = numrecs
+    for variable in record_variables:
+      variable.shape = (numrecs,) + variable.shape[1:]
+    self.dimensions = dict(zip(self._dimension_names, self._dimension_sizes))
+    self.variables = dict((variable.name, variable) for variable in variables)
+
+  def _mapVariable(self, variable):
+    if self._mmap is None:
+      self._mmap = np.memmap(self._file, dtype=np.uint8, mode='r')
+    if variable.is_record:
+      # records of this variable are record_size bytes apart
+      inner_shape = variable.shape[1:]
+      inner_strides = tuple(int(np.prod(inner_shape[i + 1:]))*variable.dtype.itemsize
+                            for i in range(len(inner_shape)))
+      if variable.shape[0] == 0:
+        return np.empty(variable.shape, variable.dtype)
+      return np.ndarray(variable.shape, variable.dtype, buffer=self._mmap, offset=variable.begin,
+                        strides=(self.record_size,) + inner_strides)
+    return np.ndarray(variable.shape, variable.dtype, buffer=self._mmap, offset=variable.begin)
+
+def _decodeNames(chars):
+  ''' List of strings of a 2D char variable (names of an Exodus file) '''
+  return [row.tostring().split('\0', 1)[0].strip() for row in np.asarray(chars)] # bytes after '\0' are not cleared
+
+class ExodusFile(NetCDFFile):
+  ''' Exodus II file written by moose. Time steps are indices in times()
+      (negative indices count from the last step), nodes and elements are
+      0-based indices (in each block for elements), blocks are given by id.
+  '''
+
+  def __init__(self, filename):
+    NetCDFFile.__init__(self, filename)
+    self._names = {}
+
+  def _variableNames(self, key):
+    ''' Names of nodal ('nod'), element ('elem') or global ('glo') variables '''
+    if key not in self._names:
+      name = 'name_{0}_var'.format(key)
+      self._names[key] = _decodeNames(self[name]) if name in self else []
+    return self._names[key]
+
+  def _variableIndex(self, key, name):
+    names = self._variableNames(key)
+    if name not in names:
+      raise Exception, 'Variable "{0}" not found in "{1}" (available variables: {2})'\
+        .format(name, self.filename, ', '.join(names))
+    return names.index(name)
+
+  def times(self):
+    return np.array(self['time_whole']) if 'time_whole' in self else np.empty(0)
+
+  def nbTimeSteps(self):
+    return self.numrecs
+
+  def nodalVariableNames(self):
+    return list(self._variableNames('nod'))
+
+  def elementVariableNames(self):
+    return list(self._variableNames('elem'))
+
+  def globalVariableNames(self):
+    return list(self._variableNames('glo'))
+
+  def blockIds(self):
+    return [int(block_id) for block_id in self['eb_prop1']] if 'eb_prop1' in self else []
+
+  def blockNames(self):
+    return _decodeNames(self['eb_names']) if 'eb_names' in self else [''] * len(self.blockIds())
+
+  def _blockIndex(self, block):
+    block_ids = self.blockIds()
+    if block in block_ids:
+      return block_ids.index(block)
+    block_names = self.blockNames()
+    if block in block_names:
+      return block_names.index(block)
+    raise Exception, 'Block "{0}" not found in "{1}" (blocks: {2})'.format(block, self.filename, block_ids)
+
+  def coordinates(self):
+    ''' Node coordinates, array (nb_nodes, dim) '''
+    if 'coord' in self:
+      return np.array(self['coord']).T
+    return np.column_stack([self[name] for name in ['coordx', 'coordy', 'coordz'] if name in self])
+
+  def connectivity(self, block):
+    ''' Nodes (0-based) of the elements of a block, array (nb_elements, nb_nodes_per_element) '''
+    return np.array(self['connect{0}'.format(self._blockIndex(block) + 1)]) - 1
+
+  def nearestNode(self, point):
+    ''' Index of the node closest to point '''
+    coords = self.coordinates()
+    point = np.asarray(point, dtype=np.float64)[:coords.shape[1]]
+    return int(np.argmin(((coords - point)**2).sum(axis=1)))
+
+  def _nodalArray(self, name):
+    ''' Lazy array (nb_steps, nb_nodes) of a nodal variable '''
+    index = self._variableIndex('nod', name)
+    if 'vals_nod_var{0}'.format(index + 1) in self:
+      return self['vals_nod_var{0}'.format(index + 1)]
+    return self['vals_nod_var'][:, index, :] # older format: (time_step, num_nod_var, num_nodes)
+
+  def _elementArray(self, name, block_index):
+    ''' Lazy array (nb_steps, nb_elements in block) of an element variable '''
+    index = self._variableIndex('elem', name)
+    variable_name = 'vals_elem_var{0}eb{1}'.format(index + 1, block_index + 1)
+    if variable_name not in self:
+      # variable not defined on this block (truth table)
+      nb_elements = self.dimensions['num_el_in_blk{0}'.format(block_index + 1)]
+      return np.full((self.numrecs, nb_elements), np.nan)
+    return self[variable_name]
+
+  def nodalVariable(self, name, step=None):
+    ''' Values of a nodal variable
+        @param[in] step - int, time step index (default: all time steps)
+        @return array (nb_nodes) for one time step, or lazy array
+          (nb_steps, nb_nodes) backed by the file
+    '''
+    values = self._nodalArray(name)
+    return values if step is None else np.array(values[step])
+
+  def elementVariable(self, name, step=None, block=None):
+    ''' Values of an element variable
+        @param[in] step - int, time step index (default: all time steps)
+        @param[in] block - block id or name (default: all blocks, in order)
+        @return array (nb_elements) for one time step, or array
+          (nb_steps, nb_elements) (lazy if a block is given)
+    '''
+    if block is not None:
+      values = self._elementArray(name, self._blockIndex(block))
+      return values if step is None else np.array(values[step])
+    arrays = [self._elementArray(name, block_index) for block_index in range(len(self.blockIds()))]
+    if step is not None:
+      return np.concatenate([np.array(values[step]) for values in arrays])
+    return np.concatenate(arrays, axis=1)
+
+  def nodalTimeSeries(self, name, nodes):
+    ''' Values of a nodal variable at some nodes over all time steps (only
+        these values are read from the file)
+        @param[in] nodes - int or list of node indices
+        @return array (nb_steps) or (nb_steps, len(nodes))
+    '''
+    return np.array(self._nodalArray(name)[:, nodes])
+
+  def elementTimeSeries(self, name, block, elements):
+    ''' Values of an element variable at some elements of a block over all
+        time steps
+        @param[in] elements - int or list of element indices in the block
+        @return array (nb_steps) or (nb_steps, len(elements))
+    '''
+    return np.array(self._elementArray(name, self._blockIndex(block))[:, elements])
+
+  def globalVariable(self, name):
+    ''' Time series of a global variable (postprocessor) '''
+    return np.array(self['vals_glo_var'][:, self._variableIndex('glo', name)])
+
+def _writeSyntheticExodus(filename, nb_nodes, nb_steps, nb_nodal_variables, chunk_steps=10):
+  ''' Write minimal Exodus file (64-bit offset netCDF) with random nodal
+      variables, for benchmarks
+  '''
+  def name(string):
+    return np.array([len(string)], '>u4').tostring() + string + '\0'*(-len(string) % 4)
+  len_name = 32
+  var_names = ['var_{0}'.format(i) for i in range(nb_nodal_variables)]
+  dims = [('time_step', 0), ('num_nodes', nb_nodes), ('num_dim', 1), ('len_name', len_name),
+          ('num_nod_var', nb_nodal_variables)]
+  # (name, dim ids, nc_type, is_record)
+  variables = [('coordx', [1], 6, False), ('name_nod_var', [4, 3], 2, False), ('time_whole', [0], 6, True)] + \
+    [('vals_nod_var{0}'.format(i + 1), [0, 1], 6, True) for i in range(nb_nodal_variables)]
+  def vsize(dim_ids, nc_type, is_record):
+    size = np.dtype(NC_TYPES[nc_type]).itemsize*int(np.prod([dims[i][1] for i in dim_ids[int(is_record):]]))
+    return size + (-size % 4)
+  def header(begins):
+    text = 'CDF\x02' + np.array([nb_steps], '>u4').tostring()
+    text += np.array([NC_DIMENSION, len(dims)], '>u4').tostring()
+    for (dim_name, size) in dims:
+      text += name(dim_name) + np.array([size], '>u4').tostring()
+    text += np.array([0, 0], '>u4').tostring() # no global attribute
+    text += np.array([NC_VARIABLE, len(variables)], '>u4').tostring()
+    for ((var_name, dim_ids, nc_type, is_record), begin) in zip(variables, begins):
+      text += name(var_name) + np.array([len(dim_ids)] + dim_ids + [0, 0, nc_type,
+                                        vsize(dim_ids, nc_type, is_record)], '>u4').tostring()
+      text += np.array([begin], '>u8').tostring()
+    return text
+  begins = [0]*len(variables)
+  offset = len(header(begins))
+  for (i, variable) in enumerate(variables):
+    begins[i] = offset
+    offset += vsize(*variable[1:])
+  record_size = sum(vsize(*variable[1:]) for variable in variables if variable[3])
+  with open(filename, 'wb') as f:
+    f.write(header(begins))
+    f.write(np.linspace(0, 1, nb_nodes).astype('>f8').tostring())
+    f.write(''.join(var_name.ljust(len_name, '\0') for var_name in var_names))
+    for step in range(0, nb_steps, chunk_steps):
+      nb = min(chunk_steps, nb_steps - step)
+      records = np.empty((nb, 1 + nb_nodal_variables*nb_nodes), '>f8')
+      records[:, 0] = np.arange(step, step + nb)
+      records[:, 1:] = np.random.rand(nb, nb_nodal_variables*nb_nodes)
+      f.write(records.tostring())
+  assert os.path.getsize(filename) == begins[2] + nb_steps*record_size
+
+def benchmarkExodusReader(size_gb=2., nb_nodes=1000000, nb_nodal_variables=4):
+  ''' Time reading a synthetic multi-GB Exodus file: opening it, one time
+      step of one variable, one nodal time series, and (for reference)
+      reading the whole file
+  '''
+  nb_steps = max(1, int(size_gb*1024**3/(8.*nb_nodes*nb_nodal_variables)))
+  tmp_dir = tempfile.mkdtemp(prefix='exodus_')
+  try:
+    filename = os.path.join(tmp_dir, 'synthetic.e')
+    start = time.time()
+    _writeSyntheticExodus(filename, nb_nodes, nb_steps, nb_nodal_variables)
+    print 'Wrote {0:.2f} GB file ({1} steps x {2} nodes x {3} variables) in {4:.1f}s'.format(
+      os.path.getsize(filename)/1024.**3, nb_steps, nb_nodes, nb_nodal_variables, time.time() - start)
+    timings = []
+    start = time.time()
+    exodus = ExodusFile(filename)
+    timings.append(('open (header only)', time.time() - start))
+    start = time.time()
+    values = exodus.nodalVariable('var_2', step=nb_steps//2)
+    timings.append(('one time step of one variable', time.time() - start))
+    start = time.time()
+    series = exodus.nodalTimeSeries('var_2', [0, nb_nodes//2, nb_nodes - 1])
+    timings.append(('time series of 3 nodes', time.time() - start))
+    assert values.shape == (nb_nodes,) and series.shape == (nb_steps, 3)
+    assert series[nb_steps//2, 1] == values[nb_nodes//2]
+    assert np.array_equal(exodus.times(), np.arange(nb_steps))
+    exodus.close()
+    start = time.time()
+    with open(filename, 'rb') as f:
+      while f.read(64*1024*1024):
+        pass
+    timings.append(('whole file (reference)', time.time() - start))
+  finally:
+    shutil.rmtree(tmp_dir)
+  for (description, timing) in timings:
+    print '  {0}: {1:.4f}s'.format(description, timing)
+  return timings
+
+if __name__ == '__main__':
+  # test that reader works
+  redback_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..'))
+  filename = os.path.join(redback_dir, 'tests', 'benchmark_2_H', 'gold', 'bench_diffusion_out.e')
+  with ExodusFile(filename) as exodus:
+    print 'Nodal variables: {0}'.format(exodus.nodalVariableNames())
+    print 'Element variables: {0}'.format(exodus.elementVariableNames())
+    print 'Global variables: {0}'.format(exodus.globalVariableNames())
+    print 'Blocks: {0}, {1} time steps'.format(exodus.blockIds(), exodus.nbTimeSteps())
+    # middle_press is a PointValue of pore_pressure at the origin
+    middle_press = exodus.nodalTimeSeries('pore_pressure', exodus.nearestNode([0, 0, 0]))
+    assert exodus.globalVariable('middle_press').shape == (40,)
+    assert np.allclose(exodus.globalVariable('middle_press'), middle_press)
+    assert np.array_equal(exodus.nodalVariable('pore_pressure', step=-1), exodus.nodalVariable('pore_pressure')[-1])
+  print 'Reader works OK!'
+  if '--benchmark' in sys.argv:
+    index = sys.argv.index('--benchmark')
+    benchmarkExodusReader(float(sys.argv[index + 1]) if len(sys.argv) > index + 1 else 2.)
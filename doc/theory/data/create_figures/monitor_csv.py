@@ -0,0 +1,31 @@
+''' Script to monitor a running simulation: plots columns of its csv file
+    and redraws the figure as lines are appended to the file.
+    Long series are downsampled, so that runs with millions of time steps
+    can be followed until the end.
+    Usage:
+      python monitor_csv.py <csv file> <y column> [<y column> ...] [--x time]
+        [--output figure.png] [--poll 1] [--timeout 60]
+      (without --output the figure is shown in a window, with --output the
+      figure file is rewritten at each update)
+'''
+
+import argparse
+import matplotlib
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Plot csv columns of a running simulation')
+  parser.add_argument('csv_filename')
+  parser.add_argument('y_property_names', nargs='+', help='(lower case) columns to plot')
+  parser.add_argument('--x', default='time', help='column in x (default: time)')
+  parser.add_argument('--output', default=None, help='figure file rewritten at each update')
+  parser.add_argument('--poll', type=float, default=1., help='time (s) between checks for new lines')
+  parser.add_argument('--timeout', type=float, default=None,
+                      help='stop after this time (s) without new lines (default: never)')
+  args = parser.parse_args()
+  if args.output:
+    matplotlib.use('Agg') # figure saved to file, no display needed
+  from utilities import LivePlot, PLOT_MAX_POINTS, PLOT_MAX_MARKERS
+  live_plot = LivePlot(args.csv_filename, args.x, args.y_property_names,
+                       max_points=PLOT_MAX_POINTS, max_markers=PLOT_MAX_MARKERS, figure_filename=args.output)
+  nb_points = live_plot.run(poll_interval=args.poll, timeout=args.timeout)
+  print 'Plotted {0} points'.format(nb_points)
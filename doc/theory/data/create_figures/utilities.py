@@ -1,17 +1,173 @@
 ''' Script to parse csv file produced by redback '''
 
-import os, sys, csv
+import os, sys, csv, fcntl
 from os.path import expanduser
 import numpy as np
 import pylab as P
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FuncFormatter
 import matplotlib
-import subprocess
+import time, shutil, tempfile, itertools
 
-def parseCsv(filename, column_keys = None):
-  ''' Parse csv file created by moose and return dictionary of data '''
+from exodus import ExodusFile
+
+CSV_CHUNK_SIZE = 4*1024*1024 # bytes read at once when parsing csv files
+
+def _parseCsvHeader(filename, header_line, column_keys):
+  ''' Find the columns we want in the header line of a csv file
+      @return (number of columns in file, list of (column_key, column index))
+  '''
+  headers = [elt.strip().lower() for elt in header_line.strip().split(',')]
+  if column_keys is None:
+    # grab all data in file
+    column_keys_we_want = headers
+  else:
+    # grab only requested data from file
+    assert type(column_keys)==type([])
+    column_keys_we_want = column_keys
+  columns = []
+  for column_key in column_keys_we_want:
+    if column_key not in headers:
+      error_msg = 'Column "{0}" not found in "{1}" (available columns: {2})'\
+        .format(column_key, filename, ', '.join(headers))
+      raise Exception, error_msg
+    columns.append((column_key, headers.index(column_key)))
+  return (len(headers), columns)
+
+def _raiseCsvFormatError(filename, text, nb_columns):
+  ''' Find first invalid line in block of csv data lines and raise error '''
+  for line in text.split('\n'):
+    if len(line.split(',')) != nb_columns:
+      error_msg = 'Line "{0}" of "{1}" has {2} columns instead of {3}'\
+        .format(line, filename, len(line.split(',')), nb_columns)
+      raise Exception, error_msg
+  error_msg = 'Could not convert all values to float in "{0}"'.format(filename)
+  raise Exception, error_msg
+
+def _checkCsvRowWidths(filename, text, nb_columns):
+  ''' Raise error if a line of a block of csv data lines has not nb_columns
+      values (a short line next to a long one would shift later values
+      to other columns) '''
+  chars = np.frombuffer(text, dtype=np.uint8)
+  commas = np.flatnonzero(chars == ord(','))
+  line_ends = np.append(np.flatnonzero(chars == ord('\n')), len(chars))
+  commas_per_line = np.diff(np.concatenate(([0], np.searchsorted(commas, line_ends))))
+  if (commas_per_line != nb_columns - 1).any():
+    _raiseCsvFormatError(filename, text, nb_columns)
+
+def _parseCsvLines(filename, text, nb_columns, columns):
+  ''' Convert block of complete csv data lines to dictionary of numpy arrays
+      (key=column_key, value=contiguous array of the requested column)
+  '''
+  if '\r' in text:
+    text = text.replace('\r', '')
+  if '\n\n' in text or text.startswith('\n') or not text.strip():
+    # drop empty lines
+    text = '\n'.join([line for line in text.split('\n') if line.strip()])
+  text = text.strip()
+  nb_lines = text.count('\n') + 1 if text else 0
+  if text:
+    _checkCsvRowWidths(filename, text, nb_columns)
+  if 2*len(columns) <= nb_columns:
+    # Few columns wanted: split all tokens but only convert the wanted ones
+    tokens = text.replace('\n', ',').split(',') if text else []
+    if len(tokens) != nb_lines*nb_columns:
+      _raiseCsvFormatError(filename, text, nb_columns)
+    data = {}
+    for column_key, column_i in columns:
+      try:
+        data[column_key] = np.fromiter(itertools.imap(float, tokens[column_i::nb_columns]),
+                                       dtype=np.float64, count=nb_lines)
+      except ValueError:
+        _raiseCsvFormatError(filename, text, nb_columns)
+    return data
+  # Most columns wanted: all numbers are converted at once in C
+  # (newlines become separators)
+  values = np.fromstring(text.replace('\n', ','), sep=',') if text else np.empty(0)
+  if values.size != nb_lines*nb_columns:
+    _raiseCsvFormatError(filename, text, nb_columns)
+  values.shape = (nb_lines, nb_columns)
+  return dict([(column_key, np.ascontiguousarray(values[:, column_i]))
+               for column_key, column_i in columns])
+
+def iterCsvChunks(filename, column_keys=None, chunk_size=CSV_CHUNK_SIZE,
+                  follow=False, poll_interval=1., timeout=None):
+  ''' Generator parsing csv file created by moose chunk by chunk.
+      Each item is a dictionary of data (key=column_key, value=numpy array)
+      for the complete lines read since the previous item.
+      @param[in] column_keys - list of (lower case) column keys to parse
+        (default: all columns)
+      @param[in] chunk_size - int, number of bytes read at once
+      @param[in] follow - bool, keep waiting for new lines appended to the
+        file (e.g. by a running simulation) instead of stopping at its end
+      @param[in] poll_interval - float, time (s) between checks for new data
+      @param[in] timeout - float, stop following after this time (s) without
+        new data (default: follow forever)
+  '''
+  with open(filename, 'rb') as csvfile:
+    nb_columns = None
+    columns = None
+    buf = ''
+    last_growth_time = time.time()
+    while True:
+      block = csvfile.read(chunk_size)
+      if block:
+        last_growth_time = time.time()
+        buf += block
+        if columns is None:
+          if '\n' not in buf:
+            continue # header line not complete yet
+          header_line, buf = buf.split('\n', 1)
+          (nb_columns, columns) = _parseCsvHeader(filename, header_line, column_keys)
+        # only parse complete lines, keep the rest for later
+        end = buf.rfind('\n') + 1
+        if end > 0:
+          data = _parseCsvLines(filename, buf[:end], nb_columns, columns)
+          buf = buf[end:]
+          if columns and len(data[columns[0][0]]) > 0:
+            yield data
+        continue
+      # End of file reached
+      if follow and (timeout is None or time.time() - last_growth_time < timeout):
+        time.sleep(poll_interval)
+        csvfile.seek(0, os.SEEK_CUR) # clear EOF state
+        continue
+      break
+    if columns is None:
+      if not buf.strip():
+        raise Exception, 'No header found in csv file "{0}"'.format(filename)
+      (nb_columns, columns) = _parseCsvHeader(filename, buf, column_keys)
+      buf = ''
+    if buf.strip():
+      # last line without end of line character
+      yield _parseCsvLines(filename, buf, nb_columns, columns)
+
+def parseCsv(filename, column_keys = None, chunk_size=CSV_CHUNK_SIZE):
+  ''' Parse csv file created by moose and return dictionary of data
+      (key=column_key, value=contiguous numpy array of floats).
+      Only the columns in column_keys are kept (default: all columns).
+  '''
   print 'Parsing "{}"...'.format(filename)
+  with open(filename, 'rb') as csvfile:
+    header_line = csvfile.readline()
+  (nb_columns, columns) = _parseCsvHeader(filename, header_line, column_keys)
+  print 'Found columns {0}'.format(dict(columns))
+  chunks = dict([(column_key, []) for column_key, column_i in columns])
+  for chunk in iterCsvChunks(filename, column_keys, chunk_size=chunk_size):
+    for column_key in chunk:
+      chunks[column_key].append(chunk[column_key])
+  data = {} # dict of data, key=column_key, value=numpy array (floats)
+  for column_key in chunks:
+    if chunks[column_key]:
+      data[column_key] = np.concatenate(chunks[column_key])
+    else:
+      data[column_key] = np.empty(0)
+  print 'Finished parsing csv file'
+  return data
+
+def _parseCsvWithCsvModule(filename, column_keys = None):
+  ''' Former row by row implementation of parseCsv, kept as reference for
+      benchmarkParseCsv '''
   column_index = {} # mapping, key=column_key, value=corresponding column index
   data = {} # dict of data, key=column_key, value=data list (floats)
   with open(filename, 'rb') as csvfile:
@@ -19,15 +175,10 @@ def parseCsv(filename, column_keys = None):
     line_i = 0 # line index
     for row in csvreader:
       if line_i == 0:
-        # Headers. Find interesting columns
         headers = row
-        # prepare structure for all columns we want
         if column_keys is None:
-          # grab all data in file
           column_keys_we_want = [elt.lower() for elt in headers]
         else:
-          # grab only requested data from file
-          assert type(column_keys)==type([])
           column_keys_we_want = column_keys
         for column_key in column_keys_we_want:
           data[column_key] = []
@@ -35,28 +186,292 @@ def parseCsv(filename, column_keys = None):
           elt_lower = elt.lower()
           if elt_lower in column_keys_we_want:
             column_index[elt_lower] = column_i
-        column_indices = column_index.values()
         line_i += 1
-        print 'Found columns {0}'.format(column_index)
         continue
-      # Data line
       if len(row) < len(headers):
-        break # finished reading all data
+        break
       for column_key in column_keys_we_want:
         data[column_key].append(float(row[column_index[column_key]]))
       line_i += 1
-      continue # go to next data line
-  print 'Finished parsing csv file'
   return data
 
+def benchmarkParseCsv(nb_rows=1000000, nb_columns=8, column_keys=None):
+  ''' Compare parseCsv with the former csv module implementation on a
+      synthetic csv file
+      @param[in] column_keys - list of column names to parse (default:
+        ['time', 'col_1'])
+      @return (time of former implementation (s), time of parseCsv (s))
+  '''
+  if column_keys is None:
+    column_keys = ['time', 'col_1']
+  tmp_dir = tempfile.mkdtemp(prefix='parse_csv_')
+  try:
+    csv_filename = os.path.join(tmp_dir, 'synthetic.csv')
+    headers = ['time'] + ['col_{0}'.format(i) for i in range(1, nb_columns)]
+    values = np.random.rand(nb_rows, nb_columns)
+    values[:, 0] = np.arange(nb_rows)
+    with open(csv_filename, 'wb') as f:
+      f.write(','.join(headers) + '\n')
+      np.savetxt(f, values, fmt='%.14g', delimiter=',')
+    timings = []
+    for parse_function in [_parseCsvWithCsvModule, parseCsv]:
+      start = time.time()
+      data = parse_function(csv_filename, column_keys)
+      timings.append(time.time() - start)
+      for column_key in column_keys:
+        assert np.allclose(data[column_key], values[:, headers.index(column_key)], rtol=1e-12)
+  finally:
+    shutil.rmtree(tmp_dir)
+  print 'Parsed {0} rows x {1} columns: csv module {2:.3f}s, parseCsv {3:.3f}s (x{4:.1f})'\
+    .format(nb_rows, nb_columns, timings[0], timings[1], timings[0]/timings[1])
+  return tuple(timings)
+
+CSV_CACHE_SUFFIX = '.npz' # cache of "file.csv" is "file.csv.npz" (same directory)
+CSV_CACHE_INDEX = os.path.join(expanduser('~'), '.redback_csv_cache_index') # list of cache files
+CSV_CACHE_SIZE_CAP = 512*1024*1024 # bytes, total size of all cache files
+CSV_CACHE_FORMAT = 2 # bumped when the layout of the cache files changes
+CSV_CACHE_COLUMN_PREFIX = 'column:' # prefix of the column arrays in the cache files
+
+def _registerCsvCache(cache_filename, size_cap):
+  ''' Add cache file to index and delete least recently used cache files
+      (oldest modification time, updated on each use) above size_cap.
+      Several processes may plot at the same time: the index is read and
+      rewritten under an exclusive lock, so that no registration is lost. '''
+  with open(CSV_CACHE_INDEX + '.lock', 'a') as lock_file:
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    try:
+      _updateCsvCacheIndex(cache_filename, size_cap)
+    finally:
+      fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _updateCsvCacheIndex(cache_filename, size_cap):
+  ''' Body of _registerCsvCache, called with the index locked '''
+  cache_filenames = set([cache_filename])
+  if os.path.isfile(CSV_CACHE_INDEX):
+    with open(CSV_CACHE_INDEX) as f:
+      cache_filenames.update([line.strip() for line in f if line.strip()])
+  cache_files = [] # list of (last use time, size, filename)
+  for filename in cache_filenames:
+    try:
+      stat = os.stat(filename)
+    except OSError:
+      continue # deleted
+    cache_files.append((stat.st_mtime, stat.st_size, filename))
+  cache_files.sort(reverse=True) # most recently used first
+  total_size = 0
+  kept_filenames = []
+  for (last_use, size, filename) in cache_files:
+    total_size += size
+    if total_size > size_cap and filename != cache_filename:
+      try:
+        os.remove(filename)
+        continue
+      except OSError:
+        pass
+    kept_filenames.append(filename)
+  # write index to a temporary file renamed over the index, so that readers
+  # never see a partially written index
+  (fd, tmp_index) = tempfile.mkstemp(prefix=os.path.basename(CSV_CACHE_INDEX) + '.',
+                                     dir=os.path.dirname(CSV_CACHE_INDEX))
+  try:
+    with os.fdopen(fd, 'w') as f:
+      f.write('\n'.join(kept_filenames) + '\n')
+    os.rename(tmp_index, CSV_CACHE_INDEX)
+  except (IOError, OSError):
+    if os.path.isfile(tmp_index):
+      os.remove(tmp_index)
+    raise
+
+def readCsvCached(filename, column_keys = None, size_cap=CSV_CACHE_SIZE_CAP):
+  ''' Same as parseCsv but keeps all parsed columns in a binary .npz file
+      next to the csv file. The cache is used as long as the size and
+      modification time of the csv file are unchanged.
+      @param[in] size_cap - int, max total size (bytes) of all cache files
+  '''
+  cache_filename = filename + CSV_CACHE_SUFFIX
+  stat = os.stat(filename)
+  cache = None
+  if os.path.isfile(cache_filename):
+    try:
+      cache = np.load(cache_filename)
+      if '__csv_format__' not in cache.files or cache['__csv_format__'] != CSV_CACHE_FORMAT or \
+         cache['__csv_size__'] != stat.st_size or cache['__csv_mtime__'] != stat.st_mtime:
+        cache.close()
+        cache = None # out of date
+    except Exception as e:
+      print >>sys.stderr, 'Ignoring invalid cache file "{0}": {1}'.format(cache_filename, e)
+      cache = None
+  if cache is not None:
+    try:
+      if column_keys is None:
+        column_keys = [key[len(CSV_CACHE_COLUMN_PREFIX):] for key in cache.files
+                       if key.startswith(CSV_CACHE_COLUMN_PREFIX)]
+      missing_keys = [column_key for column_key in column_keys
+                      if CSV_CACHE_COLUMN_PREFIX + column_key not in cache.files]
+      if missing_keys:
+        error_msg = 'Columns {0} not found in "{1}"'.format(missing_keys, filename)
+        raise Exception, error_msg
+      # only the requested columns are read from the cache file
+      data = dict([(column_key, cache[CSV_CACHE_COLUMN_PREFIX + column_key]) for column_key in column_keys])
+    finally:
+      cache.close()
+    os.utime(cache_filename, None) # last use, for LRU eviction
+    return data
+  # (Re)build cache with all columns of csv file
+  data = parseCsv(filename)
+  try:
+    tmp_filename = '{0}.{1}.npz'.format(cache_filename, os.getpid())
+    with open(tmp_filename, 'wb') as f:
+      # columns are stored under prefixed names passed as a dictionary, as a
+      # column may have the name of an argument of savez (e.g. "file")
+      arrays = dict([(CSV_CACHE_COLUMN_PREFIX + column_key, values) for (column_key, values) in data.items()])
+      arrays.update({'__csv_format__':CSV_CACHE_FORMAT, '__csv_size__':stat.st_size,
+                     '__csv_mtime__':stat.st_mtime})
+      np.savez(f, **arrays)
+    os.rename(tmp_filename, cache_filename)
+    _registerCsvCache(os.path.realpath(cache_filename), size_cap)
+  except (IOError, OSError) as e:
+    print >>sys.stderr, 'Could not write cache file "{0}": {1}'.format(cache_filename, e)
+  if column_keys is None:
+    return data
+  missing_keys = [column_key for column_key in column_keys if column_key not in data]
+  if missing_keys:
+    error_msg = 'Columns {0} not found in "{1}"'.format(missing_keys, filename)
+    raise Exception, error_msg
+  return dict([(column_key, data[column_key]) for column_key in column_keys])
+
+def readExodusPointSeries(filename, variable_names, point):
+  ''' Read time series of nodal variables at the node closest to point in
+      an Exodus file (no postprocessor needed), only these values are read
+      from the file.
+      @return dictionary of data like parseCsv (key=variable name or 'time',
+        value=numpy array)
+  '''
+  with ExodusFile(filename) as exodus:
+    node = exodus.nearestNode(point)
+    data = dict([(name, exodus.nodalTimeSeries(name, node)) for name in variable_names])
+    data['time'] = exodus.times()
+  return data
+
+FIGURE_DPI = 300
+PLOT_MAX_POINTS = 4000 # longer series are downsampled before plotting
+PLOT_MAX_MARKERS = 200 # markers of longer series are thinned
+PLOT_MARKER_SPACING = 0.02 # min distance between thinned markers (fraction of axes)
+
+def downsampleLTTB(x_data, y_data, nb_points, bucket_by_x=False):
+  ''' Indices of nb_points points keeping the shape of the series
+      (largest triangle three buckets: first and last points, and in each
+      bucket the point making the largest triangle with the previous kept
+      point and the average of the next bucket)
+      @param[in] bucket_by_x - bool, buckets of same x width (x_data must be
+        sorted) instead of same number of points, for series of very
+        uneven density (at most nb_points points are kept)
+      @return array of indices (all indices if series is short enough)
+  '''
+  x_data = np.asarray(x_data, dtype=np.float64)
+  y_data = np.asarray(y_data, dtype=np.float64)
+  nb_data = len(x_data)
+  if nb_points >= nb_data or nb_points < 3:
+    return np.arange(nb_data)
+  # buckets of the points between the first and last ones
+  if bucket_by_x:
+    inner_x = x_data[1:nb_data - 1]
+    bounds = np.linspace(inner_x[0], inner_x[-1], nb_points - 1)
+    edges = np.unique(np.append(1 + np.searchsorted(inner_x, bounds[:-1]), nb_data - 1)) # no empty bucket
+    nb_points = len(edges) + 1
+  else:
+    edges = np.linspace(1, nb_data - 1, nb_points - 1).astype(int)
+  sizes = np.diff(edges)
+  means_x = np.add.reduceat(x_data[1:nb_data - 1], edges[:-1] - 1)/sizes
+  means_y = np.add.reduceat(y_data[1:nb_data - 1], edges[:-1] - 1)/sizes
+  # next "bucket" of the last bucket is the last point
+  means_x = np.append(means_x[1:], x_data[-1])
+  means_y = np.append(means_y[1:], y_data[-1])
+  indices = np.empty(nb_points, dtype=int)
+  indices[0] = 0
+  indices[-1] = nb_data - 1
+  kept = 0
+  for i in range(nb_points - 2):
+    (start, end) = (edges[i], edges[i + 1])
+    areas = np.abs((x_data[kept] - means_x[i])*(y_data[start:end] - y_data[kept]) -
+                   (x_data[kept] - x_data[start:end])*(means_y[i] - y_data[kept]))
+    kept = start + np.argmax(np.where(np.isnan(areas), -1., areas))
+    indices[i + 1] = kept
+  return indices
+
+def thinMarkers(x_data, y_data, min_spacing=PLOT_MARKER_SPACING, max_markers=None, x_range=None, y_range=None):
+  ''' Indices of markers at least min_spacing apart (distance relative to
+      the ranges of the data), so that dense parts of a series are not
+      covered by overlapping markers. The spacing is increased if needed to
+      keep about max_markers markers along the whole series.
+      @return list of indices
+  '''
+  x_data = np.asarray(x_data, dtype=np.float64)
+  y_data = np.asarray(y_data, dtype=np.float64)
+  if len(x_data) == 0:
+    return []
+  def normalised(data, data_range):
+    (low, high) = data_range or (np.nanmin(data), np.nanmax(data))
+    return (data - low)/(high - low) if high > low else np.zeros_like(data)
+  x_norm = normalised(x_data, x_range)
+  y_norm = normalised(y_data, y_range)
+  if max_markers is not None:
+    length = np.nansum(np.sqrt(np.diff(x_norm)**2 + np.diff(y_norm)**2))
+    min_spacing = max(min_spacing, length/max_markers)
+  min_spacing_sqr = min_spacing**2
+  indices = [0]
+  (last_x, last_y) = (x_norm[0], y_norm[0])
+  for i in xrange(1, len(x_norm)):
+    if (x_norm[i] - last_x)**2 + (y_norm[i] - last_y)**2 >= min_spacing_sqr:
+      indices.append(i)
+      (last_x, last_y) = (x_norm[i], y_norm[i])
+  if indices[-1] != len(x_norm) - 1:
+    indices.append(len(x_norm) - 1)
+  return indices
+
+def _reduceSeries(x_data, y_data, max_points, max_markers, marker_spacing):
+  ''' Downsample series and choose its markers
+      @return (x_data, y_data, marker indices (None for all points))
+  '''
+  x_data = np.asarray(x_data)
+  y_data = np.asarray(y_data)
+  if max_points is not None and len(x_data) > max_points:
+    indices = downsampleLTTB(x_data, y_data, max_points)
+    (x_data, y_data) = (x_data[indices], y_data[indices])
+  markers = None
+  if max_markers is not None and len(x_data) > max_markers:
+    markers = thinMarkers(x_data, y_data, marker_spacing, max_markers)
+  return (x_data, y_data, markers)
+
+# Labels of properties that can be plotted, key=csv column key
+PROPERTY_LABELS = {
+  'time':'Time',
+  'stress_xx':'Stress xx',
+  'stress_yy':'Stress yy',
+  'stress_zz':'Stress zz',
+  'p0':'Pore pressure',
+  'middle_temp':'Temperature',
+  'zdisp':'Displacement z',
+  'total_porosity':'Total porosity',
+}
+
 def plotFigure(analytical_x_data, analytical_y_data,
                numerical_x_data, numerical_y_data,
                x_label='Time',
                y_label='Value XXX',
                figure_rootfilename=None, # Figure file name without extension
-               do_show=False):
+               do_show=False,
+               figure_format='pdf', # 'pdf', 'png' or 'eps'
+               max_points=None, # e.g. PLOT_MAX_POINTS, None to plot all points
+               max_markers=None, # e.g. PLOT_MAX_MARKERS, None to draw all markers
+               marker_spacing=PLOT_MARKER_SPACING,
+               analytical_label='Analytical solution',
+               numerical_label='Numerical results'):
   ''' Function to plot figure of numerical vs analytical results
       and save picture to file.
+      Series longer than max_points are downsampled (LTTB) and markers of
+      series longer than max_markers are thinned to marker_spacing.
+      @return name of figure file (None if do_show)
   '''
   my_marker_size = 10
 
@@ -80,13 +495,21 @@ def plotFigure(analytical_x_data, analytical_y_data,
 #     plt.xticks(major_ticks_x, fontsize = 16)
 #     plt.yticks(major_ticks_y, fontsize = 16)
 
+  (analytical_x_data, analytical_y_data, markers) = _reduceSeries(
+    analytical_x_data, analytical_y_data, max_points, max_markers, marker_spacing)
+  if markers is not None:
+    # markers only: thinned points are not drawn at all
+    (analytical_x_data, analytical_y_data) = (analytical_x_data[markers], analytical_y_data[markers])
   line, = plt.plot(analytical_x_data, analytical_y_data, 'o',
                    markeredgecolor='red', markerfacecolor='white',
-                   markersize=my_marker_size, label='Analytical solution')
+                   markersize=my_marker_size, label=analytical_label)
+  (numerical_x_data, numerical_y_data, markers) = _reduceSeries(
+    numerical_x_data, numerical_y_data, max_points, max_markers, marker_spacing)
   line, = plt.plot(numerical_x_data, numerical_y_data, '-x',
                    color='black',
                    markeredgecolor='black', markerfacecolor='black',
-                   markersize=my_marker_size, label='Numerical results')
+                   markersize=my_marker_size, label=numerical_label,
+                   markevery=markers)
 
   plt.legend(bbox_to_anchor=(0., 1.02, 1., .102), loc=3,
              ncol=2, mode="expand", borderaxespad=0.)
@@ -111,78 +534,217 @@ def plotFigure(analytical_x_data, analytical_y_data,
     if figure_rootfilename is None:
       error_msg = 'You must provide a "figure_rootfilename" since do_show=False'
       raise Exception, error_msg
-    figure_eps_filename = '{0}.eps'.format(figure_rootfilename)
-    figure_pdf_filename = '{0}.pdf'.format(figure_rootfilename)
-    this_fig_dir, short_eps_file_name = os.path.split(figure_eps_filename)
-    if not os.path.isdir(this_fig_dir):
-      os.makedirs(this_fig_dir)
-      print 'Created subdirectory "{0}"'.format(this_fig_dir)
-    plt.savefig(figure_eps_filename, format='eps', dpi=1000)
-    # Convert eps to pdf
-    try:
-      command = "epstopdf {0}".format(figure_eps_filename)
-      retcode = subprocess.call(command, shell=True)
-      if retcode < 0:
-        print >>sys.stderr, "Child was terminated by signal", -retcode
-      else:
-        print >>sys.stderr, "Child returned", retcode
-    except OSError as e:
-      print >>sys.stderr, "Execution failed:", e
-    # Delete the eps
-    try:
-      os.remove(figure_eps_filename)
-    except OSError as e:
-      print >>sys.stderr, "Could not remove eps file"
-    print 'Figure saved as {0}'.format(figure_pdf_filename)
+    figure_filename = '{0}.{1}'.format(figure_rootfilename, figure_format)
+    this_fig_dir, short_file_name = os.path.split(figure_filename)
+    if this_fig_dir and not os.path.isdir(this_fig_dir):
+      try:
+        os.makedirs(this_fig_dir)
+        print 'Created subdirectory "{0}"'.format(this_fig_dir)
+      except OSError:
+        if not os.path.isdir(this_fig_dir): # not created by another process
+          raise
+    # pdf and eps are vector formats, dpi only matters for png
+    plt.savefig(figure_filename, format=figure_format, dpi=FIGURE_DPI)
+    plt.close(fig)
+    print 'Figure saved as {0}'.format(figure_filename)
+    return figure_filename
 
-def createFigsBenchmark(redback_dir,# redback directory
-                        benchmark_dir_short_name, # benchmark subdirectory (e.g 'benchmark_7_HM')
-                        csv_shortfilename, # short filename for csv file to read (note: same name in results and gold subdirs)
-                        x_properties_list, # list of properties to plot in x (e.g ['time','time'])
-                        y_properties_list, # list of properties to plot in y (e.g ['stress_xx','p0'])
-                        do_show=False): # flag to show figure or save it to file
-  ''' Generic function to produce all figures for a given benchmark '''
+class LivePlot(object):
+  ''' Figure of csv columns of a running simulation, redrawn incrementally:
+      new lines of the csv file are appended to the plotted series, which
+      are downsampled again (LTTB of the plotted points, not of all data,
+      with buckets of same x width as older points are sparser) only when
+      they get twice longer than max_points.
+      Usage: LivePlot('out.csv', 'time', ['middle_temp'], PLOT_MAX_POINTS, PLOT_MAX_MARKERS).run()
+  '''
+
+  def __init__(self, csv_filename, x_property_name, y_property_names,
+               max_points=None, max_markers=None,
+               marker_spacing=PLOT_MARKER_SPACING,
+               figure_filename=None): # redrawn figure file (default: show figure)
+    self.csv_filename = csv_filename
+    self.x_property_name = x_property_name
+    self.y_property_names = y_property_names
+    self.max_points = max_points
+    self.max_markers = max_markers
+    self.marker_spacing = marker_spacing
+    self.figure_filename = figure_filename
+    self.nb_points_read = 0
+    self.fig = plt.figure()
+    ax = self.fig.add_subplot(1,1,1)
+    plt.xlabel(PROPERTY_LABELS.get(x_property_name, x_property_name), fontsize=20)
+    self.series = {} # key=y property name, value=(line, plotted x data, plotted y data)
+    for y_property_name in y_property_names:
+      line, = ax.plot([], [], '-x', markersize=10,
+                      label=PROPERTY_LABELS.get(y_property_name, y_property_name))
+      self.series[y_property_name] = (line, np.empty(0), np.empty(0))
+    plt.legend(loc='best')
+    self.ax = ax
+
+  def update(self, data):
+    ''' Append new data (dictionary of arrays, key=column key) to the figure '''
+    x_new = data[self.x_property_name]
+    self.nb_points_read += len(x_new)
+    for y_property_name in self.y_property_names:
+      (line, x_data, y_data) = self.series[y_property_name]
+      x_data = np.concatenate([x_data, x_new])
+      y_data = np.concatenate([y_data, data[y_property_name]])
+      if self.max_points is not None and len(x_data) > 2*self.max_points:
+        indices = downsampleLTTB(x_data, y_data, self.max_points, bucket_by_x=True)
+        (x_data, y_data) = (x_data[indices], y_data[indices])
+      line.set_data(x_data, y_data)
+      if self.max_markers is not None and len(x_data) > self.max_markers:
+        line.set_markevery(thinMarkers(x_data, y_data, self.marker_spacing, self.max_markers))
+      self.series[y_property_name] = (line, x_data, y_data)
+    self.ax.relim()
+    self.ax.autoscale_view()
+    self.redraw()
+
+  def redraw(self):
+    if self.figure_filename is not None:
+      # written next to the figure file then renamed, so that viewers never see a partial file
+      root, extension = os.path.splitext(self.figure_filename)
+      tmp_filename = '{0}.{1}{2}'.format(root, os.getpid(), extension)
+      self.fig.savefig(tmp_filename, dpi=FIGURE_DPI)
+      os.rename(tmp_filename, self.figure_filename)
+    else:
+      self.fig.canvas.draw_idle()
+      plt.pause(0.001)
+
+  def run(self, poll_interval=1., timeout=None):
+    ''' Follow the csv file and redraw the figure whenever lines are added
+        @param[in] timeout - float, stop after this time (s) without new
+          lines (default: follow forever)
+    '''
+    column_keys = [self.x_property_name] + self.y_property_names
+    for data in iterCsvChunks(self.csv_filename, column_keys, follow=True,
+                              poll_interval=poll_interval, timeout=timeout):
+      self.update(data)
+    return self.nb_points_read
+
+def benchmarkPlotFigure(nb_points=1000000, figure_format='eps'):
+  ''' Compare time and file size of plotFigure with and without downsampling
+      on a synthetic noisy series
+      @return list of (max_points, time (s), file size (bytes))
+  '''
+  tmp_dir = tempfile.mkdtemp(prefix='plot_figure_')
+  results = []
+  try:
+    x_data = np.linspace(0, 100, nb_points)
+    y_data = np.sin(x_data/5.) + 0.01*np.random.randn(nb_points)
+    for max_points in [None, PLOT_MAX_POINTS]:
+      start = time.time()
+      figure_filename = plotFigure(x_data[::1000], y_data[::1000], x_data, y_data,
+                                   figure_rootfilename=os.path.join(tmp_dir, 'figure'),
+                                   figure_format=figure_format, max_points=max_points,
+                                   max_markers=None if max_points is None else PLOT_MAX_MARKERS)
+      results.append((max_points, time.time() - start, os.path.getsize(figure_filename)))
+  finally:
+    shutil.rmtree(tmp_dir)
+  for (max_points, timing, size) in results:
+    print 'Plotted {0} points (max_points={1}): {2:.2f}s, {3:.1f} MB'.format(
+      nb_points, max_points, timing, size/1024.**2)
+  return results
+
+def getPropertyLabel(property_name):
+  ''' Return label to use on figure axis for given property '''
+  if property_name not in PROPERTY_LABELS:
+    error_msg = 'You must edit utilities.py and add a label for property "{0}"'.format(property_name)
+    raise Exception, error_msg
+  return PROPERTY_LABELS[property_name]
+
+def isFileUpToDate(filename, input_filenames):
+  ''' Return True if file exists and is more recent than all its inputs '''
+  if not os.path.isfile(filename):
+    return False
+  mtime = os.path.getmtime(filename)
+  return all([os.path.getmtime(input_filename) <= mtime for input_filename in input_filenames])
+
+def createFigBenchmark(redback_dir,# redback directory
+                       benchmark_dir_short_name, # benchmark subdirectory (e.g 'benchmark_7_HM')
+                       csv_shortfilename, # short filename for csv file to read (note: same name in results and gold subdirs)
+                       x_property_name, # property to plot in x (e.g 'time')
+                       y_property_name, # property to plot in y (e.g 'stress_xx')
+                       do_show=False, # flag to show figure or save it to file
+                       figure_format='pdf', # format of figure file ('pdf', 'png' or 'eps')
+                       only_if_changed=False): # flag to skip figure more recent than its csv files
+  ''' Generic function to produce one figure for a given benchmark
+      @return name of figure file (None if do_show or skipped)
+  '''
   results_dir = os.path.join(redback_dir,'tests',benchmark_dir_short_name)
   gold_dir = os.path.join(results_dir,'gold')
   results_csv_filename = os.path.join(results_dir,csv_shortfilename)
   gold_csv_filename = os.path.join(gold_dir,csv_shortfilename)
   figures_dir = os.path.join(redback_dir,'doc','theory','figures')
+  fig_rootshortfilename = '{0}_{1}_{2}'.format(benchmark_dir_short_name,os.path.splitext(csv_shortfilename)[0],y_property_name)
+  figure_rootfilename = os.path.join(figures_dir,benchmark_dir_short_name,fig_rootshortfilename)
 
-  csv_results_data = parseCsv(results_csv_filename)
-  csv_gold_data = parseCsv(gold_csv_filename)
+  if only_if_changed and not do_show and \
+    isFileUpToDate('{0}.{1}'.format(figure_rootfilename, figure_format),
+                   [results_csv_filename, gold_csv_filename]):
+    print 'Figure {0}.{1} is up to date'.format(figure_rootfilename, figure_format)
+    return None
 
-  labels = {
-    'time':'Time',
-    'stress_xx':'Stress xx',
-    'stress_zz':'Stress zz',
-    'p0':'Pore pressure',
-  }
+  x_property_label = getPropertyLabel(x_property_name)
+  y_property_label = getPropertyLabel(y_property_name)
+  csv_results_data = readCsvCached(results_csv_filename, [x_property_name, y_property_name])
+  csv_gold_data = readCsvCached(gold_csv_filename, [x_property_name, y_property_name])
+  return plotFigure(analytical_x_data=csv_gold_data[x_property_name],
+                    analytical_y_data=csv_gold_data[y_property_name],
+                    numerical_x_data=csv_results_data[x_property_name],
+                    numerical_y_data=csv_results_data[y_property_name],
+                    figure_rootfilename=figure_rootfilename,
+                    x_label=x_property_label,
+                    y_label=y_property_label,
+                    do_show=do_show,
+                    figure_format=figure_format)
 
+def createFigsBenchmark(redback_dir,# redback directory
+                        benchmark_dir_short_name, # benchmark subdirectory (e.g 'benchmark_7_HM')
+                        csv_shortfilename, # short filename for csv file to read (note: same name in results and gold subdirs)
+                        x_properties_list, # list of properties to plot in x (e.g ['time','time'])
+                        y_properties_list, # list of properties to plot in y (e.g ['stress_xx','p0'])
+                        do_show=False, # flag to show figure or save it to file
+                        figure_format='pdf', # format of figure files ('pdf', 'png' or 'eps')
+                        only_if_changed=False): # flag to skip figures more recent than their csv files
+  ''' Generic function to produce all figures for a given benchmark '''
   nb_props = len(x_properties_list)
   assert len(y_properties_list)==nb_props
   for i_prop in range(nb_props):
-    x_property_name = x_properties_list[i_prop]
-    if x_property_name in labels:
-      x_property_label = labels[x_property_name]
-    else:
-      error_msg = 'You must edit utilities.py and add a label for property "{0}"'.format(x_property_name)
-      raise Exception, error_msg
-    y_property_name = y_properties_list[i_prop]
-    if y_property_name in labels:
-      y_property_label = labels[y_property_name]
-    else:
-      error_msg = 'You must edit utilities.py and add a label for property "{0}"'.format(y_property_name)
-      raise Exception, error_msg
+    createFigBenchmark(redback_dir, benchmark_dir_short_name, csv_shortfilename,
+                       x_properties_list[i_prop], y_properties_list[i_prop],
+                       do_show=do_show, figure_format=figure_format,
+                       only_if_changed=only_if_changed)
 
-    fig_rootshortfilename = '{0}_{1}_{2}'.format(benchmark_dir_short_name,os.path.splitext(csv_shortfilename)[0],y_property_name)
-    plotFigure(analytical_x_data=csv_gold_data[x_property_name],
-               analytical_y_data=csv_gold_data[y_property_name],
-               numerical_x_data=csv_results_data[x_property_name],
-               numerical_y_data=csv_results_data[y_property_name],
-               figure_rootfilename=os.path.join(figures_dir,benchmark_dir_short_name,fig_rootshortfilename),
-               x_label=x_property_label,
-               y_label=y_property_label,
-               do_show=do_show)
+def findBenchmarkFigures(redback_dir, x_property_name='time'):
+  ''' Find all figures that can be drawn from the benchmark directories in
+      redback_dir/tests: one figure per labelled column found in both the
+      results and gold version of a csv file.
+      @return list of (benchmark_dir_short_name, csv_shortfilename,
+        x_property_name, y_property_name)
+  '''
+  figures = []
+  tests_dir = os.path.join(redback_dir, 'tests')
+  for benchmark_dir_short_name in sorted(os.listdir(tests_dir)):
+    gold_dir = os.path.join(tests_dir, benchmark_dir_short_name, 'gold')
+    if not benchmark_dir_short_name.startswith('benchmark_') or not os.path.isdir(gold_dir):
+      continue
+    for csv_shortfilename in sorted(os.listdir(gold_dir)):
+      results_csv_filename = os.path.join(tests_dir, benchmark_dir_short_name, csv_shortfilename)
+      if not csv_shortfilename.endswith('.csv') or not os.path.isfile(results_csv_filename):
+        continue # test not run yet
+      columns = None
+      for csv_filename in [results_csv_filename, os.path.join(gold_dir, csv_shortfilename)]:
+        with open(csv_filename, 'rb') as csvfile:
+          headers = [elt.strip().lower() for elt in csvfile.readline().split(',')]
+        columns = headers if columns is None else [elt for elt in columns if elt in headers]
+      if x_property_name not in columns:
+        continue
+      for y_property_name in columns:
+        if y_property_name != x_property_name and y_property_name in PROPERTY_LABELS:
+          figures.append((benchmark_dir_short_name, csv_shortfilename,
+                          x_property_name, y_property_name))
+  return figures
 
 if __name__ == "__main__":
   # test that parser works
@@ -192,6 +754,9 @@ if __name__ == "__main__":
   data_short = parseCsv(input_csv_filename, ['time','p0','zdisp'])
   assert sorted(data_all.keys()) == ['p0', 'stress_xx', 'stress_yy', 'stress_zz', 'time', 'zdisp']
   assert sorted(data_short.keys()) == ['p0', 'time', 'zdisp']
-  assert data_all['time'] == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0]
-  assert data_short['time'] == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0]
+  assert list(data_all['time']) == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0]
+  assert list(data_short['time']) == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0]
   print 'Parser works OK!'
+  if '--benchmark' in sys.argv:
+    benchmarkParseCsv()
+    benchmarkPlotFigure()
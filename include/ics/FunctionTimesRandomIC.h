@@ -17,6 +17,7 @@
 
 #include "InitialCondition.h"
 #include "InputParameters.h"
+#include "RedbackRandom.h"
 
 // System includes
 #include <string>
@@ -58,10 +59,19 @@ protected:
    */
   virtual Real value(const Point & p);
 
+  /// Random number in [0, 1) for a point (or the current node)
+  Real randomNumber(const Point & p);
+
   Real _min;
   Real _max;
   Real _range;
   Function & _func;
+
+  unsigned int _seed;
+  RedbackRandom::Generator _generator;
+  RedbackRandom::Key _key;
+  /// Random field replacing the generator (if field_file is given)
+  RedbackRandomField _field;
 };
 
 #endif // FUNCTIONTIMESRANDOMIC_H
@@ -16,6 +16,7 @@
 #define REDBACKCHEMENDO_H
 
 #include "Kernel.h"
+#include "RedbackTimer.h"
 
 class RedbackChemEndo;
 
@@ -28,6 +29,9 @@ public:
   RedbackChemEndo(const InputParameters & parameters);
   virtual ~RedbackChemEndo();
 
+  virtual void computeResidual();
+  virtual void computeJacobian();
+
 protected:
   virtual Real computeQpResidual();
   virtual Real computeQpJacobian();
@@ -37,6 +41,10 @@ protected:
 
 private:
   Real _time_factor;
+
+  /// Timing of the residual and Jacobian computations (see RedbackTimingOutput)
+  RedbackTimer::Counter * _residual_timer;
+  RedbackTimer::Counter * _jacobian_timer;
 };
 
 #endif /* REDBACKCHEMENDO_H */
@@ -16,6 +16,7 @@
 #define REDBACKCHEMPRESSURE_H
 
 #include "Kernel.h"
+#include "RedbackTimer.h"
 
 class RedbackChemPressure;
 
@@ -28,6 +29,10 @@ public:
   RedbackChemPressure(const InputParameters & parameters);
   virtual ~RedbackChemPressure();
 
+  virtual void computeResidual();
+  virtual void computeJacobian();
+  virtual void computeOffDiagJacobian(unsigned int jvar);
+
 protected:
   virtual Real computeQpResidual();
   virtual Real computeQpJacobian();
@@ -41,6 +46,11 @@ protected:
 
 private:
   Real _time_factor;
+
+  /// Timing of the residual and Jacobian computations (see RedbackTimingOutput)
+  RedbackTimer::Counter * _residual_timer;
+  RedbackTimer::Counter * _jacobian_timer;
+  RedbackTimer::Counter * _off_diag_jacobian_timer;
 };
 
 #endif /* REDBACKCHEMPRESSURE_H */
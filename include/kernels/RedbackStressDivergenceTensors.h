@@ -2,6 +2,7 @@
 #define REDBACKSTRESSDIVERGENCETENSORS_H
 
 #include "Kernel.h"
+#include "RedbackTimer.h"
 #include "ElasticityTensorR4.h"
 #include "RankTwoTensor.h"
 
@@ -25,6 +26,10 @@ class RedbackStressDivergenceTensors : public Kernel
 public:
   RedbackStressDivergenceTensors(const InputParameters & parameters);
 
+  virtual void computeResidual();
+  virtual void computeJacobian();
+  virtual void computeOffDiagJacobian(unsigned int jvar);
+
 protected:
   virtual Real computeQpResidual();
   virtual Real computeQpJacobian();
@@ -55,6 +60,11 @@ private:
   const unsigned int _porepressure_var;
 
   const MaterialProperty<RealVectorValue> & _gravity_term;
+
+  /// Timing of the residual and Jacobian computations (see RedbackTimingOutput)
+  RedbackTimer::Counter * _residual_timer;
+  RedbackTimer::Counter * _jacobian_timer;
+  RedbackTimer::Counter * _off_diag_jacobian_timer;
 };
 
 #endif // REDBACKSTRESSDIVERGENCETENSORS_H
@@ -17,6 +17,8 @@
 
 //#include "FiniteStrainPlasticMaterial.h"
 #include "Material.h"
+#include "RedbackArrheniusTable.h"
+#include "RedbackTimer.h"
 
 // Forward Declarations
 class RedbackMaterial;
@@ -57,10 +59,61 @@ public:
     KozenyCarman
   };
 
+  /// Static method for use in validParams for getting the Arrhenius method
+  static MooseEnum arrheniusMethodEnum();
+
+  // various methods to compute the Arrhenius factors exp(Ar delta T / (1 + delta T))
+  enum ArrheniusMethod
+  {
+    exact,     // original expressions
+    fused,     // each exponential computed once per qp
+    tabulated // fused, with factors interpolated from lookup tables
+  };
+
+  /// Quadrature point values used by the terms with Arrhenius factors
+  struct ArrheniusInputs
+  {
+    Real T, delta, ar, gr, alpha_1, alpha_2, alpha_3, confining_pressure, pore_pres;
+    Real ar_F, ar_R, mu, total_porosity;
+    Real phi0, eta1, eta2, Kc, Aphi, da_endo, da_exo;
+    bool is_mechanics_on, is_chemistry_on;
+  };
+
+  /// Terms with Arrhenius factors at a quadrature point (mechanical dissipation without mechanics, chemical terms
+  /// with chemistry, zero otherwise)
+  struct ArrheniusTerms
+  {
+    Real exponential;
+    Real mechanical_dissipation, mechanical_dissipation_jac;
+    Real solid_ratio, chemical_porosity;
+    Real chemical_endothermic_energy, chemical_endothermic_energy_jac;
+    Real chemical_exothermic_energy, chemical_exothermic_energy_jac;
+    Real chemical_source_mass;
+  };
+
+  /// Lookup tables of exp(Ar delta T / (1 + delta T)) and of the chemical Arrhenius factors (tabulated method)
+  struct ArrheniusTables
+  {
+    RedbackArrheniusTable ar, ar_F, ar_R, ar_F_T, ar_R_T;
+    Real exp_minus_ar;
+  };
+
+  /// Terms with Arrhenius factors computed with one of the Arrhenius methods
+  static void computeArrheniusTerms(ArrheniusMethod method,
+                                    const ArrheniusInputs & in,
+                                    const ArrheniusTables & tables,
+                                    ArrheniusTerms & terms);
+  static void computeArrheniusTermsExact(const ArrheniusInputs & in, ArrheniusTerms & terms);
+  static void computeArrheniusTermsFused(ArrheniusMethod method,
+                                         const ArrheniusInputs & in,
+                                         const ArrheniusTables & tables,
+                                         ArrheniusTerms & terms);
+
 protected:
   virtual void stepInitQpProperties();
   virtual void computeQpProperties();
   virtual void computeRedbackTerms();
+  virtual void computeQpArrheniusTerms();
 
   bool _has_T;
   const VariableValue & _T;
@@ -142,6 +195,9 @@ protected:
   ContinuationMethod _continuation_method;
   DensityMethod _density_method;
   PermeabilityMethod _permeability_method;
+  ArrheniusMethod _arrhenius_method;
+
+  ArrheniusTables _arrhenius_tables;
 
   Real _exponential;
 
@@ -160,6 +216,9 @@ protected:
   MaterialProperty<RealVectorValue> & _solid_velocity;
 
   Real _T0_param, _P0_param;
+
+  /// Timing of computeRedbackTerms (see RedbackTimingOutput)
+  RedbackTimer::Counter * _redback_terms_timer;
 };
 
 #endif // REDBACKMATERIAL_H
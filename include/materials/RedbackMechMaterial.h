@@ -20,6 +20,7 @@
 #include "RankFourTensor.h"
 #include "ElasticityTensorR4.h"
 #include "RotationTensor.h"
+#include "RedbackTimer.h"
 //#include "FiniteStrainPlasticMaterial.h"
 
 // Forward Declarations
@@ -75,6 +76,17 @@ protected:
   /// Individual material information
   ElasticityTensorR4 _Cijkl;
 
+  /**
+   * Compact storage of the stateful properties: only the old stress and
+   * plastic strain (and the old elastic strain if damage is coupled) are
+   * kept, the elastic strain is recovered from the stress with the
+   * compliance tensor and the total strain is the sum of the elastic and
+   * plastic strains.
+   */
+  bool _compact_storage;
+  RankFourTensor _compliance;
+  RankTwoTensor getElasticStrainOld();
+
   // MaterialProperty<RankTwoTensor> & _d_stress_dT;
   // RankTwoTensor _strain_increment;
 
@@ -86,8 +98,10 @@ protected:
   // Copy-paste from FiniteStrainMaterial.h
   MaterialProperty<RankTwoTensor> & _strain_rate;
   MaterialProperty<RankTwoTensor> & _strain_increment;
-  MaterialProperty<RankTwoTensor> & _total_strain_old;
-  MaterialProperty<RankTwoTensor> & _elastic_strain_old;
+  /// Stateful only without compact_storage (NULL otherwise)
+  MaterialProperty<RankTwoTensor> * _total_strain_old;
+  /// Stateful only without compact_storage or when damage is coupled (NULL otherwise)
+  MaterialProperty<RankTwoTensor> * _elastic_strain_old;
   MaterialProperty<RankTwoTensor> & _stress_old;
   MaterialProperty<RankTwoTensor> & _rotation_increment;
   MaterialProperty<RankTwoTensor> & _dfgrd;
@@ -97,7 +111,8 @@ protected:
   MaterialProperty<RankTwoTensor> & _plastic_strain;
   MaterialProperty<RankTwoTensor> & _plastic_strain_old;
   MaterialProperty<Real> & _eqv_plastic_strain;
-  MaterialProperty<Real> & _eqv_plastic_strain_old;
+  /// Stateful only without compact_storage (NULL otherwise)
+  MaterialProperty<Real> * _eqv_plastic_strain_old;
 
   // virtual Real yieldFunction(const RankTwoTensor & stress, const Real
   // yield_stress);
@@ -192,6 +207,11 @@ protected:
   virtual void formDamageDissipation(RankTwoTensor &);
 
   Real _damage_dissipation;
+
+  /// Timing of computeProperties and of its main steps (see RedbackTimingOutput)
+  RedbackTimer::Counter * _properties_timer;
+  RedbackTimer::Counter * _return_map_timer;
+  RedbackTimer::Counter * _redback_terms_timer;
 };
 
 #endif // REDBACKMECHMATERIAL_H
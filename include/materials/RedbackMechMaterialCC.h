@@ -36,6 +36,12 @@ protected:
   Real getFlowIncrement(Real, Real, Real, Real, Real);
   void get_py_qy(Real, Real, Real &, Real &, Real);
   Real getDerivativeFlowIncrement(const RankTwoTensor &, Real, Real, Real, Real, Real);
+
+  /// Warm start parameter of the projection on the yield surface at the current qp (see Ellipse::sqrDistanceSpecial)
+  Real * getProjectionParam();
+
+  /// Root of the last projection at each qp, initial guess of the next one (return map iterations move little)
+  std::vector<Real> _projection_param;
 };
 
 #endif // REDBACKMECHMATERIALCC_H
@@ -18,6 +18,8 @@
 // MOOSE includes
 #include "MeshModifier.h"
 
+#include <fstream>
+
 // Forward declerations
 class ElementFileSubdomain;
 
@@ -26,6 +28,12 @@ InputParameters validParams<ElementFileSubdomain>();
 
 /**
  * MeshModifier for assigning subdomain IDs of all elements
+ * The IDs of the elements can be given in a text file (IDs separated by
+ * whitespace) or in a binary file, recognised by its header:
+ *   8 bytes   magic string "RBELMIDS"
+ *   uint32    size of one ID in bytes (4 or 8)
+ *   uint64    number of IDs
+ * followed by the IDs, all little-endian (see scripts/element_id_file.py).
  */
 class ElementFileSubdomain : public MeshModifier
 {
@@ -45,6 +53,22 @@ public:
    * Perform the actual element subdomain ID assignment
    */
   virtual void modify();
+
+protected:
+  /// Read element IDs from a text or binary file, return false if the file cannot be opened
+  bool readElementIds(const std::string & file_name, std::vector<dof_id_type> & elemids);
+
+  /// Read all element IDs of a text file
+  void readTextElementIds(std::ifstream & file, std::vector<dof_id_type> & elemids);
+
+  /// Read all element IDs of a binary file at once (stream positioned after the magic string)
+  void readBinaryElementIds(std::ifstream & file, std::vector<dof_id_type> & elemids);
+
+  /// Value of the unsigned integer stored in size bytes, least significant byte first
+  static uint64_t decodeLittleEndian(const unsigned char * bytes, unsigned int size);
+
+  /// Magic string at the beginning of binary element ID files
+  static const char BINARY_MAGIC[ 9 ];
 };
 
 #endif // ELEMENTFILESUBDOMAIN_H
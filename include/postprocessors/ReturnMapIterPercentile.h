@@ -0,0 +1,31 @@
+#ifndef RETURNMAPITERPERCENTILE_H
+#define RETURNMAPITERPERCENTILE_H
+
+#include "GeneralPostprocessor.h"
+
+// Forward declarations
+class ReturnMapIterPercentile;
+class ReturnMapIterStatistics;
+
+template <>
+InputParameters validParams<ReturnMapIterPercentile>();
+
+/**
+ * Percentile of the number of return map iterations over the plastic
+ * quadrature points, taken from a ReturnMapIterStatistics user object.
+ */
+class ReturnMapIterPercentile : public GeneralPostprocessor
+{
+public:
+  ReturnMapIterPercentile(const InputParameters & parameters);
+
+  virtual void initialize() {}
+  virtual void execute() {}
+  virtual PostprocessorValue getValue();
+
+protected:
+  const ReturnMapIterStatistics & _statistics;
+  Real _percentile;
+};
+
+#endif // RETURNMAPITERPERCENTILE_H
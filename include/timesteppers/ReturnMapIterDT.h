@@ -19,6 +19,7 @@
 #include "PostprocessorInterface.h"
 
 class ReturnMapIterDT;
+class ReturnMapIterStatistics;
 
 template <>
 InputParameters validParams<ReturnMapIterDT>();
@@ -28,17 +29,47 @@ InputParameters validParams<ReturnMapIterDT>();
  * this value is above an upper threshold the time step is decreased by a user
  * supplied ratio. If the value is below a lower threshold the time step is
  * increased by 1/ratio.
+ * In predictive mode, the number of return map iterations (percentile of a
+ * ReturnMapIterStatistics user object) is fitted as a linear function of dt
+ * over the last time steps, and the next dt is the largest one predicted to
+ * stay below a target number of iterations (and below a target number of
+ * nonlinear iterations, if given), which avoids the grow/shrink cycles of
+ * the threshold mode.
  **/
 class ReturnMapIterDT : public TimeStepper, public PostprocessorInterface
 {
 public:
   ReturnMapIterDT(const InputParameters & parameters);
 
+  /// Static method for use in validParams for getting the time stepping method
+  static MooseEnum methodEnum();
+
+  // various methods to compute the next time step
+  enum Method
+  {
+    threshold, // multiply or divide dt by a ratio
+    predictive // largest dt predicted from the recent iteration counts
+  };
+
 protected:
   virtual Real computeInitialDT();
   virtual Real computeDT();
 
-  const PostprocessorValue & _extreme_value;
+  /// dt of the threshold method
+  Real computeThresholdDT(Real iter);
+
+  /// dt of the predictive method
+  Real computePredictiveDT();
+
+  /// Error if the parameter needed by the selected method is not set
+  void checkRequiredParam(const std::string & param_name);
+
+  /// Statistics user object (not available yet in the constructor)
+  const ReturnMapIterStatistics & getStatistics();
+
+  Method _method;
+  const PostprocessorValue * _extreme_value;
+  const ReturnMapIterStatistics * _statistics;
   bool _has_initial_dt;
   Real _initial_dt;
   Real _max_iter;
@@ -46,6 +77,19 @@ protected:
   Real _ratio;
   Real _dt_min;
   Real _dt_max;
+
+  // predictive method
+  Real _percentile;
+  Real _target_iter;
+  bool _has_target_nl_its;
+  Real _target_nl_its;
+  unsigned int _history_size;
+  Real _max_growth;
+  Real _safety_factor;
+
+  /// dt and iteration percentile of the last time steps
+  std::vector<Real> & _dt_history;
+  std::vector<Real> & _iter_history;
 };
 
 #endif /* RETURNMAPITERDT_H */
@@ -0,0 +1,41 @@
+#ifndef ELEMENTIDFILEWRITER_H
+#define ELEMENTIDFILEWRITER_H
+
+#include "ElementUserObject.h"
+
+// Forward declarations
+class ElementIdFileWriter;
+class Function;
+
+template <>
+InputParameters validParams<ElementIdFileWriter>();
+
+/**
+ * Collects the IDs of all elements where a function (typically an
+ * ImageFunction) takes a given value at one of the quadrature points, and
+ * writes them sorted and without duplicates to a text (or binary) file that
+ * can be read by the ElementFileSubdomain mesh modifier.
+ * IDs are gathered in memory (merged over threads and processors) and the
+ * file is written once by the first processor.
+ */
+class ElementIdFileWriter : public ElementUserObject
+{
+public:
+  ElementIdFileWriter(const InputParameters & parameters);
+
+  virtual void initialize();
+  virtual void execute();
+  virtual void threadJoin(const UserObject & y);
+  virtual void finalize();
+
+protected:
+  Function & _function;
+  Real _value;
+  FileName _file_name;
+  bool _binary;
+
+  /// IDs of elements found so far (sorted)
+  std::set<dof_id_type> _elem_ids;
+};
+
+#endif // ELEMENTIDFILEWRITER_H
@@ -0,0 +1,33 @@
+#ifndef REDBACKTIMINGOUTPUT_H
+#define REDBACKTIMINGOUTPUT_H
+
+#include "GeneralUserObject.h"
+
+// Forward declarations
+class RedbackTimingOutput;
+
+template <>
+InputParameters validParams<RedbackTimingOutput>();
+
+/**
+ * Switches on the timing instrumentation of Redback materials and kernels
+ * (see RedbackTimer) and writes the call counts and cumulative wall times of
+ * all instrumented methods at the end of each time step, in one csv file per
+ * processor: <file_base>.rank<N>.csv
+ * Use scripts/analyze_timing.py to merge and summarise the files.
+ */
+class RedbackTimingOutput : public GeneralUserObject
+{
+public:
+  RedbackTimingOutput(const InputParameters & parameters);
+
+  virtual void initialize();
+  virtual void execute();
+  virtual void finalize();
+
+protected:
+  std::string _file_name;
+  bool _header_written;
+};
+
+#endif // REDBACKTIMINGOUTPUT_H
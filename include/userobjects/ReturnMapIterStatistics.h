@@ -0,0 +1,49 @@
+#ifndef RETURNMAPITERSTATISTICS_H
+#define RETURNMAPITERSTATISTICS_H
+
+#include "ElementUserObject.h"
+
+// Forward declarations
+class ReturnMapIterStatistics;
+
+template <>
+InputParameters validParams<ReturnMapIterStatistics>();
+
+/**
+ * Domain-wide histogram of the number of return map iterations
+ * (material property returnmap_iter of RedbackMechMaterial) over all
+ * quadrature points. Percentiles are computed over the plastic quadrature
+ * points only (at least one iteration), so that a localised plastic zone is
+ * not hidden by the elastic part of the domain.
+ * Used by the predictive mode of ReturnMapIterDT and by the
+ * ReturnMapIterPercentile postprocessor.
+ */
+class ReturnMapIterStatistics : public ElementUserObject
+{
+public:
+  ReturnMapIterStatistics(const InputParameters & parameters);
+
+  virtual void initialize();
+  virtual void execute();
+  virtual void threadJoin(const UserObject & y);
+  virtual void finalize();
+
+  /// Number of quadrature points with i iterations (last bin: max_iter or more)
+  const std::vector<unsigned long> & histogram() const { return _histogram; }
+
+  /// Number of quadrature points with at least one iteration
+  unsigned long nbPlasticPoints() const;
+
+  /// Smallest number of iterations reached by p percent of the plastic points (0 if none)
+  Real percentile(Real p) const;
+
+  /// Largest number of iterations
+  Real maxIter() const;
+
+protected:
+  const MaterialProperty<Real> & _returnmap_iter;
+
+  std::vector<unsigned long> _histogram;
+};
+
+#endif // RETURNMAPITERSTATISTICS_H
@@ -28,12 +28,19 @@ public:
    * is (y0,y1) with y0 >= 0 and y1 >= 0. The function returns the squared
    * distance from the query point to the ellipse. It also computes the
    * ellipse point (x0,x1) in the first quadrant that is closest to (y0,y1).
+   * The root t of F(t) = (e0 y0 / (t + e0^2))^2 + (e1 y1 / (t + e1^2))^2 - 1
+   * is found by bisection, or if t is given, by Newton iterations (safeguarded
+   * by the bisection bracket) starting from *t, typically the root of the
+   * previous projection of the same quadrature point, which needs much fewer
+   * iterations.
    * @param e: vector of ellipse axes
    * @param y: coordinates of point to project
    * @param x: coordinates of projection point on the ellipse
+   * @param t: optional initial guess (ignored if outside of the bracket, e.g.
+   * -std::numeric_limits<Real>::max()), root on output
    * @return d: distance from y to ellipse
    */
-  static Real sqrDistanceSpecial(Real const e[ 2 ], Real const y[ 2 ], Real x[ 2 ]);
+  static Real sqrDistanceSpecial(Real const e[ 2 ], Real const y[ 2 ], Real x[ 2 ], Real * t = NULL);
 
   /**
    * The ellipse is (x0/e0)^2 + (x1/e1)^2 = 1. The query point is (y0,y1). The
@@ -42,9 +49,10 @@ public:
    * @param e: vector of ellipse axes
    * @param y: coordinates of point to project
    * @param x: coordinates of projection point on the ellipse
+   * @param t: optional warm start parameter (see sqrDistanceSpecial)
    * @return d: distance from y to ellipse
    */
-  static Real sqrDistance(Real const e[ 2 ], Real const y[ 2 ], Real x[ 2 ]);
+  static Real sqrDistance(Real const e[ 2 ], Real const y[ 2 ], Real x[ 2 ], Real * t = NULL);
 
   /**
    * Function to check if given point (y0, y1) is outside of ellipse (plasticity
@@ -88,9 +96,11 @@ public:
    * @param p_c: pre-consolidation pressure
    * @param y: coordinates of point to project
    * @param x: coordinates of projection point on the ellipse
+   * @param t: optional warm start parameter (see sqrDistanceSpecial)
    * @return d: distance to ellipse
    */
-  static Real distanceCC(Real const m, Real const p_c, Real const y0, Real const y1, Real & x0, Real & x1);
+  static Real distanceCC(
+    Real const m, Real const p_c, Real const y0, Real const y1, Real & x0, Real & x1, Real * t = NULL);
 
   /**
    * Function to compute the distance from a query point to an ellipse
@@ -100,10 +110,16 @@ public:
    * @param vertical_axis: length of ellipse's ~vertical (for alpha=0) axis
    * @param y: coordinates of point to project
    * @param x: coordinates of projection point on the ellipse
+   * @param t: optional warm start parameter (see sqrDistanceSpecial)
    * @return d: distance to ellipse
    */
-  static Real distanceToCenteredEllipse(
-    Real const horizontal_axis, Real const vertical_axis, Real const y0, Real const y1, Real & x0, Real & x1);
+  static Real distanceToCenteredEllipse(Real const horizontal_axis,
+                                        Real const vertical_axis,
+                                        Real const y0,
+                                        Real const y1,
+                                        Real & x0,
+                                        Real & x1,
+                                        Real * t = NULL);
 
   /**
    * Function to compute the distance from a query point to a rotated ellipse
@@ -116,10 +132,17 @@ public:
    * @param alpha: Dafalias anisotropic parameter (angle)
    * @param y: coordinates of point to project
    * @param x: coordinates of projection point on the ellipse
+   * @param t: optional warm start parameter (see sqrDistanceSpecial)
    * @return d: distance to ellipse
    */
-  static Real distanceCCanisotropic(
-    Real const m, Real const p_0, Real const alpha, Real const y0, Real const y1, Real & x0, Real & x1);
+  static Real distanceCCanisotropic(Real const m,
+                                    Real const p_0,
+                                    Real const alpha,
+                                    Real const y0,
+                                    Real const y1,
+                                    Real & x0,
+                                    Real & x1,
+                                    Real * t = NULL);
 
   /**
    * Function to rotate and translate point in new space where Dafalias ellipse
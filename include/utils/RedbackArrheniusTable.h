@@ -0,0 +1,79 @@
+/****************************************************************/
+/*               DO NOT MODIFY THIS HEADER                      */
+/*     REDBACK - Rock mEchanics with Dissipative feedBACKs      */
+/*                                                              */
+/*              (c) 2014 CSIRO and UNSW Australia               */
+/*                   ALL RIGHTS RESERVED                        */
+/*                                                              */
+/*            Prepared by CSIRO and UNSW Australia              */
+/*                                                              */
+/*            See COPYRIGHT for full restrictions               */
+/****************************************************************/
+
+#ifndef REDBACKARRHENIUSTABLE_H
+#define REDBACKARRHENIUSTABLE_H
+
+#include "MooseTypes.h"
+
+#include <vector>
+
+/**
+ * Lookup table of an Arrhenius factor f(T) = exp(A + B / (1 + delta * T))
+ * over a range of (dimensionless) temperature [T_min, T_max].
+ * The factor is interpolated with cubic Hermite polynomials built from the
+ * exact values and derivatives at regularly spaced nodes. The number of
+ * intervals is doubled until the relative interpolation error, measured
+ * inside each interval, is below the requested tolerance.
+ * Outside of the range, the factor is computed exactly.
+ */
+class RedbackArrheniusTable
+{
+public:
+  RedbackArrheniusTable();
+
+  /**
+   * Tabulate f(T) = exp(A + B / (1 + delta * T)) on [T_min, T_max]
+   * @param tolerance: maximum relative interpolation error
+   * @param max_intervals: maximum number of intervals, error if the tolerance cannot be reached
+   */
+  void build(Real A, Real B, Real delta, Real T_min, Real T_max, Real tolerance, unsigned int max_intervals = 1 << 20);
+
+  /// Whether build() has been called
+  bool isBuilt() const { return !_coefficients.empty(); }
+
+  /// Interpolated factor (exact outside of the range)
+  inline Real value(Real T) const
+  {
+    const Real x = (T - _T_min) * _inv_h;
+    // the negated test also sends NaN to the exact computation
+    if (!(x >= 0 && x < _nb_intervals))
+      return exactValue(T);
+    const unsigned int i = (unsigned int)x;
+    const Real t = x - i;
+    const Real * c = &_coefficients[ 4 * i ];
+    return c[ 0 ] + t * (c[ 1 ] + t * (c[ 2 ] + t * c[ 3 ]));
+  }
+
+  /// Factor computed with std::exp
+  Real exactValue(Real T) const;
+
+  /// Largest relative error measured when the table was built
+  Real maxRelativeError() const { return _max_relative_error; }
+
+  /// Number of intervals of the table
+  unsigned int nbIntervals() const { return _nb_intervals; }
+
+protected:
+  /// Fill the polynomial coefficients for nb_intervals and return the largest measured relative error
+  Real fill(unsigned int nb_intervals);
+
+  Real _A, _B, _delta, _T_min, _T_max;
+  Real _inv_h;
+  unsigned int _nb_intervals;
+  Real _max_relative_error;
+
+  /// 4 coefficients per interval of the polynomial in the local coordinate t in [0, 1]
+  std::vector<Real> _coefficients;
+};
+
+#endif // REDBACKARRHENIUSTABLE_H
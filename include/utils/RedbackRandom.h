@@ -0,0 +1,100 @@
+/****************************************************************/
+/*               DO NOT MODIFY THIS HEADER                      */
+/*     REDBACK - Rock mEchanics with Dissipative feedBACKs      */
+/*                                                              */
+/*              (c) 2014 CSIRO and UNSW Australia               */
+/*                   ALL RIGHTS RESERVED                        */
+/*                                                              */
+/*            Prepared by CSIRO and UNSW Australia              */
+/*                                                              */
+/*            See COPYRIGHT for full restrictions               */
+/****************************************************************/
+
+#ifndef REDBACKRANDOM_H
+#define REDBACKRANDOM_H
+
+#include "MooseTypes.h"
+#include "MooseEnum.h"
+#include "libmesh/point.h"
+
+#include <stdint.h>
+#include <string>
+
+/**
+ * Counter-based random numbers: the number drawn for a key (a node ID or
+ * the coordinates of a point) is a hash of the seed and of the key, instead
+ * of the next number of a sequence. The values do not depend on the order
+ * in which points are visited, so that random fields are identical for any
+ * mesh partition or number of threads, without any communication.
+ * The hash is the finaliser of SplitMix64 applied to the seed and to the key
+ * (same numbers as counterUniform in scripts/random_field.py).
+ */
+class RedbackRandom
+{
+public:
+  /// Generators of the random initial conditions
+  static MooseEnum generatorEnum();
+  enum Generator
+  {
+    Sequential,
+    Counter
+  };
+
+  /// Keys of the counter-based generator
+  static MooseEnum keyEnum();
+  enum Key
+  {
+    PointKey,
+    NodeKey
+  };
+
+  /// Uniform number in [0, 1) for a key
+  static Real uniform(unsigned int seed, uint64_t key);
+
+  /// Key built from the bit patterns of the coordinates of a point
+  static uint64_t pointKey(const Point & p);
+
+  /// SplitMix64 finaliser (bijective mixing of 64 bits)
+  static uint64_t mix(uint64_t x);
+};
+
+/**
+ * Random field read from a file written by scripts/random_field.py and
+ * interpolated linearly (in each direction) between the points of its grid.
+ * File format: 72-byte little-endian header packed as "<8s4I6d" (magic
+ * "RBRNDFLD", dim, nx, ny, nz, origin x/y/z, spacing x/y/z), followed by the
+ * nz*ny*nx values as doubles (x fastest). The file is memory-mapped
+ * read-only, so that all processes of a node share the same pages and only
+ * the parts of the grid covering the local mesh are read.
+ * Points outside of the grid get the value of the closest grid point.
+ */
+class RedbackRandomField
+{
+public:
+  RedbackRandomField();
+  ~RedbackRandomField();
+
+  /// Map the file (error if it cannot be read or is not a random field file)
+  void open(const std::string & file_name);
+  bool isOpen() const { return _values != NULL; }
+
+  /// Interpolated value of the field at a point
+  Real value(const Point & p) const;
+
+protected:
+  unsigned int _dim;
+  unsigned int _n[ 3 ];
+  Real _origin[ 3 ];
+  Real _spacing[ 3 ];
+
+  void * _map;
+  size_t _map_size;
+  const double * _values;
+
+private:
+  // mapped memory is owned: no copy
+  RedbackRandomField(const RedbackRandomField &);
+  RedbackRandomField & operator=(const RedbackRandomField &);
+};
+
+#endif // REDBACKRANDOM_H
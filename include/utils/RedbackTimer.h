@@ -0,0 +1,77 @@
+/****************************************************************/
+/*               DO NOT MODIFY THIS HEADER                      */
+/*     REDBACK - Rock mEchanics with Dissipative feedBACKs      */
+/*                                                              */
+/*              (c) 2014 CSIRO and UNSW Australia               */
+/*                   ALL RIGHTS RESERVED                        */
+/*                                                              */
+/*            Prepared by CSIRO and UNSW Australia              */
+/*                                                              */
+/*            See COPYRIGHT for full restrictions               */
+/****************************************************************/
+
+#ifndef REDBACKTIMER_H
+#define REDBACKTIMER_H
+
+#include <cstddef>
+#include <list>
+#include <map>
+#include <string>
+#include <utility>
+
+/**
+ * Low-overhead timing of the hot paths of Redback materials and kernels.
+ * Each object gets one Counter per timed method at construction (one per
+ * thread copy) and times its calls with a RedbackTimer::Scope. Nothing is
+ * measured until timing is enabled by the RedbackTimingOutput user object,
+ * so that the cost without instrumentation is a single test per call.
+ * Counter names are flame-style paths "class;object name;method".
+ */
+class RedbackTimer
+{
+public:
+  struct Counter
+  {
+    std::string name;
+    unsigned long calls;
+    double seconds;
+  };
+
+  /// Create a new counter (not thread-safe, call from object constructors)
+  static Counter * getCounter(const std::string & name);
+
+  static void enable() { _enabled = true; }
+  static bool isEnabled() { return _enabled; }
+
+  /// Wall clock time in seconds
+  static double wallTime();
+
+  /// Call counts and cumulative times summed over the counters with the same name (key)
+  static void getTotals(std::map<std::string, std::pair<unsigned long, double> > & totals);
+
+  /// Adds the duration of the enclosing scope to a counter
+  class Scope
+  {
+  public:
+    Scope(Counter * counter) : _counter(_enabled ? counter : NULL), _start(_counter ? wallTime() : 0) {}
+    ~Scope()
+    {
+      if (_counter)
+      {
+        ++_counter->calls;
+        _counter->seconds += wallTime() - _start;
+      }
+    }
+
+  private:
+    Counter * _counter;
+    double _start;
+  };
+
+private:
+  static bool _enabled;
+  /// All counters (a list so that pointers stay valid)
+  static std::list<Counter> _counters;
+};
+
+#endif // REDBACKTIMER_H
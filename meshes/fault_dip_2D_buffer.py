@@ -9,7 +9,7 @@
       +———————---————————————+
     Doing this with python script to modify .msh rather than with .geo (the proper way)
 '''
-from Canvas import Line
+from rewrite_msh_tags import rewriteMshTags
 
 def createModifiedMesh(input_geo, input_msh, output_msh, n_layers=1):
     ''' Function to create new mesh by adding padding buffer
@@ -33,24 +33,8 @@ def createModifiedMesh(input_geo, input_msh, output_msh, n_layers=1):
         n4 = n1 + (nb_points_y-1)
         #n3 = n4 - n_layers
         elt_indices_to_change += range(n1, n1+n_layers) + range(n4-n_layers, n4)
-    #import pdb;pdb.set_trace()
-    with open(input_msh) as fmsh_in:
-        with open(output_msh, 'wb') as f_out:
-            in_element_block = False
-            for line in fmsh_in:
-                if not in_element_block and line.lower().startswith('$elements'):
-                    in_element_block = True
-                if not in_element_block:
-                    f_out.write(line)
-                    continue
-                # Now reading an element line
-                tmp = line.split()
-                if len(tmp) == 9 and int(tmp[0]) in elt_indices_to_change:
-                    tmp[3] = '0'
-                    new_line = ' '.join(tmp) + '\n'
-                    f_out.write(new_line)
-                else:
-                    f_out.write(line)
+    # Move elements to physical entity 0
+    rewriteMshTags(input_msh, output_msh, elt_indices_to_change, new_tag=0, tag_index=0)
     return
 
 if __name__ == '__main__':
@@ -0,0 +1,251 @@
+''' Script to change the tags (physical or elementary entity) of a list of
+    elements in a Gmsh mesh file (format 2, ascii or binary), e.g. to move
+    them to another block.
+    The mesh is streamed: only the $Elements section is parsed, all other
+    sections are copied by large chunks, so meshes of any size can be processed.
+    Usage:
+      python rewrite_msh_tags.py input.msh output.msh ids.txt new_tag [tag_index]
+    where ids.txt contains the element numbers (separated by whitespace),
+    new_tag is the new value of the tag and tag_index is 0 (default) for the
+    physical entity or 1 for the elementary entity.
+    Requirements: numpy
+'''
+import os, sys, time, tempfile, shutil
+import numpy as np
+
+CHUNK_SIZE = 4*1024*1024 # bytes copied or parsed at once
+
+# Number of nodes for each Gmsh element type
+NB_NODES_PER_ELEMENT_TYPE = {
+    1:2, 2:3, 3:4, 4:4, 5:8, 6:6, 7:5, 8:3, 9:6, 10:9, 11:10, 12:27, 13:18, 14:14,
+    15:1, 16:8, 17:20, 18:15, 19:13, 20:9, 21:10, 22:12, 23:15, 24:15, 25:21,
+    26:4, 27:5, 28:6, 29:20, 30:35, 31:56, 92:64, 93:125}
+
+def _copyBytes(f_in, f_out, nb_bytes):
+    ''' Copy nb_bytes from f_in to f_out by chunks '''
+    while nb_bytes > 0:
+        block = f_in.read(min(nb_bytes, CHUNK_SIZE))
+        if not block:
+            raise Exception('Unexpected end of mesh file')
+        f_out.write(block)
+        nb_bytes -= len(block)
+
+def _copyUntil(f_in, f_out, marker):
+    ''' Copy f_in to f_out by chunks, up to and including the line starting
+        with marker (e.g. "$EndNodes") '''
+    marker = '\n' + marker
+    # end of previous chunk, in case marker is split between chunks
+    # (starts with the end of line of the section header)
+    tail = '\n'
+    while True:
+        start = f_in.tell()
+        block = f_in.read(CHUNK_SIZE)
+        if not block:
+            raise Exception('"{0}" not found in mesh file'.format(marker.strip()))
+        index = (tail + block).find(marker)
+        if index < 0:
+            f_out.write(block)
+            tail = block[-len(marker):]
+            continue
+        # position of end of marker line in file
+        end_line = (tail + block).find('\n', index + len(marker))
+        if end_line < 0:
+            end_line = len(tail + block) - 1
+        nb_bytes = end_line + 1 - len(tail)
+        f_out.write(block[:nb_bytes])
+        f_in.seek(start + nb_bytes)
+        return
+
+def _rewriteAsciiElements(f_in, f_out, nb_elements, selected_ids, new_tag, tag_index):
+    ''' Rewrite element lines (number type nb_tags tags... nodes...) '''
+    new_tag = str(new_tag)
+    nb_changed = 0
+    while nb_elements > 0:
+        start = f_in.tell()
+        block = f_in.read(CHUNK_SIZE)
+        if not block:
+            raise Exception('Unexpected end of mesh file in $Elements')
+        end = block.rfind('\n') + 1
+        if end == 0:
+            raise Exception('Element line longer than {0} bytes'.format(CHUNK_SIZE))
+        lines = block[:end].split('\n')[:-1][:nb_elements]
+        # position after last element line processed
+        next_position = start + sum([len(line) for line in lines]) + len(lines)
+        for i_line, line in enumerate(lines):
+            if int(line.split(None, 1)[0]) in selected_ids:
+                tokens = line.split()
+                if tag_index < int(tokens[2]):
+                    tokens[3 + tag_index] = new_tag
+                    lines[i_line] = ' '.join(tokens)
+                    nb_changed += 1
+        f_out.write('\n'.join(lines) + '\n')
+        nb_elements -= len(lines)
+        f_in.seek(next_position)
+    return nb_changed
+
+def _rewriteBinaryElements(f_in, f_out, nb_elements, selected, new_tag, tag_index, int_type):
+    ''' Rewrite blocks of elements (header: type, nb elements, nb tags; then
+        for each element: number, tags, nodes), one numpy array per chunk '''
+    nb_changed = 0
+    while nb_elements > 0:
+        header = f_in.read(3*int_type.itemsize)
+        f_out.write(header)
+        (elt_type, nb_elts_in_block, nb_tags) = np.fromstring(header, dtype=int_type)
+        if elt_type not in NB_NODES_PER_ELEMENT_TYPE:
+            raise Exception('Element type {0} not supported'.format(elt_type))
+        nb_ints_per_elt = 1 + nb_tags + NB_NODES_PER_ELEMENT_TYPE[elt_type]
+        nb_elts_per_chunk = max(1, CHUNK_SIZE/(nb_ints_per_elt*int_type.itemsize))
+        for i_start in range(0, nb_elts_in_block, nb_elts_per_chunk):
+            nb = min(nb_elts_per_chunk, nb_elts_in_block - i_start)
+            data = np.fromstring(f_in.read(nb*nb_ints_per_elt*int_type.itemsize), dtype=int_type)
+            data = data.reshape((nb, nb_ints_per_elt))
+            if tag_index < nb_tags:
+                ids = data[:, 0]
+                in_range = ids < len(selected)
+                to_change = np.zeros(nb, dtype=bool)
+                to_change[in_range] = selected[ids[in_range]]
+                data[to_change, 1 + tag_index] = new_tag
+                nb_changed += to_change.sum()
+            f_out.write(data.tostring())
+        nb_elements -= nb_elts_in_block
+    return nb_changed
+
+def rewriteMshTags(input_msh, output_msh, element_ids, new_tag, tag_index=0):
+    ''' Change one tag of given elements in Gmsh mesh file
+        @param[in] input_msh - string, name of input mesh file
+        @param[in] output_msh - string, name of output mesh file
+        @param[in] element_ids - iterable of element numbers to change
+        @param[in] new_tag - int, new value of tag
+        @param[in] tag_index - int, index of tag to change: 0 for physical
+          entity, 1 for elementary entity
+        @return number of elements changed
+    '''
+    element_ids = np.unique(np.asarray(list(element_ids), dtype=np.int64))
+    nb_changed = 0
+    with open(input_msh, 'rb') as f_in:
+        with open(output_msh, 'wb') as f_out:
+            is_binary = False
+            int_type = np.dtype('<i4')
+            while True:
+                line = f_in.readline()
+                if not line:
+                    break
+                f_out.write(line)
+                section = line.strip()
+                if section == '$MeshFormat':
+                    line = f_in.readline()
+                    f_out.write(line)
+                    (version, file_type, data_size) = line.split()
+                    if not version.startswith('2'):
+                        raise Exception('Only Gmsh mesh format 2 is supported (found {0})'.format(version))
+                    is_binary = file_type == '1'
+                    if is_binary:
+                        # integer 1 written in binary to detect endianness
+                        one = f_in.read(4)
+                        f_out.write(one)
+                        if np.fromstring(one, dtype='<i4')[0] != 1:
+                            int_type = np.dtype('>i4')
+                        float_size = int(data_size)
+                elif section == '$Nodes' and is_binary:
+                    line = f_in.readline()
+                    f_out.write(line)
+                    _copyBytes(f_in, f_out, int(line)*(int_type.itemsize + 3*float_size))
+                elif section == '$Elements':
+                    line = f_in.readline()
+                    f_out.write(line)
+                    nb_elements = int(line)
+                    if is_binary:
+                        # bitmap lookup, vectorized over each chunk of elements
+                        selected = np.zeros(element_ids.max() + 1 if len(element_ids) else 0, dtype=bool)
+                        selected[element_ids] = True
+                        nb_changed += _rewriteBinaryElements(f_in, f_out, nb_elements, selected,
+                                                             new_tag, tag_index, int_type)
+                    else:
+                        nb_changed += _rewriteAsciiElements(f_in, f_out, nb_elements,
+                                                            set(element_ids.tolist()),
+                                                            new_tag, tag_index)
+                elif section.startswith('$') and not section.startswith('$End'):
+                    # any other section (including ascii $Nodes) is copied as is
+                    _copyUntil(f_in, f_out, '$End' + section[1:])
+    return nb_changed
+
+def readElementIds(filename):
+    ''' Read element numbers separated by whitespace from text file '''
+    with open(filename, 'rb') as f:
+        return np.fromstring(f.read(), dtype=np.int64, sep=' ')
+
+def _writeStructuredQuadMesh(filename, nx, ny, binary=False):
+    ''' Write Gmsh mesh of nx*ny quadrilaterals (physical tag 1) '''
+    nodes_x, nodes_y = np.meshgrid(np.arange(nx + 1, dtype=float), np.arange(ny + 1, dtype=float))
+    nb_nodes = (nx + 1)*(ny + 1)
+    node_ids = np.arange(1, nb_nodes + 1).reshape((ny + 1, nx + 1))
+    elts = np.empty((nx*ny, 1 + 2 + 4), dtype='<i4')
+    elts[:, 0] = np.arange(1, nx*ny + 1)
+    elts[:, 1] = 1 # physical entity
+    elts[:, 2] = 1 # elementary entity
+    elts[:, 3] = node_ids[:-1, :-1].ravel()
+    elts[:, 4] = node_ids[:-1, 1:].ravel()
+    elts[:, 5] = node_ids[1:, 1:].ravel()
+    elts[:, 6] = node_ids[1:, :-1].ravel()
+    with open(filename, 'wb') as f:
+        if binary:
+            f.write('$MeshFormat\n2.2 1 8\n')
+            f.write(np.array([1], dtype='<i4').tostring())
+            f.write('\n$EndMeshFormat\n$Nodes\n{0}\n'.format(nb_nodes))
+            nodes = np.zeros(nb_nodes, dtype=[('id', '<i4'), ('xyz', '<f8', 3)])
+            nodes['id'] = node_ids.ravel()
+            nodes['xyz'][:, 0] = nodes_x.ravel()
+            nodes['xyz'][:, 1] = nodes_y.ravel()
+            f.write(nodes.tostring())
+            f.write('\n$EndNodes\n$Elements\n{0}\n'.format(nx*ny))
+            f.write(np.array([3, nx*ny, 2], dtype='<i4').tostring())
+            f.write(elts.tostring())
+            f.write('\n$EndElements\n')
+        else:
+            f.write('$MeshFormat\n2.2 0 8\n$EndMeshFormat\n$Nodes\n{0}\n'.format(nb_nodes))
+            np.savetxt(f, np.column_stack((node_ids.ravel(), nodes_x.ravel(), nodes_y.ravel(),
+                                           np.zeros(nb_nodes))), fmt='%d %g %g %g')
+            f.write('$EndNodes\n$Elements\n{0}\n'.format(nx*ny))
+            ascii_elts = np.column_stack((elts[:, :1], 3*np.ones((nx*ny, 1), dtype=int),
+                                          2*np.ones((nx*ny, 1), dtype=int), elts[:, 1:]))
+            np.savetxt(f, ascii_elts, fmt='%d')
+            f.write('$EndElements\n')
+
+def benchmarkRewriteMshTags(nx=1000, ny=1000, fraction=0.1):
+    ''' Measure rewriting speed on generated mesh of nx*ny quads (ascii and
+        binary), changing the physical tag of a fraction of the elements
+        @return dictionary (key=format, value=elements per second)
+    '''
+    tmp_dir = tempfile.mkdtemp(prefix='rewrite_msh_')
+    speeds = {}
+    try:
+        nb_elements = nx*ny
+        element_ids = np.random.permutation(nb_elements)[:int(fraction*nb_elements)] + 1
+        for binary in [False, True]:
+            input_msh = os.path.join(tmp_dir, 'input.msh')
+            output_msh = os.path.join(tmp_dir, 'output.msh')
+            _writeStructuredQuadMesh(input_msh, nx, ny, binary=binary)
+            start = time.time()
+            nb_changed = rewriteMshTags(input_msh, output_msh, element_ids, 0)
+            elapsed = time.time() - start
+            assert nb_changed == len(element_ids)
+            assert os.path.getsize(output_msh) >= os.path.getsize(input_msh) - len(element_ids)
+            format_name = 'binary' if binary else 'ascii'
+            speeds[format_name] = nb_elements/elapsed
+            print '{0}: {1} elements ({2} changed) in {3:.2f}s ({4:.2e} elements/s)'.format(
+                format_name, nb_elements, nb_changed, elapsed, speeds[format_name])
+    finally:
+        shutil.rmtree(tmp_dir)
+    return speeds
+
+if __name__ == '__main__':
+    if '--benchmark' in sys.argv:
+        benchmarkRewriteMshTags()
+    else:
+        if len(sys.argv) < 5:
+            print __doc__
+            sys.exit(1)
+        tag_index = int(sys.argv[5]) if len(sys.argv) > 5 else 0
+        nb_changed = rewriteMshTags(sys.argv[1], sys.argv[2], readElementIds(sys.argv[3]),
+                                    int(sys.argv[4]), tag_index)
+        print 'Changed {0} elements'.format(nb_changed)
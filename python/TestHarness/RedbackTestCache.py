@@ -0,0 +1,299 @@
+import os, re, json, time, shutil, hashlib, tempfile, subprocess
+from distutils.spawn import find_executable
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.redback_test_cache')
+DEFAULT_CACHE_SIZE = 2048 # MB
+REDBACK_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+# python modules imported by the RunPy tests
+PYTHON_SOURCE_DIRS = [os.path.join(REDBACK_DIR, 'scripts'),
+                      os.path.join(REDBACK_DIR, 'doc', 'theory', 'data', 'create_figures')]
+# specs listing the output files compared with their gold version
+OUTPUT_SPECS = ['txtdiff', 'exodiff', 'csvdiff']
+CACHEABLE_TESTERS = ['Txtdiff', 'RunPy', 'PyExodiff', 'Exodiff', 'CSVDiff', 'RunApp']
+# bumped when the content of the key changes
+CACHE_FORMAT = 2
+RESULT_FILENAME = 'result.json'
+
+class RedbackTestCache(object):
+  ''' Cache of test results indexed by a hash of the content of everything
+      the test depends on: the executable (and its libraries in the
+      application and MOOSE directories) or, for RunPy tests, the python
+      interpreter and the python modules of the scripts; all files of the
+      test directory except the outputs declared by its tests and compiled
+      python files; the input file, the gold files and the files referenced
+      by the input (meshes, ID files, ...) when they are elsewhere; the
+      command line; and the keys of the prerequisite tests.
+      An entry stores the return code and output of a passed run and a copy
+      of its output files, so that a hit is reported by restoring the files
+      and processing the stored output again (the gold comparison is cheap).
+      The least recently used entries are removed when the cache is larger
+      than max_size (bytes).
+  '''
+
+  def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size=DEFAULT_CACHE_SIZE*1024*1024, spec_filename='tests'):
+    self.cache_dir = cache_dir
+    self.max_size = max_size
+    self.spec_filename = spec_filename
+    self.file_hashes = {} # key=(path, size, mtime)
+    self.executable_hashes = {}
+    self.interpreter_hash = None
+    self.declared_outputs = {} # key=test directory
+
+  def isCacheable(self, tester):
+    return tester.__class__.__name__ in CACHEABLE_TESTERS and not specValue(tester.specs, 'should_crash', False)
+
+  def testKey(self, tester, command, executable, prereq_keys):
+    ''' Hash of the content of everything the test depends on '''
+    specs = tester.specs
+    test_dir = specs['test_dir']
+    digest = hashlib.sha1()
+    digest.update('{0}\0{1}\0{2}\0'.format(CACHE_FORMAT, tester.__class__.__name__, command))
+    for key in sorted(prereq_keys):
+      digest.update(key)
+    if tester.__class__.__name__ == 'RunPy':
+      sources = [os.path.join(directory, name) for directory in PYTHON_SOURCE_DIRS if os.path.isdir(directory)
+                 for name in sorted(os.listdir(directory)) if name.endswith('.py')]
+      digest.update(self.hashInterpreter())
+      digest.update(self.hashFiles(sources))
+    else:
+      digest.update(self.hashExecutable(executable))
+    # tests may read any file of their directory (e.g. modules imported by a script)
+    excluded = self.declaredOutputs(test_dir)
+    digest.update(self.hashDirectory(test_dir, excluded))
+    input_filename = os.path.join(test_dir, specs['input'])
+    gold_dir = os.path.join(test_dir, specValue(specs, 'gold_dir', 'gold'))
+    golds = [os.path.join(gold_dir, name) for name in outputFiles(tester)]
+    referenced = referencedFiles(input_filename, specValue(specs, 'cli_args', []), test_dir, excluded)
+    digest.update(self.hashFiles([input_filename] + golds + referenced))
+    return digest.hexdigest()
+
+  def declaredOutputs(self, test_dir):
+    ''' Output files declared by all tests of a directory in its spec file
+        (relative to the directory), whether or not these tests are selected '''
+    if test_dir not in self.declared_outputs:
+      outputs = set()
+      try:
+        with open(os.path.join(test_dir, self.spec_filename)) as f:
+          for line in f:
+            match = re.match(r'\s*(\w+)\s*=\s*(.*)$', line.split('#', 1)[0])
+            if match and match.group(1) in OUTPUT_SPECS:
+              outputs.update(os.path.normpath(name) for name in re.split(r'[\s\'"]+', match.group(2)) if name)
+      except IOError:
+        pass
+      self.declared_outputs[test_dir] = outputs
+    return self.declared_outputs[test_dir]
+
+  def hashDirectory(self, directory, excluded):
+    ''' Hash of relative names and contents of the files of a directory and its
+        subdirectories, except the excluded names (relative to directory) and
+        compiled python files '''
+    digest = hashlib.sha1()
+    for (root, dirs, files) in os.walk(directory):
+      dirs.sort() # deterministic order of the walk
+      for name in sorted(files):
+        filename = os.path.join(root, name)
+        relative_name = os.path.relpath(filename, directory)
+        if name.endswith('.pyc') or relative_name in excluded:
+          continue
+        digest.update(relative_name + '\0')
+        digest.update(self.hashFile(filename))
+    return digest.hexdigest()
+
+  def hashFiles(self, filenames):
+    ''' Hash of names and contents of files (directories: their files except
+        the outputs declared by their tests) '''
+    digest = hashlib.sha1()
+    for filename in filenames:
+      digest.update(os.path.basename(filename) + '\0')
+      if os.path.isdir(filename):
+        digest.update(self.hashDirectory(filename, self.declaredOutputs(filename)))
+      else:
+        digest.update(self.hashFile(filename))
+    return digest.hexdigest()
+
+  def hashFile(self, filename):
+    ''' Hash of the content of a file ('missing' if it does not exist), memoized for the run '''
+    try:
+      stat = os.stat(filename)
+    except OSError:
+      return 'missing'
+    key = (os.path.realpath(filename), stat.st_size, stat.st_mtime)
+    if key not in self.file_hashes:
+      digest = hashlib.sha1()
+      with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1024*1024), ''):
+          digest.update(block)
+      self.file_hashes[key] = digest.hexdigest()
+    return self.file_hashes[key]
+
+  def hashExecutable(self, executable):
+    ''' Hash of the executable and of the shared libraries it loads from the
+        application or MOOSE directories (system libraries are ignored) '''
+    if executable not in self.executable_hashes:
+      libraries = []
+      roots = [REDBACK_DIR, os.environ.get('MOOSE_DIR', os.path.join(REDBACK_DIR, '..', 'moose'))]
+      roots = [os.path.realpath(root) + os.sep for root in roots]
+      try:
+        output = subprocess.Popen(['ldd', executable], stdout=subprocess.PIPE,
+                                  stderr=subprocess.STDOUT).communicate()[0]
+        for match in re.finditer(r'=>\s*(\S+)', output):
+          library = os.path.realpath(match.group(1))
+          if any(library.startswith(root) for root in roots):
+            libraries.append(library)
+      except OSError:
+        pass # no ldd (e.g. OS X): only the executable is hashed
+      self.executable_hashes[executable] = self.hashFiles([executable] + sorted(set(libraries)))
+    return self.executable_hashes[executable]
+
+  def hashInterpreter(self):
+    ''' Hash of the path and content of the python found in PATH, which runs the RunPy tests '''
+    if self.interpreter_hash is None:
+      interpreter = os.path.realpath(find_executable('python') or 'python')
+      self.interpreter_hash = hashlib.sha1(interpreter + '\0' + self.hashFile(interpreter)).hexdigest()
+    return self.interpreter_hash
+
+  def entryDir(self, key):
+    return os.path.join(self.cache_dir, key[:2], key)
+
+  def lookup(self, key):
+    ''' Return stored result (dictionary with retcode, output, files) or None '''
+    result_filename = os.path.join(self.entryDir(key), RESULT_FILENAME)
+    try:
+      with open(result_filename) as f:
+        result = json.load(f)
+    except (IOError, ValueError):
+      return None
+    if not all(os.path.isfile(os.path.join(self.entryDir(key), 'files', name)) for name in result['files']):
+      return None
+    os.utime(result_filename, None) # most recently used
+    result['output'] = result['output'].encode('utf-8')
+    return result
+
+  def restore(self, key, result, test_dir):
+    ''' Copy the stored output files back to the test directory '''
+    for name in result['files']:
+      destination = os.path.join(test_dir, name)
+      if not os.path.isdir(os.path.dirname(destination)):
+        os.makedirs(os.path.dirname(destination))
+      shutil.copy2(os.path.join(self.entryDir(key), 'files', name), destination)
+
+  def store(self, key, tester, retcode, output):
+    ''' Store the result of a passed run and a copy of its output files '''
+    test_dir = tester.specs['test_dir']
+    files = [name for name in outputFiles(tester) if os.path.isfile(os.path.join(test_dir, name))]
+    if not os.path.isdir(self.cache_dir):
+      os.makedirs(self.cache_dir)
+    # written to a temporary directory first, so that an entry is complete or absent
+    temp_dir = tempfile.mkdtemp(prefix='entry_', dir=self.cache_dir)
+    try:
+      for name in files:
+        destination = os.path.join(temp_dir, 'files', name)
+        if not os.path.isdir(os.path.dirname(destination)):
+          os.makedirs(os.path.dirname(destination))
+        shutil.copy2(os.path.join(test_dir, name), destination)
+      with open(os.path.join(temp_dir, RESULT_FILENAME), 'w') as f:
+        json.dump({'test_name':tester.specs['test_name'], 'timestamp':int(time.time()),
+                   'retcode':retcode, 'output':output.decode('utf-8', 'replace'), 'files':files}, f)
+      entry_dir = self.entryDir(key)
+      if os.path.isdir(entry_dir):
+        shutil.rmtree(entry_dir, ignore_errors=True)
+      elif not os.path.isdir(os.path.dirname(entry_dir)):
+        os.makedirs(os.path.dirname(entry_dir))
+      os.rename(temp_dir, entry_dir)
+    except (IOError, OSError), e:
+      shutil.rmtree(temp_dir, ignore_errors=True)
+      print 'Unable to store result of {0} in test cache: {1}'.format(tester.specs['test_name'], e)
+
+  def evict(self):
+    ''' Remove least recently used entries until the cache fits in max_size
+        @return number of removed entries
+    '''
+    if not os.path.isdir(self.cache_dir):
+      return 0
+    entries = [] # (last use, size, path)
+    for prefix in os.listdir(self.cache_dir):
+      prefix_dir = os.path.join(self.cache_dir, prefix)
+      if prefix.startswith('entry_'):
+        # left by an interrupted store
+        if time.time() - os.path.getmtime(prefix_dir) > 24*3600:
+          shutil.rmtree(prefix_dir, ignore_errors=True)
+        continue
+      if not os.path.isdir(prefix_dir):
+        continue
+      for key in os.listdir(prefix_dir):
+        entry_dir = os.path.join(prefix_dir, key)
+        result_filename = os.path.join(entry_dir, RESULT_FILENAME)
+        last_use = os.path.getmtime(result_filename) if os.path.isfile(result_filename) else 0
+        size = sum(os.path.getsize(os.path.join(root, name)) for (root, dirs, files) in os.walk(entry_dir)
+                   for name in files)
+        entries.append((last_use, size, entry_dir))
+    total_size = sum(entry[1] for entry in entries)
+    nb_removed = 0
+    for (last_use, size, entry_dir) in sorted(entries):
+      if total_size <= self.max_size:
+        break
+      shutil.rmtree(entry_dir, ignore_errors=True)
+      total_size -= size
+      nb_removed += 1
+    return nb_removed
+
+def specValue(specs, name, default=None):
+  ''' Value of a spec, default if not set or not a parameter of the tester '''
+  try:
+    if specs.isValid(name):
+      return specs[name]
+  except KeyError:
+    pass
+  return default
+
+def outputFiles(tester):
+  ''' Output files of a test compared with their gold version (relative to the test directory) '''
+  files = []
+  for name in OUTPUT_SPECS:
+    value = specValue(tester.specs, name, [])
+    files += value.split() if isinstance(value, str) else list(value)
+  return files
+
+def referencedFiles(input_filename, cli_args, test_dir, excluded):
+  ''' Existing files (or directories) named in the parameter values of an
+      input file or in the command line arguments, relative to test_dir.
+      A path in a subdirectory that is the prefix of files (e.g. an image
+      stack) gives these files. For python scripts, the string literals are
+      used, as well as os.path.join of string literals.
+  '''
+  values = []
+  try:
+    with open(input_filename) as f:
+      content = f.read()
+  except IOError:
+    return []
+  if input_filename.endswith('.py'):
+    values = re.findall(r'\'([^\'\n]*)\'|"([^"\n]*)"', content)
+    values = [single or double for (single, double) in values]
+    literal = r'(?:\'[^\'\n]*\'|"[^"\n]*")'
+    for match in re.finditer(r'os\.path\.join\(\s*({0}(?:\s*,\s*{0})*)\s*,?\s*\)'.format(literal), content):
+      parts = re.findall(r'\'([^\'\n]*)\'|"([^"\n]*)"', match.group(1))
+      values.append(os.path.join(*[single or double for (single, double) in parts]))
+  else:
+    for line in content.splitlines():
+      match = re.match(r'\s*\w+\s*=\s*(.*)$', line.split('#', 1)[0])
+      if match:
+        values.append(match.group(1))
+  if isinstance(cli_args, str):
+    cli_args = cli_args.split()
+  values += [arg.split('=', 1)[1] for arg in cli_args if '=' in arg]
+  files = set()
+  for value in values:
+    for token in re.split(r'[\s\'"]+', value):
+      if not token or token in ('.', '..') or token in excluded:
+        continue
+      path = os.path.normpath(os.path.join(test_dir, token))
+      if path == os.path.normpath(input_filename):
+        continue
+      if os.path.exists(path):
+        files.add(path)
+      elif os.sep in token.strip(os.sep) and os.path.isdir(os.path.dirname(path)) and os.path.basename(path):
+        prefix = os.path.basename(path)
+        files.update(os.path.join(os.path.dirname(path), name) for name in os.listdir(os.path.dirname(path))
+                     if name.startswith(prefix))
+  return sorted(files)
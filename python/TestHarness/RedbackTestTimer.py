@@ -0,0 +1,259 @@
+import os, sys, time, shutil, tempfile, pipes, argparse, inspect
+from sqlite3 import dbapi2 as sqlite
+from TestHarness import TestHarness
+from RedbackTestCache import RedbackTestCache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE
+
+DEFAULT_DB_FILE = os.path.join(os.path.expanduser('~'), '.redback_test_timing.sqlite')
+
+CREATE_TABLE = """create table if not exists test_timing
+(
+  app_name text,
+  test_name text,
+  timestamp int,
+  wall_time real,
+  peak_rss_kb int,
+  retcode int
+);"""
+
+class RedbackTestTimer(TestHarness):
+  ''' TestHarness using the wall time history of the tests to start the
+      slowest tests first, which shortens the total time of a parallel run.
+      With --store-timing, the wall time and peak memory of each test are
+      measured and stored in a SQLite database (--dbfile, default
+      ~/.redback_test_timing.sqlite).
+      The jobs are held back by replacing run and join of the RunParallel
+      instance while the tests are found; this is only done if it has the
+      expected interface (hasDeferrableRunner), otherwise the tests run in
+      the order they are found.
+      With --use-cache, passed results are cached (RedbackTestCache,
+      --cache-dir, default ~/.redback_test_cache): a test whose executable,
+      test directory, input, referenced files, gold files and command are
+      unchanged is not run again, its stored output files and result are
+      used instead. --force-rerun runs all tests (and refreshes the cache),
+      --cache-size bounds the size of the cache in MB.
+  '''
+
+  # Number of most recent runs of a test used to estimate its wall time
+  NB_RUNS_IN_ESTIMATE = 5
+
+  def __init__(self, argv, app_name, moose_dir):
+    # options of the cache are removed before TestHarness parses the command line
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--use-cache', action='store_true')
+    parser.add_argument('--force-rerun', action='store_true')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_CACHE_SIZE)
+    (cache_options, argv) = parser.parse_known_args(argv)
+    TestHarness.__init__(self, argv, app_name, moose_dir)
+    self.force_rerun = cache_options.force_rerun
+    self.cache = None
+    if cache_options.use_cache and cache_options.cache_size > 0:
+      self.cache = RedbackTestCache(cache_options.cache_dir, int(cache_options.cache_size*1024*1024),
+                                    getattr(self.options, 'input_file_name', 'tests'))
+    self.cached_jobs = {} # key=test name, value=(command, prereq names) of tests run to store their result
+    self.cache_keys = {} # key=test name, value=key of the cached result
+    self.nb_cache_hits = 0
+    self.app_name = app_name
+    self.store_timing = '--store-timing' in argv
+    self.db_file = getattr(self.options, 'dbFile', None) or DEFAULT_DB_FILE
+    self.timing_dir = None
+    self.deferred_jobs = []
+    self.wall_time_estimates = {}
+
+  def preRun(self):
+    TestHarness.preRun(self)
+    if self.store_timing:
+      con = sqlite.connect(self.db_file)
+      con.execute(CREATE_TABLE)
+      con.commit()
+      con.close()
+      self.timing_dir = tempfile.mkdtemp(prefix='redback_timing_')
+    if os.path.isfile(self.db_file):
+      self.wall_time_estimates = readWallTimeEstimates(self.db_file, self.app_name,
+                                                       self.NB_RUNS_IN_ESTIMATE)
+    if getattr(self.options, 'pbs', None):
+      pass # PBS jobs are submitted in the order they are found
+    elif not hasDeferrableRunner(self.runner):
+      # the jobs cannot be held back: no sorting, timing or cached results
+      print 'RedbackTestTimer: unsupported RunParallel interface, tests run in the order they are found'
+      self.store_timing = False
+      self.cache = None
+    else:
+      # Hold the jobs back until all tests are found so that they can be sorted
+      self.runner_run = self.runner.run
+      self.runner_join = self.runner.join
+      self.runner.run = self.deferJob
+      self.runner.join = self.runDeferredJobs
+
+  def deferJob(self, tester, command, *args, **kwargs):
+    ''' Replaces RunParallel.run while tests are being found '''
+    self.deferred_jobs.append((tester, command, args, kwargs, os.getcwd()))
+
+  def runDeferredJobs(self):
+    ''' Replaces RunParallel.join: start the slowest tests first, then wait for all '''
+    self.runner.run = self.runner_run
+    self.runner.join = self.runner_join
+    saved_cwd = os.getcwd()
+    # unknown tests first as they may be slow, then longest estimated time first
+    self.deferred_jobs.sort(key=lambda job: -self.wall_time_estimates.get(
+      job[0].specs['test_name'], float('inf')))
+    if self.cache is not None:
+      self.deferred_jobs = self.reuseCachedResults(self.deferred_jobs)
+    for (tester, command, args, kwargs, cwd) in self.deferred_jobs:
+      if self.store_timing:
+        command = '{0} {1} {2} {3}'.format(
+          sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'measure_test.py'),
+          pipes.quote(self.getTimingFilename(tester)), pipes.quote(command))
+      os.chdir(cwd)
+      self.runner.run(tester, command, *args, **kwargs)
+    os.chdir(saved_cwd)
+    self.deferred_jobs = []
+    self.runner.join()
+
+  def reuseCachedResults(self, jobs):
+    ''' Report the tests found in the cache and return the jobs to run.
+        A test is only reused if its prerequisites are, and prerequisites of
+        a test to run are run again (they may write files it reads), so that
+        no job to run depends on a reused test.
+    '''
+    tests = dict((job[0].specs['test_name'], job) for job in jobs)
+    def prereqNames(tester):
+      names = []
+      for prereq in tester.specs['prereq'] or []:
+        # prereq may be given relative to the test directory
+        names += [name for name in tests if name == prereq or (name.endswith('.' + prereq) and
+                  tests[name][0].specs['test_dir'] == tester.specs['test_dir'])]
+      return names
+    def isCacheable(tester):
+      return self.cache.isCacheable(tester) and len(prereqNames(tester)) == len(tester.specs['prereq'] or [])
+    keys = {}
+    def testKey(name):
+      if name not in keys:
+        keys[name] = None # cycles and uncacheable tests have no key
+        (tester, command) = tests[name][:2]
+        if isCacheable(tester):
+          prereq_keys = [testKey(prereq) for prereq in prereqNames(tester)]
+          if None not in prereq_keys:
+            keys[name] = self.cache.testKey(tester, command, getattr(self, 'executable', ''), prereq_keys)
+      return keys[name]
+    results = {}
+    for name in tests:
+      if testKey(name) is not None and not self.force_rerun:
+        results[name] = self.cache.lookup(keys[name])
+    to_run = set(name for name in tests if results.get(name) is None)
+    # prerequisites of tests to run and tests depending on tests to run are run
+    changed = True
+    while changed:
+      changed = False
+      for name in tests:
+        prereqs = set(prereqNames(tests[name][0]))
+        if name in to_run and prereqs - to_run:
+          to_run.update(prereqs)
+          changed = True
+        elif name not in to_run and prereqs & to_run:
+          to_run.add(name)
+          changed = True
+    saved_cwd = os.getcwd()
+    for (tester, command, args, kwargs, cwd) in jobs:
+      name = tester.specs['test_name']
+      if name in to_run:
+        continue
+      result = results[name]
+      self.cache_keys[name] = keys[name]
+      self.cache.restore(keys[name], result, tester.specs['test_dir'])
+      os.chdir(cwd)
+      self.testOutputAndFinish(tester, result['retcode'],
+                               'Result reused from test cache (--force-rerun to run again)\n' + result['output'])
+      self.nb_cache_hits += 1
+    os.chdir(saved_cwd)
+    for name in to_run:
+      if isCacheable(tests[name][0]):
+        self.cached_jobs[name] = (tests[name][1], prereqNames(tests[name][0]))
+    return [job for job in jobs if job[0].specs['test_name'] in to_run]
+
+  def getTimingFilename(self, tester):
+    return os.path.join(self.timing_dir, tester.specs['test_name'].replace(os.sep, '.') + '.timing')
+
+  def testOutputAndFinish(self, tester, retcode, output, *args, **kwargs):
+    did_pass = TestHarness.testOutputAndFinish(self, tester, retcode, output, *args, **kwargs)
+    name = tester.specs['test_name']
+    if name in self.cached_jobs:
+      (command, prereqs) = self.cached_jobs.pop(name)
+      prereq_keys = [self.cache_keys.get(prereq) for prereq in prereqs]
+      # only passed runs are stored; the key is computed after the run, as the
+      # next run will see the files written by this test (e.g. read by the
+      # tests depending on it)
+      if did_pass and retcode == 0 and None not in prereq_keys:
+        self.cache_keys[name] = self.cache.testKey(tester, command, getattr(self, 'executable', ''), prereq_keys)
+        self.cache.store(self.cache_keys[name], tester, retcode, output)
+    if self.store_timing:
+      timing_filename = self.getTimingFilename(tester)
+      if os.path.isfile(timing_filename): # not created if the test did not execute
+        with open(timing_filename) as f:
+          (wall_time, peak_rss) = f.read().split()
+        os.remove(timing_filename)
+        con = sqlite.connect(self.db_file)
+        con.execute('insert into test_timing values (?,?,?,?,?,?)',
+                    (self.app_name, tester.specs['test_name'], int(time.time()),
+                     float(wall_time), int(peak_rss), retcode))
+        con.commit()
+        con.close()
+    return did_pass
+
+  def cleanup(self):
+    TestHarness.cleanup(self)
+    if self.cache is not None:
+      if self.nb_cache_hits:
+        print '{0} test results reused from {1} (--force-rerun to run them)'.format(self.nb_cache_hits,
+                                                                                     self.cache.cache_dir)
+      self.cache.evict()
+    if self.timing_dir is not None:
+      shutil.rmtree(self.timing_dir, ignore_errors=True)
+
+def hasDeferrableRunner(runner):
+  ''' Check that runner has the interface replaced while the tests are found:
+      run(tester, command, ...) starting a job and join() waiting for all jobs.
+      It is the interface of RunParallel in the MOOSE versions supported by
+      redback; another interface (e.g. a newer scheduler) is left untouched.
+  '''
+  try:
+    run_args = inspect.getargspec(runner.run).args
+    join_args = inspect.getargspec(runner.join).args
+  except (AttributeError, TypeError):
+    return False
+  return run_args[:3] == ['self', 'tester', 'command'] and join_args == ['self']
+
+def readWallTimeEstimates(db_file, app_name, nb_runs):
+  ''' Return dictionary (key=test name, value=median wall time of the
+      nb_runs most recent successful runs) '''
+  con = sqlite.connect(db_file)
+  try:
+    rows = con.execute('select test_name, wall_time from test_timing '
+                       'where app_name = ? and retcode = 0 order by timestamp desc',
+                       (app_name,)).fetchall()
+  except sqlite.OperationalError:
+    rows = [] # table not created yet
+  con.close()
+  wall_times = {}
+  for (test_name, wall_time) in rows:
+    test_wall_times = wall_times.setdefault(test_name, [])
+    if len(test_wall_times) < nb_runs:
+      test_wall_times.append(wall_time)
+  return dict([(test_name, sorted(values)[len(values)/2])
+               for test_name, values in wall_times.items()])
+
+def printTimingSummary(db_file=DEFAULT_DB_FILE, app_name='redback', nb_runs=RedbackTestTimer.NB_RUNS_IN_ESTIMATE):
+  ''' Print estimated wall time and max peak memory of all tests, slowest first '''
+  estimates = readWallTimeEstimates(db_file, app_name, nb_runs)
+  con = sqlite.connect(db_file)
+  peak_rss = dict(con.execute('select test_name, max(peak_rss_kb) from test_timing '
+                              'where app_name = ? group by test_name', (app_name,)).fetchall())
+  con.close()
+  print '{0:60s} {1:>12s} {2:>14s}'.format('Test', 'Wall time (s)', 'Peak RSS (MB)')
+  for test_name in sorted(estimates, key=estimates.get, reverse=True):
+    print '{0:60s} {1:12.2f} {2:14.1f}'.format(test_name, estimates[test_name],
+                                               peak_rss.get(test_name, 0)/1024.)
+  print 'Total: {0:.2f}s'.format(sum(estimates.values()))
+
+if __name__ == '__main__':
+  printTimingSummary(*sys.argv[1:2])
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+''' Script to run a test command and write its wall time (s) and peak
+    resident set size (kB, largest process of the test) to a file.
+    Used by RedbackTestTimer.
+    The command runs in its own process group: when this script is
+    terminated or interrupted (e.g. by the harness on timeout), the signal
+    is forwarded to the whole group, so that no process of the test (shell,
+    mpiexec, application) is left running.
+    Usage: python measure_test.py <timing file> <command>
+'''
+
+import os, sys, time, signal, resource, subprocess
+
+# Time (s) given to the processes of the test to exit before they are killed
+GRACE_TIME = 5.
+
+def stopProcessGroup(process, grace_time=GRACE_TIME):
+  ''' Terminate the process group led by process, kill it after grace_time '''
+  signum = signal.SIGTERM
+  deadline = time.time() + grace_time
+  while True:
+    try:
+      os.killpg(process.pid, signum)
+    except OSError:
+      return # no process left in the group
+    process.poll() # reap the group leader
+    if signum == signal.SIGKILL:
+      return
+    if time.time() > deadline:
+      signum = signal.SIGKILL
+    else:
+      signum = 0 # only check if the group is alive
+      time.sleep(0.1)
+
+if __name__ == '__main__':
+  timing_filename = sys.argv[1]
+  command = sys.argv[2]
+  start = time.time()
+  process = subprocess.Popen(command, shell=True, preexec_fn=os.setsid)
+  def forwardSignal(signum, frame):
+    stopProcessGroup(process)
+    sys.exit(128 + signum)
+  for signum in [signal.SIGTERM, signal.SIGINT, signal.SIGHUP]:
+    signal.signal(signum, forwardSignal)
+  retcode = process.wait()
+  wall_time = time.time() - start
+  peak_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+  if sys.platform == 'darwin':
+    peak_rss /= 1024 # bytes on OS X, kB on Linux
+  with open(timing_filename, 'w') as f:
+    f.write('{0} {1}\n'.format(wall_time, peak_rss))
+  # same convention as the shell for commands killed by a signal
+  sys.exit(retcode if retcode >= 0 else 128 - retcode)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+
+''' Compare Exodus files against their gold version with numpy.
+    All global, nodal and element variables (and the coordinates and times)
+    are compared as arrays with the same rel_err/abs_zero rules as CSVDiff,
+    possibly with different tolerances for some variables. The comparison
+    stops at the first variable that does not match and reports the entities
+    (node, element or global variable) with the largest differences.
+    Used by the PyExodiff tester, and on its own to check many file pairs in
+    parallel (e.g. all Exodiff tests after a test run):
+      python ExodusDiffer.py --tests-dir ../../../tests [-j 8]
+      python ExodusDiffer.py gold.e out.e [--rel-err 1e-6] [--abs-zero 1e-10] [--tolerance var:rel_err[:abs_zero]]
+'''
+
+import os, re, sys, argparse, multiprocessing
+import numpy as np
+
+# the Exodus reader is shared with the documentation scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', '..', 'doc', 'theory', 'data',
+                             'create_figures'))
+from exodus import ExodusFile
+
+DEFAULT_REL_ERR = 5.5e-6
+DEFAULT_ABS_ZERO = 1e-10
+# entities of the columns of compared arrays (index reported for differences)
+ENTITY_NAMES = {'Nodal variable':'node', 'Element variable':'element', 'Node coordinates':'node'}
+
+def parseTolerances(tolerances):
+  ''' Parse list of "variable:rel_err" or "variable:rel_err:abs_zero"
+      @return dictionary (key=variable name, value=(rel_err, abs_zero or None))
+  '''
+  result = {}
+  for tolerance in tolerances:
+    fields = tolerance.split(':')
+    if len(fields) not in (2, 3):
+      raise Exception, 'Invalid tolerance "{0}", expected variable:rel_err[:abs_zero]'.format(tolerance)
+    result[fields[0]] = (float(fields[1]), float(fields[2]) if len(fields) == 3 else None)
+  return result
+
+class ExodusDiffer(object):
+  ''' Compare an Exodus file against its gold version '''
+
+  CHUNK_VALUES = 4*1024*1024 # values of a variable compared at once (time steps are split in chunks)
+
+  def __init__(self, gold_filename, out_filename, rel_err=DEFAULT_REL_ERR, abs_zero=DEFAULT_ABS_ZERO,
+               tolerances=None, nb_worst=5):
+    self.gold_filename = gold_filename
+    self.out_filename = out_filename
+    self.rel_err = float(rel_err)
+    self.abs_zero = float(abs_zero)
+    self.tolerances = tolerances or {} # key=variable name, value=(rel_err, abs_zero or None)
+    self.nb_worst = nb_worst
+
+  def diff(self):
+    ''' Return description of first difference ('' if files match) '''
+    with ExodusFile(self.gold_filename) as gold:
+      with ExodusFile(self.out_filename) as out:
+        for compare in [self._compareStructure, self._compareTimes, self._compareCoordinates,
+                        self._compareGlobalVariables, self._compareNodalVariables, self._compareElementVariables]:
+          message = compare(gold, out)
+          if message:
+            return message
+    return ''
+
+  def _tolerance(self, name):
+    (rel_err, abs_zero) = self.tolerances.get(name, (self.rel_err, self.abs_zero))
+    return (rel_err, self.abs_zero if abs_zero is None else abs_zero)
+
+  def _relativeErrors(self, gold_values, out_values, abs_zero):
+    ''' Relative differences (0 below abs_zero, inf for nan) '''
+    # values smaller than abs_zero are treated as zero
+    gold_values = np.where(np.abs(gold_values) < abs_zero, 0., gold_values)
+    out_values = np.where(np.abs(out_values) < abs_zero, 0., out_values)
+    scale = np.maximum(np.abs(gold_values), np.abs(out_values))
+    diff = np.abs(gold_values - out_values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+      errors = np.where(diff == 0, 0., diff/scale)
+    # nan (or inf) values only match if both are nan (or the same inf)
+    same = (gold_values == out_values) | (np.isnan(gold_values) & np.isnan(out_values))
+    return np.where(np.isfinite(errors) | same, np.where(same, 0., errors), np.inf)
+
+  def _compareArrays(self, name, entity, gold_values, out_values, times=None):
+    ''' Compare arrays (nb_steps, nb_entities) chunk of time steps by chunk
+        (times=None: rows are coordinate directions instead of time steps)
+        @return description of the worst differences ('' if arrays match)
+    '''
+    (rel_err, abs_zero) = self._tolerance(name)
+    nb_steps = gold_values.shape[0]
+    nb_entities = int(np.prod(gold_values.shape[1:]))
+    chunk_steps = max(1, self.CHUNK_VALUES//max(1, nb_entities))
+    for first_step in range(0, nb_steps, chunk_steps):
+      gold_chunk = np.asarray(gold_values[first_step:first_step + chunk_steps], dtype=np.float64)
+      out_chunk = np.asarray(out_values[first_step:first_step + chunk_steps], dtype=np.float64)
+      errors = self._relativeErrors(gold_chunk, out_chunk, abs_zero).reshape(gold_chunk.shape[0], -1)
+      failed = errors > rel_err
+      if not failed.any():
+        continue
+      # report the worst entities of the first failing chunk
+      worst = np.argsort(errors, axis=None)[::-1][:min(self.nb_worst, failed.sum())]
+      message = '{0} "{1}" of {2} differs from {3} at {4} values (rel_err={5}, abs_zero={6}), largest differences:\n'\
+        .format(entity, name, self.out_filename, self.gold_filename, failed.sum(), rel_err, abs_zero)
+      for index in worst:
+        (step, i) = np.unravel_index(index, errors.shape)
+        step += first_step
+        if times is None:
+          where = 'direction {0}'.format(step)
+        else:
+          where = 'time step {0} (time {1:g})'.format(step, times[step])
+        what = '{0} {1}, '.format(ENTITY_NAMES[entity], i) if entity in ENTITY_NAMES else ''
+        message += '  {0}{1}: {2!r} instead of {3!r} (relative error {4:.3g})\n'.format(
+          what, where, out_values[step].ravel()[i], gold_values[step].ravel()[i], errors.ravel()[index])
+      return message
+    return ''
+
+  def _compareStructure(self, gold, out):
+    for (description, names) in [('Nodal variables', ExodusFile.nodalVariableNames),
+                                 ('Element variables', ExodusFile.elementVariableNames),
+                                 ('Global variables', ExodusFile.globalVariableNames),
+                                 ('Blocks', ExodusFile.blockIds)]:
+      (gold_names, out_names) = (names(gold), names(out))
+      if sorted(gold_names) != sorted(out_names):
+        return '{0} {1} of {2} are not the same as {3} of {4}\n'.format(
+          description, sorted(out_names), self.out_filename, sorted(gold_names), self.gold_filename)
+    for (description, size) in [('nodes', lambda exodus: exodus.dimensions.get('num_nodes', 0)),
+                                ('elements', lambda exodus: exodus.dimensions.get('num_elem', 0)),
+                                ('time steps', ExodusFile.nbTimeSteps)]:
+      if size(gold) != size(out):
+        return 'Number of {0} is {1} in {2} but {3} in {4}\n'.format(
+          description, size(out), self.out_filename, size(gold), self.gold_filename)
+    return ''
+
+  def _compareTimes(self, gold, out):
+    return self._compareArrays('time', 'Time values', gold.times()[:, None], out.times()[:, None], gold.times())
+
+  def _compareCoordinates(self, gold, out):
+    return self._compareArrays('coordinates', 'Node coordinates', gold.coordinates().T, out.coordinates().T)
+
+  def _compareGlobalVariables(self, gold, out):
+    for name in gold.globalVariableNames():
+      message = self._compareArrays(name, 'Global variable', gold.globalVariable(name)[:, None],
+                                    out.globalVariable(name)[:, None], gold.times())
+      if message:
+        return message
+    return ''
+
+  def _compareNodalVariables(self, gold, out):
+    for name in gold.nodalVariableNames():
+      message = self._compareArrays(name, 'Nodal variable', gold.nodalVariable(name), out.nodalVariable(name),
+                                    gold.times())
+      if message:
+        return message
+    return ''
+
+  def _compareElementVariables(self, gold, out):
+    for name in gold.elementVariableNames():
+      for block in gold.blockIds():
+        message = self._compareArrays(name, 'Element variable', gold.elementVariable(name, block=block),
+                                      out.elementVariable(name, block=block), gold.times())
+        if message:
+          return message.replace('\n', ' (block {0})\n'.format(block), 1)
+    return ''
+
+def _diffPair(args):
+  ''' Worker comparing one pair of files, returns (out filename, message) '''
+  (gold_filename, out_filename, rel_err, abs_zero, tolerances) = args
+  if not os.path.exists(out_filename):
+    return (out_filename, 'File Not Found: {0}\n'.format(out_filename))
+  try:
+    return (out_filename, ExodusDiffer(gold_filename, out_filename, rel_err, abs_zero, tolerances).diff())
+  except Exception as e:
+    return (out_filename, 'Could not compare {0} with {1}: {2}\n'.format(out_filename, gold_filename, e))
+
+def diffFilePairs(pairs, nb_processes=None):
+  ''' Compare many pairs of files on a process pool
+      @param[in] pairs - list of (gold_filename, out_filename, rel_err, abs_zero, tolerances)
+      @param[in] nb_processes - int, number of processes (default: all cores, 1 to compare serially)
+      @return list of (out_filename, message), message is '' if files match
+  '''
+  if nb_processes == 1 or len(pairs) <= 1:
+    return map(_diffPair, pairs)
+  pool = multiprocessing.Pool(nb_processes)
+  try:
+    return pool.map(_diffPair, pairs, chunksize=1)
+  finally:
+    pool.close()
+    pool.join()
+
+def exodiffFiles(specs, output):
+  ''' Compare all files listed in specs['exodiff'] with their gold version
+      Used by the PyExodiff tester.
+      @return (reason, output), reason is '' if all files match
+  '''
+  tolerances = parseTolerances(specs['tolerances'])
+  pairs = []
+  for file in specs['exodiff']:
+    gold_filename = os.path.join(specs['test_dir'], specs['gold_dir'], file)
+    if not os.path.exists(gold_filename):
+      output += "File Not Found: " + gold_filename
+      return ('MISSING GOLD FILE', output)
+    pairs.append((gold_filename, os.path.join(specs['test_dir'], file), specs['rel_err'], specs['abs_zero'],
+                  tolerances))
+  output += 'Running exodiff (python)\n'
+  for (out_filename, message) in diffFilePairs(pairs, nb_processes=1):
+    if message:
+      output += message
+      return ('EXODIFF', output)
+  return ('', output)
+
+def findExodiffTests(tests_dir):
+  ''' Find file pairs of all Exodiff and PyExodiff tests in the "tests"
+      spec files under tests_dir
+      @return list of (gold_filename, out_filename, rel_err, abs_zero, tolerances)
+  '''
+  pairs = []
+  for (dirpath, dirnames, filenames) in os.walk(tests_dir):
+    dirnames.sort()
+    if 'tests' not in filenames:
+      continue
+    with open(os.path.join(dirpath, 'tests')) as f:
+      text = f.read()
+    for block in re.split(r'^\s*\[\.\/', text, flags=re.MULTILINE)[1:]:
+      specs = dict((key, value.strip().strip("'\"")) for (key, value) in
+                   re.findall(r'^\s*(\w+)\s*=\s*([^#\n]*)', block, flags=re.MULTILINE))
+      if specs.get('type', '').strip("'") not in ('Exodiff', 'PyExodiff') or 'exodiff' not in specs:
+        continue
+      gold_dir = os.path.join(dirpath, specs.get('gold_dir', 'gold'))
+      tolerances = parseTolerances(specs['tolerances'].split()) if 'tolerances' in specs else {}
+      for file in specs['exodiff'].split():
+        pairs.append((os.path.join(gold_dir, file), os.path.join(dirpath, file),
+                      float(specs.get('rel_err', DEFAULT_REL_ERR)), float(specs.get('abs_zero', DEFAULT_ABS_ZERO)),
+                      tolerances))
+  return pairs
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Compare Exodus files against their gold version')
+  parser.add_argument('files', nargs='*', help='gold and output files')
+  parser.add_argument('--tests-dir', help='compare the files of all Exodiff tests under this directory')
+  parser.add_argument('--rel-err', type=float, default=DEFAULT_REL_ERR)
+  parser.add_argument('--abs-zero', type=float, default=DEFAULT_ABS_ZERO)
+  parser.add_argument('--tolerance', action='append', default=[], help='variable:rel_err[:abs_zero]')
+  parser.add_argument('-j', '--processes', type=int, default=None, help='number of processes (default: all cores)')
+  args = parser.parse_args()
+  if args.tests_dir:
+    pairs = findExodiffTests(args.tests_dir)
+  elif len(args.files) == 2:
+    pairs = [(args.files[0], args.files[1], args.rel_err, args.abs_zero, parseTolerances(args.tolerance))]
+  else:
+    parser.error('give a gold and an output file, or --tests-dir')
+  results = diffFilePairs(pairs, args.processes)
+  nb_failed = 0
+  for (out_filename, message) in results:
+    print '{0}: {1}'.format(out_filename, 'FAILED' if message else 'OK')
+    if message:
+      nb_failed += 1
+      print message.rstrip()
+  print '{0} files compared, {1} failed'.format(len(results), nb_failed)
+  sys.exit(1 if nb_failed else 0)
@@ -0,0 +1,49 @@
+from RunApp import RunApp
+from ExodusDiffer import exodiffFiles
+import os
+
+class PyExodiff(RunApp):
+  ''' Same as Exodiff but compares the Exodus files with ExodusDiffer
+      (numpy, per-variable tolerances, worst differences reported) instead
+      of the external exodiff program
+  '''
+
+  @staticmethod
+  def validParams():
+    params = RunApp.validParams()
+    params.addRequiredParam('exodiff',   [], "A list of files to exodiff.")
+    params.addParam('gold_dir',      'gold', "The directory where the \"golden standard\" files reside relative to the TEST_DIR: (default: ./gold/)")
+    params.addParam('delete_output_before_running',  True, "Delete pre-existing output files before running test. Only set to False if you know what you're doing!")
+    params.addParam('abs_zero',       1e-10, "Absolute zero cutoff used in exodiff comparisons.")
+    params.addParam('rel_err',       5.5e-6, "Relative error value used in exodiff comparisons.")
+    params.addParam('tolerances',        [], "A list of variable:rel_err or variable:rel_err:abs_zero overriding rel_err and abs_zero for some variables.")
+
+    return params
+
+  def __init__(self, name, params):
+    RunApp.__init__(self, name, params)
+
+
+  def prepare(self):
+    if self.specs['delete_output_before_running'] == True:
+      for file in self.specs['exodiff']:
+        try:
+          os.remove(os.path.join(self.specs['test_dir'], file))
+        except:
+          pass
+
+
+  def processResults(self, moose_dir, retcode, options, output):
+    (reason, output) = RunApp.processResults(self, moose_dir, retcode, options, output)
+
+    if reason != '' or self.specs['skip_checks']:
+      return (reason, output)
+
+    # Don't Run Exodiff on Scaled Tests
+    if options.scaling and self.specs['scale_refine']:
+      return (reason, output)
+
+    # Compare all files with their gold version
+    (reason, output) = exodiffFiles(self.specs, output)
+
+    return (reason, output)
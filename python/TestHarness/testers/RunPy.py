@@ -1,6 +1,7 @@
 import re, os, sys
 from Tester import Tester
 from RunParallel import RunParallel # For TIMEOUT value
+from TxtDiffer import txtdiffFiles
 
 class RunPy(Tester):
 
@@ -10,6 +11,8 @@ class RunPy(Tester):
     params.addRequiredParam('input',              "The input file to use for this test.")
     params.addRequiredParam('txtdiff',   [], "A list of files to txtdiff.")
     params.addParam('gold_dir',      'gold', "The directory where the \"golden standard\" files reside relative to the TEST_DIR: (default: ./gold/)")
+    params.addParam('abs_zero',       1e-10, "Absolute zero cutoff used in txtdiff comparisons.")
+    params.addParam('rel_err',       5.5e-6, "Relative error value used in txtdiff comparisons.")
     params.addParam('test_name',          "The name of the test - populated automatically")
 
     params.addParam('skip_test_harness_cli_args', False, "Skip adding global TestHarness CLI Args for this test")
@@ -104,21 +107,7 @@ class RunPy(Tester):
     if options.scaling and self.specs['scale_refine']:
       return (reason, output)
 
-    # Make sure that all of the Exodiff files are actually available
-    for file in self.specs['txtdiff']:
-      if not os.path.exists(os.path.join(self.specs['test_dir'], self.specs['gold_dir'], file)):
-        output += "File Not Found: " + os.path.join(self.specs['test_dir'], self.specs['gold_dir'], file)
-        reason = 'MISSING GOLD FILE'
-        break
-
-    # Run the txtdiff
-    if reason == '':
-      output += 'Running txtdiff'
-      with open(os.path.join(self.specs['test_dir'], file), 'r') as f:
-        first_line = f.readline()
-      with open(os.path.join(self.specs['test_dir'], self.specs['gold_dir'], file), 'r') as f:
-        first_line_gold = f.readline()
-      if first_line != first_line_gold:
-        reason = 'TXTDIFF'
+    # Compare all files with their gold version
+    (reason, output) = txtdiffFiles(self.specs, output)
 
     return (reason, output)
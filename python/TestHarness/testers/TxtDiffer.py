@@ -0,0 +1,169 @@
+import os, re
+import numpy as np
+
+class TxtDiffer(object):
+  ''' Compare a text file against its gold version token by token.
+      Tokens are separated by whitespace. Numbers are compared with the same
+      rel_err/abs_zero rules as CSVDiff, other tokens must match exactly.
+      Both files are streamed by chunks and the comparison stops at the
+      first mismatch, so memory does not depend on the file (or line) size.
+  '''
+
+  CHUNK_SIZE = 1024*1024 # bytes read at once in each file
+
+  def __init__(self, gold_filename, out_filename, rel_err=5.5e-6, abs_zero=1e-10, chunk_size=None):
+    self.gold_filename = gold_filename
+    self.out_filename = out_filename
+    self.rel_err = float(rel_err)
+    self.abs_zero = float(abs_zero)
+    self.chunk_size = chunk_size or self.CHUNK_SIZE
+
+  def diff(self):
+    ''' Return description of first difference ('' if files match) '''
+    if self._identicalBytes():
+      return ''
+    gold_blocks = self._iterTokenBlocks(self.gold_filename)
+    out_blocks = self._iterTokenBlocks(self.out_filename)
+    gold_tokens = []
+    out_tokens = []
+    token_index = 0 # index (in whole file) of first token in buffers
+    while True:
+      if not gold_tokens:
+        gold_tokens = next(gold_blocks, [])
+      if not out_tokens:
+        out_tokens = next(out_blocks, [])
+      if not gold_tokens or not out_tokens:
+        break
+      n = min(len(gold_tokens), len(out_tokens))
+      i_diff = self._findFirstMismatch(gold_tokens[:n], out_tokens[:n])
+      if i_diff is not None:
+        return self._mismatchMessage(token_index + i_diff, gold_tokens[i_diff], out_tokens[i_diff])
+      gold_tokens = gold_tokens[n:]
+      out_tokens = out_tokens[n:]
+      token_index += n
+    if gold_tokens or out_tokens:
+      return 'Different number of values: {0} has {1} values than {2}\n'.format(
+        self.out_filename, 'less' if gold_tokens else 'more', self.gold_filename)
+    return ''
+
+  def _identicalBytes(self):
+    ''' Return True if both files have exactly the same content '''
+    if os.path.getsize(self.gold_filename) != os.path.getsize(self.out_filename):
+      return False
+    with open(self.gold_filename, 'rb') as f_gold:
+      with open(self.out_filename, 'rb') as f_out:
+        while True:
+          block = f_gold.read(self.chunk_size)
+          if block != f_out.read(self.chunk_size):
+            return False
+          if not block:
+            return True
+
+  def _iterTokenBlocks(self, filename):
+    ''' Generator of lists of whitespace separated tokens, chunk by chunk '''
+    with open(filename, 'rb') as f:
+      rest = ''
+      while True:
+        block = f.read(self.chunk_size)
+        if not block:
+          break
+        tokens = (rest + block).split()
+        # the last token may continue in the next chunk
+        rest = tokens.pop() if tokens and not block[-1:].isspace() else ''
+        if tokens:
+          yield tokens
+      if rest:
+        yield [rest]
+
+  def _findFirstMismatch(self, gold_tokens, out_tokens):
+    ''' Return index of first pair of tokens that do not match (None if all match) '''
+    # Identical text is the common case, check it for all tokens at once
+    different = np.nonzero(np.array(gold_tokens) != np.array(out_tokens))[0]
+    if different.size == 0:
+      return None
+    try:
+      gold_values = np.array([gold_tokens[i] for i in different]).astype(np.float64)
+      out_values = np.array([out_tokens[i] for i in different]).astype(np.float64)
+    except ValueError:
+      # some tokens are not numbers, compare one by one
+      for i in different:
+        if not self._tokensMatch(gold_tokens[i], out_tokens[i]):
+          return i
+      return None
+    failed = self._failedValues(gold_values, out_values)
+    if failed.any():
+      return different[np.argmax(failed)]
+    return None
+
+  def _failedValues(self, gold_values, out_values):
+    ''' Return boolean array, True for values outside of tolerance '''
+    # values smaller than abs_zero are treated as zero
+    gold_values = np.where(np.abs(gold_values) < self.abs_zero, 0., gold_values)
+    out_values = np.where(np.abs(out_values) < self.abs_zero, 0., out_values)
+    scale = np.maximum(np.abs(gold_values), np.abs(out_values))
+    diff = np.abs(gold_values - out_values)
+    # nan (or inf) values only match if the text is identical
+    return ~(diff <= self.rel_err*scale)
+
+  def _tokensMatch(self, gold_token, out_token):
+    try:
+      gold_value = float(gold_token)
+      out_value = float(out_token)
+    except ValueError:
+      return gold_token == out_token
+    return not self._failedValues(np.array([gold_value]), np.array([out_value]))[0]
+
+  def _mismatchMessage(self, token_index, gold_token, out_token):
+    line_number = self._lineNumber(self.out_filename, token_index)
+    return 'Value {0} (line {1}) of {2} is "{3}" but "{4}" in {5} (rel_err={6}, abs_zero={7})\n'.format(
+      token_index + 1, line_number, self.out_filename, out_token, gold_token,
+      self.gold_filename, self.rel_err, self.abs_zero)
+
+  def _lineNumber(self, filename, token_index):
+    ''' Find line number of given token, only used to report a difference '''
+    line_number = 1
+    nb_tokens = 0
+    previous_block_ends_in_token = False
+    with open(filename, 'rb') as f:
+      while True:
+        block = f.read(self.chunk_size)
+        if not block:
+          break
+        for match in re.finditer(r'\S+|\n', block):
+          if match.group() == '\n':
+            line_number += 1
+            continue
+          if not (match.start() == 0 and previous_block_ends_in_token):
+            nb_tokens += 1 # token not split between two chunks
+          if nb_tokens > token_index:
+            return line_number
+        previous_block_ends_in_token = not block[-1:].isspace()
+    return line_number
+
+
+def txtdiffFiles(specs, output):
+  ''' Compare all files listed in specs['txtdiff'] with their gold version
+      Used by Txtdiff and RunPy testers.
+      @return (reason, output), reason is '' if all files match
+  '''
+  reason = ''
+  # Make sure that all of the gold files are actually available
+  for file in specs['txtdiff']:
+    gold_filename = os.path.join(specs['test_dir'], specs['gold_dir'], file)
+    if not os.path.exists(gold_filename):
+      output += "File Not Found: " + gold_filename
+      return ('MISSING GOLD FILE', output)
+
+  output += 'Running txtdiff\n'
+  for file in specs['txtdiff']:
+    out_filename = os.path.join(specs['test_dir'], file)
+    gold_filename = os.path.join(specs['test_dir'], specs['gold_dir'], file)
+    if not os.path.exists(out_filename):
+      output += "File Not Found: " + out_filename
+      return ('TXTDIFF', output)
+    differ = TxtDiffer(gold_filename, out_filename, specs['rel_err'], specs['abs_zero'])
+    message = differ.diff()
+    if message:
+      output += message
+      return ('TXTDIFF', output)
+  return (reason, output)
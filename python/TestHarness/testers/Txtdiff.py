@@ -3,6 +3,7 @@
 
 from RunApp import RunApp
 from util import runCommand
+from TxtDiffer import txtdiffFiles
 import os
 
 class Txtdiff(RunApp):
@@ -13,6 +14,8 @@ class Txtdiff(RunApp):
     params.addRequiredParam('txtdiff',   [], "A list of files to txtdiff.")
     params.addParam('gold_dir',      'gold', "The directory where the \"golden standard\" files reside relative to the TEST_DIR: (default: ./gold/)")
     params.addParam('delete_output_before_running',  True, "Delete pre-existing output files before running test. Only set to False if you know what you're doing!")
+    params.addParam('abs_zero',       1e-10, "Absolute zero cutoff used in txtdiff comparisons.")
+    params.addParam('rel_err',       5.5e-6, "Relative error value used in txtdiff comparisons.")
 
     return params
 
@@ -39,21 +42,7 @@ class Txtdiff(RunApp):
     if options.scaling and self.specs['scale_refine']:
       return (reason, output)
 
-    # Make sure that all of the Exodiff files are actually available
-    for file in self.specs['txtdiff']:
-      if not os.path.exists(os.path.join(self.specs['test_dir'], self.specs['gold_dir'], file)):
-        output += "File Not Found: " + os.path.join(self.specs['test_dir'], self.specs['gold_dir'], file)
-        reason = 'MISSING GOLD FILE'
-        break
-
-    # Run the txtdiff
-    if reason == '':
-      output += 'Running txtdiff'
-      with open(os.path.join(self.specs['test_dir'], file), 'r') as f:
-        first_line = f.readline()
-      with open(os.path.join(self.specs['test_dir'], self.specs['gold_dir'], file), 'r') as f:
-        first_line_gold = f.readline()
-      if first_line != first_line_gold:
-        reason = 'TXTDIFF'
+    # Compare all files with their gold version
+    (reason, output) = txtdiffFiles(self.specs, output)
 
     return (reason, output)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+''' script to summarise the timing files written by the RedbackTimingOutput
+    user object (one csv file per processor, cumulative call counts and wall
+    times of the instrumented materials and kernels at each time step).
+    The files of all ranks are merged into a flame-style tree (counter names
+    are paths "class;object;method"), and counters whose time differs a lot
+    between ranks are flagged as load imbalance.
+
+    Usage: python analyze_timing.py [file_base] [--step N] [--since N]
+             [--imbalance RATIO] [--folded output.txt]
+      file_base: base name of the csv files (default: redback_timing)
+      --step: time step to analyse (default: last step written by all ranks)
+      --since: only count the time spent after this time step
+      --imbalance: flag counters with max/mean time over ranks above this
+        ratio (default: 1.2)
+      --folded: also write folded stacks (self time in microseconds summed
+        over ranks), the input format of flamegraph.pl
+'''
+
+import os, sys, csv, glob, argparse
+
+def findTimingFiles(file_base):
+  ''' Return sorted list of (rank, filename) of the timing files '''
+  files = []
+  for filename in glob.glob(file_base + '.rank*.csv'):
+    rank = filename[len(file_base) + len('.rank'):-len('.csv')]
+    if rank.isdigit():
+      files.append((int(rank), filename))
+  return sorted(files)
+
+def readTimingFile(filename):
+  ''' Return dictionary (key=time step, value=dictionary (key=counter,
+      value=(calls, seconds))) '''
+  steps = {}
+  with open(filename, 'rb') as f:
+    for row in csv.DictReader(f):
+      counters = steps.setdefault(int(row['time_step']), {})
+      counters[row['counter']] = (int(row['calls']), float(row['seconds']))
+  return steps
+
+def readTimings(file_base, step=None, since=None):
+  ''' Merge timing files of all ranks
+      @return (step, timings) where timings is a dictionary (key=counter,
+        value=list of (calls, seconds) per rank)
+  '''
+  files = findTimingFiles(file_base)
+  if not files:
+    raise Exception, 'No timing file "{0}.rank*.csv" found!'.format(file_base)
+  all_steps = [readTimingFile(filename) for (rank, filename) in files]
+  common_steps = set.intersection(*[set(steps.keys()) for steps in all_steps])
+  if not common_steps:
+    raise Exception, 'Timing files of the different ranks have no time step in common'
+  if step is None:
+    step = max(common_steps)
+  for required_step in [step] + ([since] if since is not None else []):
+    if required_step not in common_steps:
+      raise Exception, 'Time step {0} not found in all timing files'.format(required_step)
+  timings = {}
+  nb_ranks = len(files)
+  for (i_rank, steps) in enumerate(all_steps):
+    for (counter, (calls, seconds)) in steps[step].items():
+      if since is not None:
+        (calls_before, seconds_before) = steps[since].get(counter, (0, 0.))
+        calls -= calls_before
+        seconds -= seconds_before
+      timings.setdefault(counter, [(0, 0.)]*nb_ranks)[i_rank] = (calls, seconds)
+  return (step, timings)
+
+def buildTree(timings):
+  ''' Build tree of counter paths
+      @return dictionary (key=path tuple, value=(per-rank inclusive seconds, calls)),
+        parents without counter get the sum of their children
+  '''
+  measured = {}
+  for (counter, values) in timings.items():
+    measured[tuple(counter.split(';'))] = ([seconds for (calls, seconds) in values],
+                                           sum(calls for (calls, seconds) in values))
+  paths = set()
+  for path in measured:
+    paths.update(path[:depth] for depth in range(1, len(path) + 1))
+  nb_ranks = len(timings.values()[0]) if timings else 0
+  tree = {}
+  # deepest first, so that children are done before their parent
+  for path in sorted(paths, key=len, reverse=True):
+    if path in measured:
+      tree[path] = measured[path]
+    else:
+      children = [tree[child] for child in getChildren(paths, path)]
+      tree[path] = ([sum(child[0][i] for child in children) for i in range(nb_ranks)],
+                    sum(child[1] for child in children))
+  return tree
+
+def getChildren(tree, path):
+  return [child for child in tree if len(child) == len(path) + 1 and child[:len(path)] == path]
+
+def imbalanceRatio(rank_seconds):
+  ''' max/mean of per-rank times (1 if perfectly balanced) '''
+  mean = sum(rank_seconds)/len(rank_seconds)
+  return max(rank_seconds)/mean if mean > 0 else 1.
+
+def printTree(tree, imbalance_threshold=1.2, bar_width=30):
+  ''' Print flame-style summary, children sorted by decreasing time
+      @return list of flagged counter paths
+  '''
+  roots = [path for path in tree if len(path) == 1]
+  total = sum(sum(tree[path][0]) for path in roots)
+  flagged = []
+  print '{0:70s} {1:>11s} {2:>6s} {3:>12s} {4:>9s}'.format('Counter', 'Time (s)', '%', 'Calls', 'Max/mean')
+  def printNode(path, depth):
+    (rank_seconds, calls) = tree[path]
+    seconds = sum(rank_seconds)
+    fraction = seconds/total if total > 0 else 0.
+    ratio = imbalanceRatio(rank_seconds)
+    flag = ''
+    # very short counters are not worth flagging
+    if ratio > imbalance_threshold and fraction > 0.01:
+      flag = ' <-- IMBALANCE'
+      flagged.append(path)
+    label = '  '*depth + path[-1]
+    bar = '#'*int(round(fraction*bar_width))
+    print '{0:70s} {1:11.4f} {2:6.1f} {3:12d} {4:9.2f} {5}{6}'.format(
+      label[:70], seconds, 100*fraction, calls, ratio, bar, flag)
+    for child in sorted(getChildren(tree, path), key=lambda p: -sum(tree[p][0])):
+      printNode(child, depth + 1)
+  for root in sorted(roots, key=lambda p: -sum(tree[p][0])):
+    printNode(root, 0)
+  return flagged
+
+def writeFolded(tree, output_filename):
+  ''' Write folded stacks "a;b;c self_time_in_us" (summed over ranks) '''
+  with open(output_filename, 'w') as f:
+    for path in sorted(tree):
+      self_seconds = sum(tree[path][0]) - sum(sum(tree[child][0]) for child in getChildren(tree, path))
+      if self_seconds > 0:
+        f.write('{0} {1}\n'.format(';'.join(path), int(round(self_seconds*1e6))))
+
+def printRankTotals(tree):
+  ''' Print total instrumented time per rank: inclusive times of the root
+      paths, so that the self time of counters with children is included '''
+  roots = [path for path in tree if len(path) == 1]
+  nb_ranks = len(tree[roots[0]][0]) if roots else 0
+  rank_totals = [sum(tree[path][0][i] for path in roots) for i in range(nb_ranks)]
+  print 'Instrumented time per rank (s): ' + ' '.join('{0:.4f}'.format(t) for t in rank_totals)
+  print 'Max/mean over ranks: {0:.2f}'.format(imbalanceRatio(rank_totals) if rank_totals else 1.)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Summarise Redback timing files')
+  parser.add_argument('file_base', nargs='?', default='redback_timing')
+  parser.add_argument('--step', type=int, default=None)
+  parser.add_argument('--since', type=int, default=None)
+  parser.add_argument('--imbalance', type=float, default=1.2)
+  parser.add_argument('--folded', default=None)
+  args = parser.parse_args()
+  (step, timings) = readTimings(args.file_base, args.step, args.since)
+  print 'Time step {0}{1}, {2} counters'.format(
+    step, ' (since step {0})'.format(args.since) if args.since is not None else '', len(timings))
+  tree = buildTree(timings)
+  flagged = printTree(tree, args.imbalance)
+  printRankTotals(tree)
+  if args.folded:
+    writeFolded(tree, args.folded)
+    print 'Folded stacks written to "{0}"'.format(args.folded)
+  if flagged:
+    print '{0} counters with load imbalance above {1}'.format(len(flagged), args.imbalance)
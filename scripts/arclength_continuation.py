@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+
+''' script to trace a solution branch (S-curve) with redback by
+    pseudo-arclength continuation, one redback run per point.
+    Requirements: numpy
+
+    Each step restarts from the checkpoint of the previous converged point
+    (initial guess) and sets the parameters of the RedbackContinuation
+    kernel and RedbackContinuationTangentAux aux kernel from the two previous
+    points. The arclength increment grows or shrinks depending on the number
+    of nonlinear iterations of the previous step, and is halved (and the
+    step run again) when a step fails. Folds (turning points of the
+    continuation parameter) are detected on the fly and located by a
+    quadratic fit of the last three points. Several branch segments (e.g.
+    forward and backward from a starting point, or from a point on another
+    branch) are traced at the same time on a process pool.
+
+    The base input must be a Steady problem with:
+      - a scalar variable (--variable, default "lambda") solved with a
+        RedbackContinuation scalar kernel (ScalarKernels/--kernel)
+      - a RedbackContinuationTangentAux aux scalar kernel
+        (AuxScalarKernels/--tangent) summing over the solution and its old
+        and older values, the latter read by two SolutionUserObjects
+        (UserObjects/--old-solution and UserObjects/--older-solution)
+      - csv output (the scalar variable and postprocessors are gathered for
+        each point), Outputs/checkpoint is turned on by this script
+      - optionally, postprocessors of the number of nonlinear iterations
+        (--nl-its, read from the log otherwise) and of the nodal L2 norm of
+        the difference between the solution and the old solution
+        (--increment-norm), so that the secant of the last two points is
+        normalised by its actual length (by the increment otherwise)
+    The first point of a segment is solved at the starting value of the
+    continuation parameter and the second point is a natural parameter
+    step (old and older solutions are equal), the next ones are
+    pseudo-arclength steps.
+
+    A segment stops after --max-steps points, when the continuation
+    parameter leaves [--lambda-min, --lambda-max], or when the increment
+    gets below --ds-min. Running the script again resumes the segments from
+    their last converged point.
+
+    Results are written in <output_dir>:
+      segment_NN/step_NNNN/: outputs and log of each point
+      branch.csv: segment, step, arclength, increment, number of nonlinear
+        iterations and last csv values of all converged points
+      folds.csv: interpolated values at each detected fold
+      continuation.json: state of all segments
+
+    Usage: python arclength_continuation.py <input.i> [--segment lambda0,ds[,initial.e]]
+             [--output-dir continuation] [--executable redback-opt] [--ranks 1]
+             [--threads 1] [--slots N] [--max-steps 100] [--target-nl-its 4]
+             [--lambda-min ...] [--lambda-max ...]
+      e.g. python arclength_continuation.py bratu_1D.i --segment 0.1,0.05 --lambda-max 1
+'''
+
+import os, re, json, shutil, argparse, multiprocessing
+import numpy as np
+import parameter_sweep
+
+STEP_FORMAT = 'step_{0:04d}'
+SEGMENT_FORMAT = 'segment_{0:02d}'
+FILE_BASE = 'out'
+STATE_FILENAME = 'segment.json'
+NOT_CONVERGED_MESSAGES = ['Solve Did NOT Converge', 'Solve Failed']
+NL_ITERATION_RE = re.compile(r'^\s*(\d+)\s+Nonlinear \|R\|', re.MULTILINE)
+
+DEFAULT_OPTIONS = {
+  'variable':'lambda', 'kernel':'continuation', 'tangent':'tangent', 'old_solution':'old_solution',
+  'older_solution':'older_solution', 'executable':parameter_sweep.DEFAULT_EXECUTABLE, 'ranks':1, 'threads':1,
+  'mpiexec':'mpiexec', 'max_steps':100, 'target_nl_its':4, 'max_growth':2., 'ds_min':1e-6, 'ds_max':np.inf,
+  'lambda_min':-np.inf, 'lambda_max':np.inf, 'max_folds':None, 'nl_its':'nl_its', 'increment_norm':'increment_norm'
+}
+
+def parseSegmentSpec(spec):
+  ''' Parse "lambda0,ds" or "lambda0,ds,initial_solution.e"
+      @return dictionary of segment (lambda0, ds, initial_solution)
+  '''
+  values = [value.strip() for value in spec.split(',')]
+  if len(values) not in (2, 3):
+    raise Exception, 'Invalid segment "{0}", expected lambda0,ds[,initial_solution]'.format(spec)
+  if float(values[1]) == 0:
+    raise Exception, 'Segment "{0}" has a zero increment'.format(spec)
+  return {'lambda0':float(values[0]), 'ds':float(values[1]),
+          'initial_solution':os.path.realpath(values[2]) if len(values) == 3 else None}
+
+def latestCheckpoint(checkpoint_dir):
+  ''' Base name of the latest checkpoint written by moose in checkpoint_dir
+      (files NNNN.xdr, NNNN_mesh.cpr, ...), None if there is none
+  '''
+  if not os.path.isdir(checkpoint_dir):
+    return None
+  matches = [re.match(r'^(\d+)[._]', filename) for filename in os.listdir(checkpoint_dir)]
+  prefixes = [match.group(1) for match in matches if match]
+  if not prefixes:
+    return None
+  return os.path.join(checkpoint_dir, max(prefixes, key=int))
+
+def countNonlinearIterations(log_filename):
+  ''' Number of nonlinear iterations of the last solve in a redback log '''
+  with open(log_filename) as f:
+    iterations = [int(it) for it in NL_ITERATION_RE.findall(f.read())]
+  return iterations[-1] if iterations else 0
+
+def continuationParameters(points, ds, lambda0, options):
+  ''' Command-line overrides of the continuation kernels for the next point
+      @param[in] points - list of converged points of the segment (dictionaries)
+      @param[in] ds - increment of the next step
+      @return list of (parameter path, value)
+  '''
+  kernel = 'ScalarKernels/{0}/'.format(options['kernel'])
+  if not points:
+    # first point: lambda = lambda0
+    (lambda_old, lambda_older, ds, ds_old) = (lambda0, lambda0 - 1., 0., 1.)
+  elif len(points) == 1:
+    # natural parameter step (old and older solutions are equal): lambda = lambda_old + ds
+    (lambda_old, lambda_older, ds_old) = (points[-1]['lambda'], points[-1]['lambda'] - ds, ds)
+  else:
+    # arclength step along the secant of the last two points (the sign of ds only gives the initial direction)
+    (lambda_old, lambda_older, ds_old) = (points[-1]['lambda'], points[-2]['lambda'], points[-1]['secant'])
+    ds = abs(ds)
+  return [(kernel + 'ds', '{0:.15g}'.format(ds)), (kernel + 'ds_old', '{0:.15g}'.format(ds_old)),
+          (kernel + 'continuation_parameter_old', '{0:.15g}'.format(lambda_old)),
+          (kernel + 'continuation_parameter_older', '{0:.15g}'.format(lambda_older)),
+          ('AuxScalarKernels/{0}/ds_old'.format(options['tangent']), '{0:.15g}'.format(ds_old))]
+
+def solutionParameters(points, initial_solution, options):
+  ''' Command-line overrides of the old and older solutions and of the
+      checkpoint to restart from
+      @return list of (parameter path, value)
+  '''
+  exodus = [point['exodus'] for point in points[-2:]]
+  if len(exodus) == 1:
+    exodus = exodus*2
+  elif not exodus and initial_solution:
+    exodus = [initial_solution]*2
+  params = []
+  if exodus:
+    params += [('UserObjects/{0}/mesh'.format(options['older_solution']), exodus[0]),
+               ('UserObjects/{0}/mesh'.format(options['old_solution']), exodus[1])]
+  if points and points[-1].get('checkpoint'):
+    params.append(('Problem/restart_file_base', points[-1]['checkpoint']))
+  return params + [('Outputs/checkpoint', 'true'), ('Outputs/exodus', 'true'), ('Outputs/csv', 'true')]
+
+def nextIncrement(ds, nl_its, options):
+  ''' Increment of the next step from the number of nonlinear iterations of
+      the last one (same sign as ds)
+  '''
+  factor = (options['target_nl_its'] + 1.)/(nl_its + 1.)
+  factor = min(options['max_growth'], max(1./options['max_growth'], factor))
+  return np.sign(ds)*min(options['ds_max'], max(options['ds_min'], abs(ds)*factor))
+
+def locateFold(points, columns):
+  ''' Locate the fold between the last three points: vertex of the parabola
+      lambda(s) through them, other columns interpolated at the same
+      arclength
+      @return dictionary (s, step and interpolated columns)
+  '''
+  s = np.array([point['s'] for point in points[-3:]])
+  lambdas = np.array([point['lambda'] for point in points[-3:]])
+  (a, b, c) = np.polyfit(s, lambdas, 2)
+  s_fold = -b/(2*a) if a != 0 else s[1]
+  s_fold = min(s[-1], max(s[0], s_fold))
+  fold = {'s':s_fold, 'step':points[-2]['step']}
+  for column in columns:
+    values = np.array([point['values'].get(column, np.nan) for point in points[-3:]])
+    fold[column] = np.polyval(np.polyfit(s, values, 2), s_fold)
+  return fold
+
+def _saveState(state, filename):
+  with open(filename + '.tmp', 'w') as f:
+    json.dump(state, f, indent=1)
+  os.rename(filename + '.tmp', filename) # not left half written if the script is killed
+
+def traceSegment(job):
+  ''' Trace one branch segment (in a pool process), resuming from its state
+      file if any
+      @return state of the segment (dictionary)
+  '''
+  (base_input, segment_dir, segment, options) = job
+  state_filename = os.path.join(segment_dir, STATE_FILENAME)
+  if os.path.isfile(state_filename):
+    with open(state_filename) as f:
+      state = json.load(f)
+  else:
+    state = {'segment':segment, 'ds':segment['ds'], 'points':[], 'folds':[], 'status':'running'}
+  points = state['points']
+  cwd = os.path.dirname(base_input)
+  while state['status'] == 'running':
+    if len(points) >= options['max_steps']:
+      state['status'] = 'max_steps'
+      break
+    step = len(points)
+    step_dir = os.path.join(segment_dir, STEP_FORMAT.format(step))
+    if os.path.isdir(step_dir):
+      shutil.rmtree(step_dir) # outputs of a failed attempt
+    os.makedirs(step_dir)
+    ds = state['ds']
+    params = continuationParameters(points, ds, segment['lambda0'], options) + \
+      solutionParameters(points, segment['initial_solution'], options)
+    file_base = os.path.join(step_dir, FILE_BASE)
+    command = parameter_sweep.buildCommand(options['executable'], base_input, params, file_base, options['ranks'],
+                                           options['threads'], options['mpiexec'])
+    log_filename = os.path.join(step_dir, 'log.txt')
+    status = parameter_sweep.runCommand(command, cwd, log_filename)
+    with open(log_filename) as f:
+      log = f.read()
+    converged = status['returncode'] == 0 and os.path.isfile(file_base + '.csv') and \
+      not any(message in log for message in NOT_CONVERGED_MESSAGES)
+    if not converged:
+      if abs(ds) <= options['ds_min']:
+        state['status'] = 'not_converged'
+      else:
+        state['ds'] = np.sign(ds)*max(options['ds_min'], abs(ds)/2.)
+      _saveState(state, state_filename)
+      continue
+    (columns, values) = parameter_sweep.readCsvColumns(file_base + '.csv')
+    if options['variable'] not in columns:
+      raise Exception, 'Column "{0}" not found in {1}.csv'.format(options['variable'], file_base)
+    last_values = dict(zip(columns, values[-1]))
+    if options['nl_its'] in last_values:
+      nl_its = int(last_values[options['nl_its']])
+    else:
+      nl_its = countNonlinearIterations(log_filename)
+    lambda_new = last_values[options['variable']]
+    secant = abs(ds) if step else 0.
+    if step and options['increment_norm'] in last_values:
+      secant = np.sqrt(last_values[options['increment_norm']]**2 + (lambda_new - points[-1]['lambda'])**2)
+    point = {'step':step, 'ds':ds if step else 0., 'secant':secant, 's':(points[-1]['s'] + secant) if points else 0.,
+             'lambda':lambda_new, 'nl_its':nl_its, 'wall_time':status['wall_time'], 'exodus':file_base + '.e',
+             'checkpoint':latestCheckpoint(file_base + '_cp'), 'values':last_values}
+    points.append(point)
+    if len(points) >= 3:
+      (dl_old, dl) = (points[-2]['lambda'] - points[-3]['lambda'], points[-1]['lambda'] - points[-2]['lambda'])
+      if dl_old*dl < 0:
+        state['folds'].append(locateFold(points, columns))
+        if options['max_folds'] is not None and len(state['folds']) >= options['max_folds']:
+          state['status'] = 'max_folds'
+    if step:
+      state['ds'] = nextIncrement(ds, nl_its, options)
+    if not options['lambda_min'] <= point['lambda'] <= options['lambda_max']:
+      state['status'] = 'out_of_range'
+    _saveState(state, state_filename)
+  _saveState(state, state_filename)
+  return state
+
+def _writeTable(filename, rows, first_columns):
+  ''' Write list of dictionaries as csv (union of keys, missing values empty) '''
+  columns = list(first_columns)
+  for row in rows:
+    columns += sorted(key for key in row if key not in columns)
+  with open(filename, 'w') as f:
+    f.write(','.join(columns) + '\n')
+    for row in rows:
+      f.write(','.join('{0:.10g}'.format(row[column]) if column in row else '' for column in columns) + '\n')
+
+def writeBranch(output_dir, states):
+  ''' Write branch.csv and folds.csv of all segments '''
+  points = []
+  folds = []
+  for (index, state) in enumerate(states):
+    for point in state['points']:
+      row = dict(point['values'])
+      row.update(segment=index, step=point['step'], s=point['s'], ds=point['ds'], nl_its=point['nl_its'])
+      points.append(row)
+    for fold in state['folds']:
+      row = dict(fold)
+      row.update(segment=index)
+      folds.append(row)
+  _writeTable(os.path.join(output_dir, 'branch.csv'), points, ['segment', 'step', 's', 'ds', 'nl_its'])
+  _writeTable(os.path.join(output_dir, 'folds.csv'), folds, ['segment', 'step', 's'])
+
+def runContinuation(base_input, segments, output_dir='continuation', slots=None, **kwargs):
+  ''' Trace all segments, as many at the same time as the core budget allows
+      @param[in] segments - list of dictionaries (see parseSegmentSpec)
+      @param[in] kwargs - options overriding DEFAULT_OPTIONS
+      @return list of states of the segments
+  '''
+  options = dict(DEFAULT_OPTIONS)
+  for (key, value) in kwargs.items():
+    if key not in options:
+      raise Exception, 'Unknown option "{0}"'.format(key)
+    options[key] = value
+  base_input = os.path.realpath(base_input)
+  if not os.path.isfile(base_input):
+    raise Exception, 'Input file "{0}" not found!'.format(base_input)
+  output_dir = os.path.realpath(output_dir)
+  jobs = []
+  for (index, segment) in enumerate(segments):
+    segment_dir = os.path.join(output_dir, SEGMENT_FORMAT.format(index))
+    if not os.path.isdir(segment_dir):
+      os.makedirs(segment_dir)
+    jobs.append((base_input, segment_dir, segment, options))
+  slots = slots or multiprocessing.cpu_count()
+  nb_workers = max(1, min(len(jobs), slots // (options['ranks']*options['threads'])))
+  if nb_workers == 1:
+    states = [traceSegment(job) for job in jobs]
+  else:
+    pool = multiprocessing.Pool(nb_workers)
+    try:
+      states = pool.map(traceSegment, jobs)
+    finally:
+      pool.close()
+      pool.join()
+  with open(os.path.join(output_dir, 'continuation.json'), 'w') as f:
+    json.dump({'input':base_input, 'options':options, 'segments':states}, f, indent=1)
+  writeBranch(output_dir, states)
+  return states
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Trace a solution branch by pseudo-arclength continuation')
+  parser.add_argument('input', help='base input file')
+  parser.add_argument('--segment', action='append', default=[], help='lambda0,ds[,initial_solution.e]')
+  parser.add_argument('--output-dir', default='continuation')
+  parser.add_argument('--slots', type=int, default=None, help='total number of cores (default: all)')
+  for (key, value) in sorted(DEFAULT_OPTIONS.items()):
+    parser.add_argument('--' + key.replace('_', '-'), type=type(value) if value is not None else int, default=value)
+  args = vars(parser.parse_args())
+  segments = [parseSegmentSpec(spec) for spec in args.pop('segment') or ['0,0.1']]
+  (base_input, output_dir, slots) = (args.pop('input'), args.pop('output_dir'), args.pop('slots'))
+  states = runContinuation(base_input, segments, output_dir, slots, **args)
+  for (index, state) in enumerate(states):
+    print 'Segment {0}: {1} points, {2} fold(s), {3}'.format(index, len(state['points']), len(state['folds']),
+                                                              state['status'])
+    for fold in state['folds']:
+      print '  fold at lambda={0:.6g} (near step {1})'.format(fold[args['variable']], fold['step'])
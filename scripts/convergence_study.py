@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+
+''' script to run a mesh and time step convergence study of a redback input
+    and to find the cheapest resolution meeting an accuracy target.
+    Requirements: numpy
+
+    Level k of the study refines the base resolution k times:
+      space: Mesh/uniform_refine = refine + k
+      time: dt = dt0/2^k (ConstantDT TimeStepper or Executioner/dt, dtmax
+        is lowered with it)
+      both (default): both at once
+    The levels run at the same time, as many as fit in the core budget
+    (--slots), from the directory of the input so that relative mesh files
+    keep working. Levels that already finished successfully are not run
+    again (unless --force).
+
+    Errors are computed for the postprocessor columns (default: all columns
+    of the reference but time) against a reference:
+      finest (default): the finest successful level (errors of the other
+        levels only)
+      gold: csv file of the same name in the gold directory of the input
+        (Outputs/file_base + '.csv'). It is the numerical result of the base
+        resolution, not an exact solution: the errors of the refined levels
+        do not go to zero
+      <file.csv>: csv file with a time column and analytical values
+    Each level is interpolated linearly at the times of the reference, over
+    the time range common to both, and compared with:
+      linf: max |u - u_ref|
+      l2: time-averaged root mean square of u - u_ref (trapezoidal rule)
+      rel_l2: l2 / (time-averaged root mean square of u_ref)
+    The observed order between consecutive successful levels j < k is
+    log2(e_j/e_k)/(k - j) (resolution halved at each level, failed levels
+    are skipped), and the global order is the slope of log(e) against log(h)
+    fitted over the successful levels.
+    The cost-optimal resolution is the cheapest level (wall time) whose
+    largest rel_l2 error over the columns is below --tolerance; if none is,
+    the number of extra levels needed is extrapolated with the global order.
+
+    Results are written in <output_dir>:
+      study.json: levels, parameters and status of each run
+      convergence.csv: one line per level and column (errors, orders, cost)
+
+    Usage: python convergence_study.py <input.i> [--levels 4] [--ladder both|space|time]
+             [--refine 0] [--dt DT0] [--reference finest|gold|file.csv] [--columns c1 c2]
+             [--tolerance 1e-3] [--output-dir convergence] [--executable redback-opt]
+             [--ranks 1] [--threads 1] [--slots N] [--force]
+      e.g. python convergence_study.py ../tests/benchmark_7_HM/bench_HM_elastic.i --levels 3 --tolerance 1e-4
+'''
+
+import os, json, math, argparse, multiprocessing
+from multiprocessing.pool import ThreadPool
+import numpy as np
+from parameter_sweep import DEFAULT_EXECUTABLE, buildCommand, runCommand, readCsvColumns
+from scaling_benchmark import readInputBlocks
+
+STUDY_FILENAME = 'study.json'
+LEVEL_FORMAT = 'level_{0}'
+FILE_BASE = 'out'
+NB_ELEMS_PP = 'convergence_nb_elems' # postprocessor added to each run
+OUTPUT_COLUMNS = ['level', 'refine', 'dt', 'nb_elems', 'wall_time', 'column', 'linf', 'l2', 'rel_l2',
+                  'order', 'global_order']
+
+def timeStepParameters(blocks, dt=None):
+  ''' Path of the time step parameter of an input and its base value
+      (dtmax of the Executioner if smaller)
+      @param[in] blocks - parameters of the input (readInputBlocks)
+      @return (parameter path, base time step, dtmax or None)
+  '''
+  executioner = blocks.get('Executioner', {})
+  time_stepper = blocks.get('Executioner/TimeStepper')
+  if time_stepper is not None and time_stepper.get('type') != 'ConstantDT':
+    # adaptive time steppers choose their own time step
+    raise Exception, 'Only the time step of a ConstantDT TimeStepper can be refined, not of {0}'.format(
+      time_stepper.get('type'))
+  path = 'Executioner/TimeStepper/dt' if 'dt' in blocks.get('Executioner/TimeStepper', {}) else 'Executioner/dt'
+  value = blocks.get(path.rsplit('/', 1)[0], {}).get('dt')
+  dtmax = float(executioner['dtmax']) if 'dtmax' in executioner else None
+  if dt is None:
+    if value is None:
+      raise Exception, 'No time step found in the input, give the base time step with --dt'
+    dt = float(value)
+  if dtmax is not None:
+    dt = min(dt, dtmax)
+  return (path, dt, dtmax)
+
+def buildLevels(input_filename, nb_levels, ladder='both', refine=0, dt=None):
+  ''' Parameters of the levels of the study
+      @return list of dictionaries (level, refine, dt, params (list of (path, value)))
+  '''
+  blocks = readInputBlocks(input_filename)
+  levels = []
+  (dt_path, dt0, dtmax) = timeStepParameters(blocks, dt) if ladder in ('time', 'both') else (None, dt, None)
+  for level in range(nb_levels):
+    level_refine = refine + (level if ladder in ('space', 'both') else 0)
+    params = [('Mesh/uniform_refine', str(level_refine))]
+    level_dt = None
+    if dt_path is not None:
+      level_dt = dt0/2**level
+      params.append((dt_path, '{0:.12g}'.format(level_dt)))
+      if dtmax is not None:
+        params.append(('Executioner/dtmax', '{0:.12g}'.format(level_dt)))
+    levels.append({'level':level, 'name':LEVEL_FORMAT.format(level), 'refine':level_refine, 'dt':level_dt,
+                   'params':params})
+  return levels
+
+def _runLevel(job):
+  ''' Run one level (in a pool thread) '''
+  (command, cwd, level_dir) = job
+  return runCommand(command, cwd, os.path.join(level_dir, 'log.txt'))
+
+def runLevels(input_filename, levels, output_dir, executable=DEFAULT_EXECUTABLE, ranks=1, threads=1, slots=None,
+              mpiexec='mpiexec', force=False):
+  ''' Run the levels not run yet (concurrently), updating their status '''
+  study_filename = os.path.join(output_dir, STUDY_FILENAME)
+  previous = {}
+  if os.path.isfile(study_filename):
+    with open(study_filename) as f:
+      study = json.load(f)
+    if study['input'] == input_filename:
+      previous = dict([(level['name'], level) for level in study['levels']])
+  jobs = []
+  for level in levels:
+    old_level = previous.get(level['name'], {})
+    if not force and old_level.get('returncode') == 0 and \
+       old_level['params'] == [[path, value] for (path, value) in level['params']]:
+      level.update([(key, old_level[key]) for key in ('returncode', 'wall_time')])
+      continue
+    level_dir = os.path.join(output_dir, level['name'])
+    if not os.path.isdir(level_dir):
+      os.makedirs(level_dir)
+    params = level['params'] + [('Postprocessors/{0}/type'.format(NB_ELEMS_PP), 'NumElems'), ('Outputs/csv', 'true')]
+    command = buildCommand(executable, input_filename, params, os.path.join(level_dir, FILE_BASE), ranks, threads,
+                           mpiexec)
+    jobs.append((level, (command, os.path.dirname(input_filename), level_dir)))
+  if jobs:
+    slots = slots or multiprocessing.cpu_count()
+    nb_workers = max(1, min(len(jobs), slots // (ranks*threads)))
+    print 'Running {0} levels ({1} at a time)'.format(len(jobs), nb_workers)
+    pool = ThreadPool(nb_workers)
+    try:
+      for (i, status) in enumerate(pool.imap(_runLevel, [job for (level, job) in jobs])):
+        level = jobs[i][0]
+        level.update(status)
+        print '{0} (refine {1}, dt {2}): {3} ({4:.1f}s)'.format(level['name'], level['refine'], level['dt'],
+                                                               'OK' if status['returncode'] == 0 else 'FAILED',
+                                                               status['wall_time'])
+    finally:
+      pool.close()
+      pool.join()
+  with open(study_filename, 'w') as f:
+    json.dump({'input':input_filename, 'levels':levels}, f, indent=1)
+
+def readSeries(csv_filename, columns=None):
+  ''' Time and columns of a csv file
+      @return (times, list of column names, 2D array (nb times, nb columns))
+  '''
+  (names, values) = readCsvColumns(csv_filename)
+  if 'time' not in names:
+    raise Exception, 'File "{0}" has no time column'.format(csv_filename)
+  if columns is None:
+    columns = [name for name in names if name != 'time']
+  missing = [column for column in columns if column not in names]
+  if missing:
+    raise Exception, 'Columns {0} not found in "{1}"'.format(', '.join(missing), csv_filename)
+  return (values[:, names.index('time')], columns, values[:, [names.index(column) for column in columns]])
+
+def interpolateSeries(times, values, new_times):
+  ''' Linear interpolation of all columns at once
+      @param[in] values - 2D array (nb times, nb columns), times increasing
+  '''
+  index = np.clip(np.searchsorted(times, new_times, side='right') - 1, 0, len(times) - 2)
+  weight = ((new_times - times[index])/(times[index + 1] - times[index]))[:, np.newaxis]
+  return values[index]*(1 - weight) + values[index + 1]*weight
+
+def errorNorms(times, values, ref_times, ref_values):
+  ''' Error norms of all columns against the reference, over the common time range
+      @return dictionary (key=linf, l2, rel_l2, value=array (nb columns))
+  '''
+  mask = (ref_times >= times[0]) & (ref_times <= times[-1])
+  if mask.sum() < 2 or len(times) < 2:
+    raise Exception, 'Less than 2 reference times in the time range of the results'
+  (ref_times, ref_values) = (ref_times[mask], ref_values[mask])
+  diff = interpolateSeries(times, values, ref_times) - ref_values
+  duration = ref_times[-1] - ref_times[0]
+  l2 = np.sqrt(np.trapz(diff**2, ref_times, axis=0)/duration)
+  ref_l2 = np.sqrt(np.trapz(ref_values**2, ref_times, axis=0)/duration)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    rel_l2 = np.where(ref_l2 > 0, l2/ref_l2, l2)
+  return {'linf':np.abs(diff).max(axis=0), 'l2':l2, 'rel_l2':rel_l2}
+
+def convergenceOrders(errors, level_indices=None):
+  ''' Observed orders of errors (2D array (nb levels, nb columns), resolution halved at each level)
+      @param[in] level_indices - level of each row of errors (default: consecutive levels from 0)
+      @return (orders between consecutive rows (nb levels - 1, nb columns), global order per column)
+  '''
+  if level_indices is None:
+    level_indices = np.arange(len(errors))
+  level_indices = np.asarray(level_indices, dtype=float)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    log_errors = np.log2(errors)
+    orders = (log_errors[:-1] - log_errors[1:])/np.diff(level_indices)[:, np.newaxis]
+    global_orders = np.full(errors.shape[1], np.nan)
+    if len(errors) > 1:
+      # slope of log2(e) against log2(h) = -level, only where all errors are positive
+      valid = np.all(np.isfinite(log_errors), axis=0)
+      if valid.any():
+        global_orders[valid] = -np.polyfit(level_indices, log_errors[:, valid], 1)[0]
+  return (orders, global_orders)
+
+def computeConvergence(input_filename, levels, output_dir, reference='finest', columns=None):
+  ''' Errors and orders of the successful levels
+      @return (list of levels used, list of columns, dictionary of 2D arrays of norms, orders, global orders)
+  '''
+  blocks = readInputBlocks(input_filename)
+  levels = [level for level in levels if level.get('returncode') == 0]
+  if reference == 'finest':
+    if len(levels) < 3:
+      raise Exception, 'At least 3 successful levels are needed with the finest level as reference'
+    ref_filename = os.path.join(output_dir, levels[-1]['name'], FILE_BASE + '.csv')
+    levels = levels[:-1]
+  elif reference == 'gold':
+    file_base = blocks.get('Outputs', {}).get('file_base', os.path.splitext(os.path.basename(input_filename))[0])
+    ref_filename = os.path.join(os.path.dirname(input_filename), 'gold', file_base + '.csv')
+  else:
+    ref_filename = reference
+  if columns is None:
+    # all columns of the reference, except the one added to the runs (finest level)
+    columns = [name for name in readCsvColumns(ref_filename)[0] if name not in ('time', NB_ELEMS_PP)]
+  (ref_times, columns, ref_values) = readSeries(ref_filename, columns)
+  norms = dict([(name, np.empty((len(levels), len(columns)))) for name in ('linf', 'l2', 'rel_l2')])
+  for (i, level) in enumerate(levels):
+    (times, names, values) = readSeries(os.path.join(output_dir, level['name'], FILE_BASE + '.csv'),
+                                        columns + [NB_ELEMS_PP])
+    level['nb_elems'] = int(values[-1, -1])
+    for (name, value) in errorNorms(times, values[:, :-1], ref_times, ref_values).items():
+      norms[name][i] = value
+  (orders, global_orders) = convergenceOrders(norms['rel_l2'], [level['level'] for level in levels])
+  return (levels, columns, norms, orders, global_orders)
+
+def optimalResolution(levels, norms, global_orders, tolerance):
+  ''' Cheapest level meeting the tolerance on the largest rel_l2 error
+      @return (level dictionary or None, extra levels needed if None (nan if unknown))
+  '''
+  worst = norms['rel_l2'].max(axis=1)
+  candidates = [level for (level, error) in zip(levels, worst) if error <= tolerance]
+  if candidates:
+    return (min(candidates, key=lambda level: level['wall_time']), 0)
+  # e = e_last*2^(-p*n) <= tolerance for n more levels, slowest converging column
+  order = np.nanmin(global_orders) if np.isfinite(global_orders).any() else float('nan')
+  if not order > 0:
+    return (None, float('nan'))
+  return (None, int(math.ceil(math.log(worst[-1]/tolerance, 2)/order)))
+
+def runConvergenceStudy(input_filename, nb_levels=4, ladder='both', refine=0, dt=None, reference='finest',
+                        columns=None, tolerance=1e-3, output_dir='convergence', executable=DEFAULT_EXECUTABLE,
+                        ranks=1, threads=1, slots=None, mpiexec='mpiexec', force=False):
+  ''' Run the levels, compute the errors and report orders and the cost-optimal resolution
+      @return (levels, columns, norms, orders, global orders, optimal level, extra levels needed)
+  '''
+  input_filename = os.path.realpath(input_filename)
+  if not os.path.isfile(input_filename):
+    raise Exception, 'Input file "{0}" not found!'.format(input_filename)
+  output_dir = os.path.realpath(output_dir)
+  if not os.path.isdir(output_dir):
+    os.makedirs(output_dir)
+  levels = buildLevels(input_filename, nb_levels, ladder, refine, dt)
+  runLevels(input_filename, levels, output_dir, executable, ranks, threads, slots, mpiexec, force)
+  (used_levels, columns, norms, orders, global_orders) = computeConvergence(input_filename, levels, output_dir,
+                                                                            reference, columns)
+  (optimal, extra_levels) = optimalResolution(used_levels, norms, global_orders, tolerance)
+
+  with open(os.path.join(output_dir, 'convergence.csv'), 'w') as f:
+    f.write(','.join(OUTPUT_COLUMNS) + '\n')
+    for (i, level) in enumerate(used_levels):
+      for (j, column) in enumerate(columns):
+        f.write('{0},{1},{2},{3},{4:.6g},{5},{6:.6g},{7:.6g},{8:.6g},{9:.4g},{10:.4g}\n'.format(
+          level['level'], level['refine'], '' if level['dt'] is None else level['dt'], level['nb_elems'],
+          level['wall_time'], column,
+          norms['linf'][i, j], norms['l2'][i, j], norms['rel_l2'][i, j],
+          orders[i - 1, j] if i > 0 else float('nan'), global_orders[j]))
+
+  print '{0:6s} {1:>6s} {2:>10s} {3:>9s} {4:>9s} {5:20s} {6:>11s} {7:>11s} {8:>7s}'.format(
+    'Level', 'Refine', 'dt', 'Elements', 'Wall (s)', 'Column', 'rel_l2', 'linf', 'Order')
+  for (i, level) in enumerate(used_levels):
+    for (j, column) in enumerate(columns):
+      print '{0:6d} {1:6d} {2:>10s} {3:9d} {4:9.2f} {5:20s} {6:11.3e} {7:11.3e} {8:7.2f}'.format(
+        level['level'], level['refine'], '{0:.4g}'.format(level['dt']) if level['dt'] else '-', level['nb_elems'],
+        level['wall_time'], column, norms['rel_l2'][i, j], norms['linf'][i, j],
+        orders[i - 1, j] if i > 0 else float('nan'))
+  print 'Global observed orders: ' + ', '.join('{0} {1:.2f}'.format(column, order)
+                                               for (column, order) in zip(columns, global_orders))
+  if optimal is not None:
+    print 'Cheapest resolution with rel_l2 <= {0:g}: {1} (uniform_refine {2}, dt {3}, {4:.2f}s)'.format(
+      tolerance, optimal['name'], optimal['refine'], optimal['dt'], optimal['wall_time'])
+  elif np.isfinite(extra_levels):
+    print 'No level reaches rel_l2 <= {0:g}: about {1} more level(s) needed at the observed order'.format(
+      tolerance, extra_levels)
+  else:
+    print 'No level reaches rel_l2 <= {0:g} and the errors do not converge'.format(tolerance)
+  return (used_levels, columns, norms, orders, global_orders, optimal, extra_levels)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Mesh and time step convergence study of a redback input')
+  parser.add_argument('input', help='input file')
+  parser.add_argument('--levels', type=int, default=4, help='number of levels (resolution halved at each)')
+  parser.add_argument('--ladder', default='both', choices=['both', 'space', 'time'],
+                      help='refine the mesh, the time step or both at each level')
+  parser.add_argument('--refine', type=int, default=0, help='uniform_refine of the coarsest level')
+  parser.add_argument('--dt', type=float, default=None, help='time step of the coarsest level (default: input)')
+  parser.add_argument('--reference', default='finest',
+                      help='finest, gold (base resolution result) or a csv file of analytical values')
+  parser.add_argument('--columns', nargs='+', default=None, help='columns to compare (default: all)')
+  parser.add_argument('--tolerance', type=float, default=1e-3, help='target rel_l2 error of all columns')
+  parser.add_argument('--output-dir', default='convergence')
+  parser.add_argument('--executable', default=DEFAULT_EXECUTABLE, help='command running redback')
+  parser.add_argument('--ranks', type=int, default=1, help='MPI ranks per run')
+  parser.add_argument('--threads', type=int, default=1, help='threads per rank')
+  parser.add_argument('--slots', type=int, default=None, help='total number of cores (default: all)')
+  parser.add_argument('--mpiexec', default='mpiexec')
+  parser.add_argument('--force', action='store_true', help='run again levels that already succeeded')
+  args = parser.parse_args()
+  runConvergenceStudy(args.input, args.levels, args.ladder, args.refine, args.dt, args.reference, args.columns,
+                      args.tolerance, args.output_dir, args.executable, args.ranks, args.threads, args.slots,
+                      args.mpiexec, args.force)
@@ -1,27 +1,120 @@
 #!/usr/bin/env python
 
-''' script to convert raw binary file to png '''
-
-import os, sys, shutil
-from PIL import Image
-
-input_filename = 'pack.dat' # 300x300x300
-output_filename = 'image'
-
-with open(input_filename, 'rb') as f:
-    text = f.read().splitlines()
-
-k=0
-for i in range(300):
-    k+= 1
-    imtxt=''
-    for j in range(300):
-        imtxt=imtxt + ' ' + text[300*i+j].strip()
-    im = Image.new("1", (300, 300))
-    im.putdata(map(int, imtxt.split()))
-    if i+1<10:
-        im.save(output_filename+'00'+str(k)+'.png')
-    elif i+1<100:
-        im.save(output_filename+'0'+str(k)+'.png')
-    else:
-        im.save(output_filename+str(k)+'.png')
+''' script to convert ascii voxel file (.dat) to png
+    Requirements: Python Imaging Library (PIL) or pillow (more recent), numpy
+
+    The .dat file contains nz*ny*nx integer voxel values separated by
+    whitespace, stored slice by slice (x fastest), e.g. one line per row.
+    The ascii data is parsed only once, by chunks, into a packed raw volume
+    (format of raw_to_png.py) written next to the png files, which are then
+    generated in parallel from that volume. The raw file is reused as long as
+    it is more recent than the .dat file.
+
+    Usage: python dat_to_png.py <input.dat> <nx> <ny> <nz> [output_base_dir]
+             [--n-bit N] [--serial]
+      e.g. python dat_to_png.py pack.dat 300 300 300
+'''
+
+import os, struct, argparse
+import numpy as np
+
+from raw_to_png import RAW_HEADER_FORMAT, RAW_DTYPES, openRawVolume, convertRawToPng
+
+CHUNK_SIZE = 16*1024*1024 # bytes of ascii data parsed at once
+
+def iterDatChunks(input_filename, chunk_size=CHUNK_SIZE):
+    ''' Generator of 1D int64 numpy arrays of the voxel values, chunk by chunk '''
+    rest = ''
+    with open(input_filename, 'rb') as f:
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            text = rest + block
+            # the last value may continue in the next chunk
+            cut = len(text)
+            if not block[-1:].isspace():
+                cut = max(text.rfind(c) for c in ' \t\r\n') + 1
+            rest = text[cut:]
+            values = np.fromstring(text[:cut], dtype=np.int64, sep=' ')
+            if values.size:
+                yield values
+        if rest.strip():
+            yield np.fromstring(rest, dtype=np.int64, sep=' ')
+
+def convertDatToRaw(input_filename, output_filename, nx, ny, nz, n_bit=0, chunk_size=CHUNK_SIZE):
+    ''' Parse ascii voxel file and write it as packed raw file
+        @param[in] input_filename - string, name of .dat input file
+        @param[in] output_filename - string, name of raw output file
+        @param[in] nx, ny, nz - ints, dimensions of the volume
+        @param[in] n_bit - int, voxel size in raw file (0: 1 byte, 1: 2 bytes, 2: 4 bytes)
+    '''
+    if n_bit not in RAW_DTYPES:
+        raise Exception, 'Case n_bit={0} not implemented yet!'.format(n_bit)
+    dtype = RAW_DTYPES[n_bit]
+    info = np.iinfo(dtype)
+    nb_expected = nx*ny*nz
+    nb_values = 0
+    tmp_filename = output_filename + '.tmp'
+    try:
+        with open(tmp_filename, 'wb') as f_out:
+            f_out.write(struct.pack(RAW_HEADER_FORMAT, n_bit, nz, ny, nx))
+            for values in iterDatChunks(input_filename, chunk_size):
+                nb_values += values.size
+                if nb_values > nb_expected:
+                    break
+                if values.min() < info.min or values.max() > info.max:
+                    raise Exception, 'Values of "{0}" do not fit in {1} (use a larger --n-bit)'\
+                        .format(input_filename, dtype)
+                f_out.write(values.astype(dtype).tostring())
+        if nb_values != nb_expected:
+            raise Exception, 'File "{0}" has {1} values than {2}x{3}x{4} voxels'.format(
+                input_filename, 'more' if nb_values > nb_expected else 'less', nx, ny, nz)
+    except:
+        os.remove(tmp_filename)
+        raise
+    os.rename(tmp_filename, output_filename)
+
+def convertDatToPng(input_filename, nx, ny, nz, output_base_dir='output_files', n_bit=0,
+                    nb_processes=None):
+    ''' Convert ascii voxel file to packed raw file and stack of png images
+        @param[in] input_filename - string, name of .dat input file
+        @param[in] nx, ny, nz - ints, dimensions of the volume
+        @param[in] output_base_dir - string, directory of the raw file and of
+          the subdirectory with all png files
+        @param[in] nb_processes - int, number of worker processes (default: all
+          cores, 1 to run serially)
+        @return name of raw file
+    '''
+    if not os.path.isfile(input_filename):
+        raise Exception, 'Input file "{0}" not found!'.format(input_filename)
+    if not os.path.isdir(output_base_dir):
+        os.makedirs(output_base_dir)
+    base = os.path.splitext(os.path.basename(input_filename))[0]
+    raw_filename = os.path.join(output_base_dir, base + '.raw')
+    up_to_date = (os.path.isfile(raw_filename) and
+                  os.path.getmtime(raw_filename) >= os.path.getmtime(input_filename))
+    if up_to_date:
+        (raw_n_bit, volume) = openRawVolume(raw_filename)
+        up_to_date = (raw_n_bit == n_bit and volume.shape == (nz, ny, nx))
+        del volume
+    if not up_to_date:
+        convertDatToRaw(input_filename, raw_filename, nx, ny, nz, n_bit)
+    convertRawToPng(raw_filename, output_base_dir, nb_processes=nb_processes)
+    return raw_filename
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert ascii voxel file to png images')
+    parser.add_argument('input_filename', help='.dat file')
+    parser.add_argument('nx', type=int)
+    parser.add_argument('ny', type=int)
+    parser.add_argument('nz', type=int)
+    parser.add_argument('output_base_dir', nargs='?', default='output_files')
+    parser.add_argument('--n-bit', type=int, default=0,
+                        help='voxel size in raw file: 0 for 1 byte (default), 1 for 2 bytes, 2 for 4 bytes')
+    parser.add_argument('--serial', action='store_true', help='do not use multiple processes')
+    args = parser.parse_args()
+    raw_filename = convertDatToPng(args.input_filename, args.nx, args.ny, args.nz,
+                                   args.output_base_dir, args.n_bit,
+                                   nb_processes=1 if args.serial else None)
+    print 'Finished, packed volume in "{0}"'.format(raw_filename)
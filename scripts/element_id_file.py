@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+
+''' script to read/write the element ID files of the ElementFileSubdomain
+    mesh modifier, and to convert them between text and binary formats.
+    Requirements: numpy
+
+    Text format: element IDs separated by whitespace.
+    Binary format: 20-byte little-endian header (magic, id_size, nb_ids)
+    packed as "<8sIQ" with magic "RBELMIDS" and id_size 4 or 8 (bytes per ID),
+    followed by the nb_ids IDs. The binary file is read without parsing
+    (memory-mapped here, one block read in ElementFileSubdomain).
+
+    Usage: python element_id_file.py <input file> <output file> [--text]
+      converts any ID file into a binary file (or text file with --text),
+      with sorted unique IDs.
+'''
+
+import os, sys, struct
+import numpy as np
+
+ID_FILE_MAGIC = 'RBELMIDS'
+ID_FILE_HEADER_FORMAT = '<8sIQ'
+ID_FILE_HEADER_SIZE = struct.calcsize(ID_FILE_HEADER_FORMAT) # 20 bytes
+ID_DTYPES = {4:np.dtype('<u4'), 8:np.dtype('<u8')} # key=id_size
+TEXT_CHUNK_SIZE = 16*1024*1024 # bytes read at once in text files
+
+def isBinaryElementIdFile(filename):
+  ''' Return True if file starts with the magic string of binary ID files '''
+  with open(filename, 'rb') as f:
+    return f.read(len(ID_FILE_MAGIC)) == ID_FILE_MAGIC
+
+def writeBinaryElementIdFile(output_filename, element_ids, unique=True):
+  ''' Write element IDs to binary file
+      @param[in] output_filename - string, name of binary output file
+      @param[in] element_ids - iterable of non-negative ints
+      @param[in] unique - bool, sort IDs and remove duplicates before writing
+  '''
+  ids = np.asarray(element_ids, dtype=np.int64).ravel()
+  if ids.size and ids.min() < 0:
+    raise Exception, 'Element IDs must be non-negative'
+  if unique:
+    ids = np.unique(ids)
+  id_size = 4 if (not ids.size or ids.max() < 2**32) else 8
+  with open(output_filename, 'wb') as f:
+    f.write(struct.pack(ID_FILE_HEADER_FORMAT, ID_FILE_MAGIC, id_size, ids.size))
+    ids.astype(ID_DTYPES[id_size]).tofile(f)
+
+def openBinaryElementIdFile(input_filename):
+  ''' Memory-map the IDs of a binary ID file, without reading them
+      @param[in] input_filename - string, name of binary input file
+      @return read-only 1D numpy view on the IDs
+  '''
+  with open(input_filename, 'rb') as f:
+    header = f.read(ID_FILE_HEADER_SIZE)
+  if len(header) != ID_FILE_HEADER_SIZE:
+    raise Exception, 'File "{0}" is too short to be a binary ID file!'.format(input_filename)
+  (magic, id_size, nb_ids) = struct.unpack(ID_FILE_HEADER_FORMAT, header)
+  if magic != ID_FILE_MAGIC or id_size not in ID_DTYPES:
+    raise Exception, 'File "{0}" is not a binary ID file!'.format(input_filename)
+  expected_size = ID_FILE_HEADER_SIZE + nb_ids*id_size
+  actual_size = os.path.getsize(input_filename)
+  if actual_size < expected_size:
+    raise Exception, 'File "{0}" has {1} bytes but header announces {2}'\
+      .format(input_filename, actual_size, expected_size)
+  if nb_ids == 0:
+    return np.zeros(0, dtype=ID_DTYPES[id_size]) # cannot memory-map 0 bytes
+  return np.memmap(input_filename, dtype=ID_DTYPES[id_size], mode='r',
+                   offset=ID_FILE_HEADER_SIZE, shape=(nb_ids,))
+
+def iterTextElementIds(input_filename, chunk_size=TEXT_CHUNK_SIZE):
+  ''' Generator of numpy arrays of the IDs of a text ID file, chunk by chunk '''
+  rest = ''
+  with open(input_filename, 'rb') as f:
+    while True:
+      block = f.read(chunk_size)
+      tokens = (rest + block).split()
+      # the last ID may continue in the next chunk
+      rest = tokens.pop() if block and tokens and not block[-1:].isspace() else ''
+      if tokens:
+        yield np.array(tokens, dtype=np.int64)
+      if not block:
+        break
+
+def readElementIds(input_filename):
+  ''' Return 1D numpy array of the IDs of a text or binary ID file '''
+  if isBinaryElementIdFile(input_filename):
+    return openBinaryElementIdFile(input_filename)
+  chunks = list(iterTextElementIds(input_filename))
+  return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+
+def writeTextElementIdFile(output_filename, element_ids, chunk_size=1024*1024):
+  ''' Write element IDs separated by spaces (no newline at the end) '''
+  with open(output_filename, 'wb') as f:
+    for start in range(0, len(element_ids), chunk_size):
+      if start:
+        f.write(' ')
+      f.write(' '.join(map(str, element_ids[start:start + chunk_size])))
+
+def convertElementIdFile(input_filename, output_filename, to_text=False):
+  ''' Convert ID file (text or binary) to binary (or text) file with sorted unique IDs
+      @return number of IDs written
+  '''
+  if isBinaryElementIdFile(input_filename):
+    ids = np.unique(openBinaryElementIdFile(input_filename))
+  else:
+    # only the unique IDs are kept in memory
+    ids = np.zeros(0, dtype=np.int64)
+    for chunk in iterTextElementIds(input_filename):
+      ids = np.union1d(ids, chunk)
+  if to_text:
+    writeTextElementIdFile(output_filename, ids)
+  else:
+    writeBinaryElementIdFile(output_filename, ids, unique=False)
+  return len(ids)
+
+if __name__ == '__main__':
+  args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+  if len(args) != 2:
+    print 'Usage: python element_id_file.py <input file> <output file> [--text]'
+    sys.exit(1)
+  nb_ids = convertElementIdFile(args[0], args[1], to_text='--text' in sys.argv)
+  print 'Wrote {0} element IDs to "{1}"'.format(nb_ids, args[1])
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+
+''' NumPy reference implementation of the closest-point projection on the
+    (modified Cam-Clay) ellipses of src/utils/Ellipse.C, vectorized over
+    arrays of points.
+    Requirements: numpy
+
+    The projection of (y0, y1) on the ellipse (x0/e0)^2 + (x1/e1)^2 = 1 is
+    x_i = e_i^2 y_i / (t + e_i^2), where t is the root of
+    F(t) = (e0 y0 / (t + e0^2))^2 + (e1 y1 / (t + e1^2))^2 - 1. As in
+    Ellipse::sqrDistanceSpecial, the root is found by bisection (reference)
+    or by Newton iterations safeguarded by the bisection bracket, starting
+    from a given guess (warm start).
+
+    Usage: python ellipse_projection.py [--nb-points N] [--m M] [--seed S]
+      benchmarks the accuracy and speed of the Newton iterations (from scratch
+      and warm-started from slightly moved points, as in return map
+      iterations) against the bisection, on random points.
+'''
+
+import sys, time, argparse
+import numpy as np
+
+EPS = np.finfo(float).eps
+MAX_ITERATIONS = 2*np.finfo(float).maxexp
+
+def findRootBisection(esqr0, esqr1, ey0, ey1, t0, t1):
+  ''' Bisection of F on [t0, t1] (all points at once)
+      @return (t, number of iterations of each point)
+  '''
+  t0 = t0.copy()
+  t1 = t1.copy()
+  t = t0.copy()
+  nb_iterations = np.zeros(t.shape, dtype=int)
+  active = np.ones(t.shape, dtype=bool)
+  for i in range(MAX_ITERATIONS):
+    if not active.any():
+      break
+    t_mid = 0.5*(t0[active] + t1[active])
+    collapsed = (t_mid == t0[active]) | (t_mid == t1[active])
+    t[active] = np.where(collapsed, t[active], t_mid)
+    f = (ey0[active]/(t_mid + esqr0[active]))**2 + (ey1[active]/(t_mid + esqr1[active]))**2 - 1
+    indices = np.flatnonzero(active)
+    t0[indices[(f > 0) & ~collapsed]] = t_mid[(f > 0) & ~collapsed]
+    t1[indices[(f < 0) & ~collapsed]] = t_mid[(f < 0) & ~collapsed]
+    nb_iterations[indices[~collapsed]] += 1
+    active[indices[collapsed | (f == 0)]] = False
+  return (t, nb_iterations)
+
+def findRootNewton(esqr0, esqr1, ey0, ey1, t0, t1, t_guess):
+  ''' Newton iterations on F from t_guess (or t0 if outside of ]t0, t1[),
+      bisection steps when leaving the bracket (all points at once)
+      @return (t, number of iterations of each point)
+  '''
+  t0 = t0.copy()
+  t1 = t1.copy()
+  t = np.where((t_guess > t0) & (t_guess < t1), t_guess, t0)
+  nb_iterations = np.zeros(t.shape, dtype=int)
+  active = np.ones(t.shape, dtype=bool)
+  for i in range(MAX_ITERATIONS):
+    if not active.any():
+      break
+    indices = np.flatnonzero(active)
+    ta = t[indices]
+    r0 = ey0[indices]/(ta + esqr0[indices])
+    r1 = ey1[indices]/(ta + esqr1[indices])
+    f = r0*r0 + r1*r1 - 1
+    t0[indices[f > 0]] = ta[f > 0]
+    t1[indices[f < 0]] = ta[f < 0]
+    df = -2*(r0*r0/(ta + esqr0[indices]) + r1*r1/(ta + esqr1[indices]))
+    with np.errstate(divide='ignore', invalid='ignore'):
+      t_new = ta - f/df
+    outside = ~((t_new > t0[indices]) & (t_new < t1[indices]))
+    t_new[outside] = 0.5*(t0[indices[outside]] + t1[indices[outside]])
+    t_new[f == 0] = ta[f == 0]
+    converged = (f == 0) | (np.abs(t_new - ta) <= EPS*(np.abs(t_new) + esqr1[indices]))
+    t[indices] = t_new
+    nb_iterations[indices[f != 0]] += 1
+    active[indices[converged]] = False
+  return (t, nb_iterations)
+
+def sqrDistanceSpecial(e0, e1, y0, y1, t=None):
+  ''' Same as Ellipse::sqrDistanceSpecial for arrays of points
+      (e0 >= e1, y0 >= 0, y1 >= 0)
+      @param[in] t - array of initial guesses (Newton iterations), None for
+        the bisection
+      @return (sqr_distance, x0, x1, t, nb_iterations), t is NaN for points
+        on the axes (no root to find)
+  '''
+  (e0, e1, y0, y1) = [np.asarray(a, dtype=float) for a in np.broadcast_arrays(e0, e1, y0, y1)]
+  x0 = np.empty(y0.shape)
+  x1 = np.empty(y0.shape)
+  t_root = np.full(y0.shape, np.nan)
+  nb_iterations = np.zeros(y0.shape, dtype=int)
+
+  generic = (y0 > 0) & (y1 > 0)
+  if generic.any():
+    esqr0 = e0[generic]**2
+    esqr1 = e1[generic]**2
+    ey0 = e0[generic]*y0[generic]
+    ey1 = e1[generic]*y1[generic]
+    t0 = -esqr1 + ey1
+    t1 = -esqr1 + np.sqrt(ey0*ey0 + ey1*ey1)
+    if t is None:
+      (t_generic, nb_generic) = findRootBisection(esqr0, esqr1, ey0, ey1, t0, t1)
+    else:
+      t_guess = np.broadcast_to(np.asarray(t, dtype=float), y0.shape)[generic]
+      (t_generic, nb_generic) = findRootNewton(esqr0, esqr1, ey0, ey1, t0, t1, t_guess)
+    x0[generic] = esqr0*y0[generic]/(t_generic + esqr0)
+    x1[generic] = esqr1*y1[generic]/(t_generic + esqr1)
+    t_root[generic] = t_generic
+    nb_iterations[generic] = nb_generic
+
+  # y0 == 0
+  on_axis1 = (y1 > 0) & ~generic
+  x0[on_axis1] = 0
+  x1[on_axis1] = e1[on_axis1]
+
+  # y1 == 0
+  on_axis0 = ~(y1 > 0)
+  denom0 = e0*e0 - e1*e1
+  e0y0 = e0*y0
+  inside = on_axis0 & (e0y0 < denom0)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    x0de0 = np.where(inside, e0y0/denom0, 1)
+  x0[inside] = (e0*x0de0)[inside]
+  x1[inside] = (e1*np.sqrt(np.abs(1 - x0de0*x0de0)))[inside]
+  outside = on_axis0 & ~inside
+  x0[outside] = e0[outside]
+  x1[outside] = 0
+
+  sqr_distance = (x0 - y0)**2 + (x1 - y1)**2
+  return (sqr_distance, x0, x1, t_root, nb_iterations)
+
+def sqrDistance(e0, e1, y0, y1, t=None):
+  ''' Same as Ellipse::sqrDistance (any quadrant, any axis order) for arrays
+      of points
+      @return (sqr_distance, x0, x1, t, nb_iterations)
+  '''
+  (e0, e1, y0, y1) = [np.asarray(a, dtype=float) for a in np.broadcast_arrays(e0, e1, y0, y1)]
+  # reflect to the first quadrant and swap axes where e0 < e1
+  swap = e0 < e1
+  loc_e0 = np.where(swap, e1, e0)
+  loc_e1 = np.where(swap, e0, e1)
+  loc_y0 = np.abs(np.where(swap, y1, y0))
+  loc_y1 = np.abs(np.where(swap, y0, y1))
+  (sqr_distance, loc_x0, loc_x1, t, nb_iterations) = sqrDistanceSpecial(loc_e0, loc_e1, loc_y0, loc_y1, t)
+  x0 = np.where(swap, loc_x1, loc_x0)
+  x1 = np.where(swap, loc_x0, loc_x1)
+  x0 = np.where(y0 < 0, -x0, x0)
+  x1 = np.where(y1 < 0, -x1, x1)
+  return (sqr_distance, x0, x1, t, nb_iterations)
+
+def distanceCC(m, p_c, y0, y1, t=None):
+  ''' Same as Ellipse::distanceCC for arrays of points
+      @return (distance, x0, x1, t, nb_iterations)
+  '''
+  e0 = np.abs(np.asarray(p_c, dtype=float))/2.
+  e1 = m*e0
+  (sqr_distance, x0, x1, t, nb_iterations) = sqrDistance(e0, e1, np.asarray(y0) - np.asarray(p_c)/2., y1, t)
+  return (np.sqrt(sqr_distance), x0 + np.asarray(p_c)/2., x1, t, nb_iterations)
+
+def isPointOutsideOfEllipse(m, p_c, y0, y1):
+  ''' Same as Ellipse::isPointOutsideOfEllipse for arrays of points '''
+  p_c = np.asarray(p_c, dtype=float)
+  if m < 1:
+    f = 0.5*np.sqrt((1 - m*m)*p_c*p_c)
+    return (np.sqrt((y0 - 0.5*p_c + f)**2 + y1*y1) + np.sqrt((y0 - 0.5*p_c - f)**2 + y1*y1) > np.abs(p_c))
+  f = 0.5*np.sqrt((m*m - 1)*p_c*p_c)
+  return (np.sqrt((y0 - 0.5*p_c)**2 + (y1 + f)**2) + np.sqrt((y0 - 0.5*p_c)**2 + (y1 - f)**2) > m*np.abs(p_c))
+
+def distanceCCOutside(m, p_c, y0, y1, t):
+  ''' Projection as in the return map of RedbackMechMaterialCC: points inside
+      of the ellipse are not projected (x = y, distance 0), the others are
+      warm-started from t
+      @return (distance, x0, x1, t, nb_iterations, number of points outside)
+  '''
+  (p_c, y0, y1, t) = [np.array(a, dtype=float) for a in np.broadcast_arrays(p_c, y0, y1, t)]
+  outside = isPointOutsideOfEllipse(m, p_c, y0, y1)
+  distance = np.zeros(y0.shape)
+  x0 = y0.copy()
+  x1 = y1.copy()
+  nb_iterations = np.zeros(y0.shape, dtype=int)
+  (distance[outside], x0[outside], x1[outside], t_outside, nb_iterations[outside]) = \
+    distanceCC(m, p_c[outside], y0[outside], y1[outside], t[outside])
+  # keep the previous guess of points on the axes
+  t[outside] = np.where(np.isnan(t_outside), t[outside], t_outside)
+  return (distance, x0, x1, t, nb_iterations, outside.sum())
+
+def benchmark(nb_points, m, seed=0):
+  ''' Compare bisection and Newton iterations on random points around the
+      ellipse of p_c in [-2, -1] (accuracy, iterations and time)
+  '''
+  rng = np.random.RandomState(seed)
+  p_c = -1 - rng.rand(nb_points)
+  y0 = -3 + 4*rng.rand(nb_points)
+  y1 = 2*m*(rng.rand(nb_points) - 0.5)*2
+  results = []
+
+  start = time.time()
+  (d_ref, x0_ref, x1_ref, t_ref, it_ref) = distanceCC(m, p_c, y0, y1)
+  results.append(('bisection', time.time() - start, it_ref, 0.))
+
+  t = np.full(nb_points, -np.finfo(float).max)
+  start = time.time()
+  (d, x0, x1, t, it, nb_outside) = distanceCCOutside(m, p_c, y0, y1, t)
+  outside = isPointOutsideOfEllipse(m, p_c, y0, y1)
+  error = np.abs(np.concatenate([d - d_ref, x0 - x0_ref, x1 - x1_ref])[np.tile(outside, 3)]).max()
+  results.append(('Newton', time.time() - start, it[outside], error))
+
+  # return map iterations move the points a little
+  y0_moved = y0*(1 + 1e-3*rng.randn(nb_points))
+  (d_ref, x0_ref, x1_ref, t_ref, it_ref) = distanceCC(m, p_c, y0_moved, y1)
+  start = time.time()
+  (d, x0, x1, t, it, nb_outside) = distanceCCOutside(m, p_c, y0_moved, y1, t)
+  outside = isPointOutsideOfEllipse(m, p_c, y0_moved, y1)
+  error = np.abs(np.concatenate([d - d_ref, x0 - x0_ref, x1 - x1_ref])[np.tile(outside, 3)]).max()
+  results.append(('Newton, warm start', time.time() - start, it[outside], error))
+
+  print '{0} points, m={1}, {2} outside of the ellipse'.format(nb_points, m, nb_outside)
+  print '{0:28s} {1:>10s} {2:>10s} {3:>10s} {4:>12s}'.format('Method', 'Time (s)', 'Mean its', 'Max its', 'Max error')
+  for (name, seconds, iterations, error) in results:
+    print '{0:28s} {1:10.4f} {2:10.2f} {3:10d} {4:12.3e}'.format(
+      name, seconds, iterations.mean() if iterations.size else 0., iterations.max() if iterations.size else 0, error)
+  return results
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Benchmark of the projection on the modified Cam-Clay ellipse')
+  parser.add_argument('--nb-points', type=int, default=1000000)
+  parser.add_argument('--m', type=float, default=1.2, help='slope of the critical state line')
+  parser.add_argument('--seed', type=int, default=0)
+  args = parser.parse_args()
+  benchmark(args.nb_points, args.m, args.seed)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+
+''' script to write the element ID file of the ElementFileSubdomain mesh
+    modifier directly from an image stack, without running redback.
+    Requirements: numpy, PIL or pillow (png stacks only)
+
+    This replaces the second step of tests/image_subdomains
+    (mesh_generation_step2.i): the images are thresholded like ImageFunction
+    (value 1 at or above the threshold, 0 below), sampled at the quadrature
+    points of all elements of the (adapted) Exodus mesh, and the elements
+    where the thresholded image takes the requested value at one quadrature
+    point are listed, as ElementIdFileWriter does.
+    Elements are processed by chunks and raw files are memory-mapped, so that
+    only the voxels under the quadrature points are read.
+
+    The image occupies the bounding box of the mesh (unless origin and
+    dimensions are given), slices are stacked along z and the first row of
+    each slice is at the top (largest y), as read by ImageFunction.
+    Element IDs are the positions of the elements in the Exodus file
+    (numbering of the mesh read by redback).
+
+    Usage: python image_subdomain.py <mesh.e> <file base of png slices or raw file> [options]
+      e.g. (in tests/image_subdomains)
+      python ../../scripts/image_subdomain.py gold/1block_mesh.e stack/test_0 --threshold 90 --block 0
+'''
+
+import os, re, sys, glob, time, shutil, tempfile, argparse
+import numpy as np
+from element_id_file import writeBinaryElementIdFile, writeTextElementIdFile
+from raw_to_png import openRawVolume, writeRawFile
+
+# the Exodus reader is shared with the documentation scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'doc', 'theory', 'data',
+                             'create_figures'))
+from exodus import ExodusFile
+
+ELEMENT_CHUNK_SIZE = 100000 # elements mapped to physical space at once
+# corners of the reference elements in the node order of libMesh/Exodus
+REFERENCE_CORNERS = {2:np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]], dtype=np.float64),
+                     3:np.array([[-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1],
+                                 [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1]], dtype=np.float64)}
+
+def readImageStack(file_base, file_suffix='png', file_range=None, component=None):
+  ''' Read the slices file_base<number>.<file_suffix> into one volume
+      @param[in] file_base - string, beginning of the slice filenames
+      @param[in] file_suffix - string, extension of the slice filenames
+      @param[in] file_range - (first, last) numbers of the slices to read (default: all)
+      @param[in] component - int, RGB component to read (default: grey value)
+      @return numpy array (nz, ny, nx) of uint8, slices sorted by number
+  '''
+  from PIL import Image
+  pattern = re.compile(re.escape(file_base) + r'(\d+)\.' + re.escape(file_suffix) + '$')
+  slices = []
+  for filename in glob.glob(file_base + '*.' + file_suffix):
+    match = pattern.match(filename)
+    if not match:
+      continue
+    number = int(match.group(1))
+    if file_range is None or file_range[0] <= number <= file_range[1]:
+      slices.append((number, filename))
+  if not slices:
+    raise Exception, 'No image "{0}*.{1}" found!'.format(file_base, file_suffix)
+  slices.sort()
+  volume = None
+  for (k, (number, filename)) in enumerate(slices):
+    image = Image.open(filename)
+    if component is None:
+      data = np.asarray(image.convert('L'))
+    else:
+      data = np.asarray(image.convert('RGB'))[:, :, component]
+    if volume is None:
+      volume = np.empty((len(slices),) + data.shape, dtype=np.uint8)
+    elif data.shape != volume.shape[1:]:
+      raise Exception, 'Image "{0}" is {1}x{2}, expected {3}x{4}'\
+        .format(filename, data.shape[1], data.shape[0], volume.shape[2], volume.shape[1])
+    volume[k] = data
+  return volume
+
+def openImageVolume(image, file_suffix='png', file_range=None, component=None):
+  ''' Volume (nz, ny, nx) of a raw file (memory-mapped) or of a stack of slices,
+      with the row index increasing with y
+  '''
+  if os.path.splitext(image)[1].lower() == '.raw':
+    volume = openRawVolume(image)[1]
+  else:
+    volume = readImageStack(image, file_suffix, file_range, component)
+  # first row of a slice is at the top of the image
+  return volume[:, ::-1, :]
+
+def quadraturePoints(dim, order=2):
+  ''' Tensor-product Gauss points of the reference square/cube
+      @param[in] order - int, number of points per direction (1 to 3)
+      @return numpy array (nb_points, dim), x varying fastest
+  '''
+  if order == 1:
+    points_1d = [0.]
+  elif order == 2:
+    points_1d = [-np.sqrt(1./3.), np.sqrt(1./3.)]
+  elif order == 3:
+    points_1d = [-np.sqrt(0.6), 0., np.sqrt(0.6)]
+  else:
+    raise Exception, 'Quadrature with {0} points per direction not implemented!'.format(order)
+  grids = np.meshgrid(*([points_1d]*dim), indexing='ij')
+  return np.column_stack([grid.ravel() for grid in reversed(grids)])
+
+def mapToElements(coordinates, connectivity, reference_points):
+  ''' Physical location of reference points in each element (bilinear/trilinear map)
+      @param[in] coordinates - array (nb_nodes, dim) of node coordinates
+      @param[in] connectivity - array (nb_elements, nb_nodes_per_element) of 0-based nodes,
+        the corners first (QUAD4/HEX8 and higher order elements with straight edges)
+      @param[in] reference_points - array (nb_points, dim)
+      @return array (nb_elements, nb_points, dim)
+  '''
+  dim = reference_points.shape[1]
+  corners = REFERENCE_CORNERS[dim]
+  # shape functions of the corners at the reference points (nb_points, nb_corners)
+  shape = np.prod(1. + reference_points[:, None, :]*corners[None, :, :], axis=2)/len(corners)
+  corner_coordinates = coordinates[connectivity[:, :len(corners)]]
+  return np.einsum('pc,ecd->epd', shape, corner_coordinates)
+
+def sampleVolume(volume, points, origin, dimensions):
+  ''' Voxel values at points
+      @param[in] volume - array (nz, ny, nx) (or (1, ny, nx) for 2D meshes)
+      @param[in] points - array (..., dim)
+      @param[in] origin, dimensions - arrays (dim), physical extent of the image
+      @return (values, inside) arrays (...), inside is False for points outside of the image
+  '''
+  dim = points.shape[-1]
+  shape = volume.shape[::-1][:dim] # (nx, ny[, nz])
+  indices = []
+  inside = np.ones(points.shape[:-1], dtype=bool)
+  for d in range(dim):
+    position = (points[..., d] - origin[d])/dimensions[d]
+    inside &= (position >= -1e-12) & (position <= 1. + 1e-12)
+    # points on the upper face belong to the last voxel
+    indices.append(np.clip(np.floor(position*shape[d]).astype(np.int64), 0, shape[d] - 1))
+  if dim == 2:
+    indices.append(np.zeros_like(indices[0]))
+  values = volume[indices[2], indices[1], indices[0]]
+  return (values, inside)
+
+def findSubdomainElements(coordinates, connectivity, volume, threshold, value=0, origin=None, dimensions=None,
+                          quadrature_order=2, chunk_size=ELEMENT_CHUNK_SIZE):
+  ''' Elements where the thresholded image takes a value at one quadrature point
+      @param[in] coordinates, connectivity - mesh arrays (see mapToElements)
+      @param[in] volume - array (nz, ny, nx), row index increasing with y
+      @param[in] threshold - voxels at or above threshold have value 1, others 0
+      @param[in] value - 0 or 1, value selecting the elements
+      @param[in] origin, dimensions - physical extent of the image (default: mesh bounding box)
+      @param[in] quadrature_order - int, number of quadrature points per direction
+      @param[in] chunk_size - int, number of elements processed at once
+      @return sorted array of the positions (in connectivity) of the selected elements
+  '''
+  dim = coordinates.shape[1]
+  if dim not in REFERENCE_CORNERS or connectivity.shape[1] < len(REFERENCE_CORNERS[dim]):
+    raise Exception, 'Mesh of dimension {0} with {1}-node elements not supported'\
+      .format(dim, connectivity.shape[1])
+  if dim == 2 and volume.shape[0] != 1:
+    raise Exception, 'A 2D mesh needs a single image, got {0} slices'.format(volume.shape[0])
+  origin = coordinates.min(axis=0) if origin is None else np.asarray(origin, dtype=np.float64)
+  if dimensions is None:
+    dimensions = coordinates.max(axis=0) - origin
+  reference_points = quadraturePoints(dim, quadrature_order)
+  selected = []
+  for start in range(0, len(connectivity), chunk_size):
+    points = mapToElements(coordinates, connectivity[start:start + chunk_size], reference_points)
+    (values, inside) = sampleVolume(volume, points, origin, dimensions)
+    match = ((values >= threshold) == bool(value)) & inside
+    selected.append(start + np.nonzero(match.any(axis=1))[0])
+  return np.concatenate(selected) if selected else np.zeros(0, dtype=np.int64)
+
+def writeImageSubdomainFile(mesh_filename, image, output_filename, threshold, value=0, block=None,
+                            file_suffix='png', file_range=None, component=None, origin=None, dimensions=None,
+                            quadrature_order=2, binary=False):
+  ''' Write the ID file of the elements of an Exodus mesh selected by an image
+      @param[in] mesh_filename - string, Exodus mesh
+      @param[in] image - string, raw file or file base of the png slices
+      @param[in] block - block ID or name of the elements to test (default: all blocks)
+      @param[in] binary - bool, write the binary ID file format instead of text
+      Other parameters: see readImageStack and findSubdomainElements
+      @return number of element IDs written
+  '''
+  exodus = ExodusFile(mesh_filename)
+  try:
+    coordinates = exodus.coordinates()
+    block_ids = exodus.blockIds()
+    volume = openImageVolume(image, file_suffix, file_range, component)
+    ids = []
+    first_id = 0 # elements are numbered block after block
+    for block_id in block_ids:
+      connectivity = exodus.connectivity(block_id)
+      if block is None or block in (block_id, exodus.blockNames()[block_ids.index(block_id)]):
+        positions = findSubdomainElements(coordinates, connectivity, volume, threshold, value, origin, dimensions,
+                                          quadrature_order)
+        ids.append(first_id + positions)
+      first_id += len(connectivity)
+  finally:
+    exodus.close()
+  ids = np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
+  if binary:
+    writeBinaryElementIdFile(output_filename, ids)
+  else:
+    writeTextElementIdFile(output_filename, ids)
+  return len(ids)
+
+def benchmarkImageSubdomain(nb_elements=64, nb_voxels=512, chunk_size=ELEMENT_CHUNK_SIZE):
+  ''' Measure element selection on a uniform hex mesh of the unit cube (nb_elements^3)
+      and a raw volume (nb_voxels^3) of a sphere
+      @return (elapsed time in s, number of selected elements)
+  '''
+  tmp_dir = tempfile.mkdtemp(prefix='image_subdomain_')
+  try:
+    z, y, x = np.ogrid[0:nb_voxels, 0:nb_voxels, 0:nb_voxels]
+    inside = ((x - nb_voxels/2.)**2 + (y - nb_voxels/2.)**2 + (z - nb_voxels/2.)**2) < (nb_voxels/3.)**2
+    input_filename = os.path.join(tmp_dir, 'sphere.raw')
+    writeRawFile(input_filename, (inside*100).astype(np.int8))
+    del inside
+    grid = np.linspace(0., 1., nb_elements + 1)
+    nodes = np.arange((nb_elements + 1)**3).reshape((nb_elements + 1,)*3) # (z, y, x)
+    zz, yy, xx = np.meshgrid(grid, grid, grid, indexing='ij')
+    coordinates = np.column_stack([xx.ravel(), yy.ravel(), zz.ravel()])
+    n = nodes[:-1, :-1, :-1].ravel()
+    dx, dy, dz = 1, nb_elements + 1, (nb_elements + 1)**2
+    connectivity = np.column_stack([n, n + dx, n + dx + dy, n + dy,
+                                    n + dz, n + dx + dz, n + dx + dy + dz, n + dy + dz])
+    start = time.time()
+    volume = openImageVolume(input_filename)
+    ids = findSubdomainElements(coordinates, connectivity, volume, 50, value=1, chunk_size=chunk_size)
+    elapsed = time.time() - start
+    del volume
+  finally:
+    shutil.rmtree(tmp_dir)
+  print 'Selected {0} of {1} elements in a {2}^3 volume in {3:.3f}s'\
+    .format(len(ids), len(connectivity), nb_voxels, elapsed)
+  return (elapsed, len(ids))
+
+if __name__ == '__main__':
+  if '--benchmark' in sys.argv:
+    benchmarkImageSubdomain()
+    benchmarkImageSubdomain(nb_elements=128)
+    sys.exit(0)
+  parser = argparse.ArgumentParser(description='Write the ElementFileSubdomain ID file of the elements '
+                                   'of an Exodus mesh selected by an image stack')
+  parser.add_argument('mesh', help='Exodus mesh (e.g. adapted mesh of the first step)')
+  parser.add_argument('image', help='raw file, or file base of the slices (e.g. stack/test_0)')
+  parser.add_argument('--output', default='idfile.txt', help='ID file to write')
+  parser.add_argument('--binary', action='store_true', help='write the binary ID file format')
+  parser.add_argument('--threshold', type=float, required=True, help='threshold of ImageFunction')
+  parser.add_argument('--value', type=int, default=0, choices=[0, 1],
+                      help='select elements where the image is below (0) or above (1) the threshold')
+  parser.add_argument('--block', default=None, help='block ID or name of the elements to test')
+  parser.add_argument('--file-suffix', default='png', help='extension of the slices')
+  parser.add_argument('--file-range', type=int, nargs=2, default=None, help='first and last slice numbers')
+  parser.add_argument('--component', type=int, default=None, help='RGB component (default: grey value)')
+  parser.add_argument('--origin', type=float, nargs='+', default=None, help='origin of the image')
+  parser.add_argument('--dimensions', type=float, nargs='+', default=None, help='physical size of the image')
+  parser.add_argument('--quadrature-order', type=int, default=2, help='quadrature points per direction')
+  args = parser.parse_args()
+  block = int(args.block) if args.block is not None and args.block.isdigit() else args.block
+  nb_ids = writeImageSubdomainFile(args.mesh, args.image, args.output, args.threshold, args.value, block,
+                                   args.file_suffix, args.file_range, args.component, args.origin, args.dimensions,
+                                   args.quadrature_order, args.binary)
+  print 'Wrote {0} element IDs to "{1}"'.format(nb_ids, args.output)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+
+''' script to measure the memory used per quadrature point by the
+    mechanical materials (RedbackMechMaterial J2/DP/CC/... flow laws), with
+    and without their compact_storage option.
+    Requirements: numpy
+
+    Each input is run for a few time steps on a series of uniformly refined
+    meshes (Mesh/uniform_refine), once with the default storage and once
+    with compact_storage. The peak resident memory of each run is fitted
+    linearly against the number of quadrature points, so that the slope
+    gives the bytes per quadrature point without the fixed cost of the
+    application. The number of quadrature points is read from the Exodus
+    output (elements x 2^dim Gauss points, first order variables).
+    The expected size of the stateful material properties (current and old
+    states, without container overhead) is reported next to the measure.
+
+    Results are printed and written to a csv file (one line per input).
+
+    Usage: python material_memory.py [input.i ...] [--executable redback-opt]
+             [--refinements 2 3 4 5] [--num-steps 2] [--output material_memory.csv]
+      without inputs, the inputs of benchmark_3_M and benchmark_10_TMC are used
+'''
+
+import os, re, sys, argparse, subprocess
+import numpy as np
+from parameter_sweep import DEFAULT_EXECUTABLE, REDBACK_DIR, buildCommand
+
+# the Exodus reader is shared with the documentation scripts
+sys.path.append(os.path.join(REDBACK_DIR, 'doc', 'theory', 'data', 'create_figures'))
+from exodus import ExodusFile
+
+DEFAULT_INPUTS = [os.path.join(REDBACK_DIR, 'tests', 'benchmark_3_M', name)
+                  for name in ['bench_J2.i', 'bench_DP.i', 'bench_CC.i', 'bench_CC_anisotropic1.i',
+                               'bench_elastic_1.i']] + \
+                 [os.path.join(REDBACK_DIR, 'tests', 'benchmark_10_TMC', name)
+                  for name in ['bench_TMC_J2.i', 'bench_TMC_DP.i', 'bench_TMC_CC.i']]
+DEFAULT_REFINEMENTS = [2, 3, 4, 5]
+RANK_TWO_TENSOR_SIZE = 9*8 # bytes
+REAL_SIZE = 8 # bytes
+OUTPUT_COLUMNS = ['input', 'flow_law', 'damage', 'max_qps', 'bytes_per_qp', 'bytes_per_qp_compact',
+                  'stateful_bytes_per_qp', 'stateful_bytes_per_qp_compact']
+
+def findMechMaterial(input_filename):
+  ''' Find the RedbackMechMaterial block of an input file
+      @return (block path, material type, dictionary of parameters)
+  '''
+  path = []
+  blocks = [] # (path, parameters) in the order of the file
+  parameters = {} # key=path
+  with open(input_filename, 'r') as f:
+    for line in f:
+      line = line.split('#', 1)[0].strip()
+      match = re.match(r'\[(?:\./)?([^\]]*)\]$', line)
+      if match:
+        if match.group(1) in ('', '../'):
+          path = path[:-1]
+        else:
+          path.append(match.group(1))
+          parameters['/'.join(path)] = {}
+          blocks.append(('/'.join(path), parameters['/'.join(path)]))
+        continue
+      match = re.match(r'(\w+)\s*=\s*(.*)$', line)
+      if match and path:
+        parameters['/'.join(path)][match.group(1)] = match.group(2).strip('\'"')
+  for (block_path, params) in blocks:
+    if block_path.startswith('Materials/') and params.get('type', '').startswith('RedbackMechMaterial'):
+      return (block_path, params['type'], params)
+  raise Exception, 'No RedbackMechMaterial found in "{0}"'.format(input_filename)
+
+def statefulBytesPerQp(compact, damage):
+  ''' Size of the stateful properties of RedbackMechMaterial per quadrature point
+      (current and old states: stress, plastic strain, elastic strain, total
+      strain and equivalent plastic strain; see compact_storage)
+  '''
+  nb_tensors = 2 if compact else 4
+  nb_reals = 0 if compact else 1
+  if compact and damage:
+    nb_tensors += 1 # old elastic strain is kept with damage
+  return 2*(nb_tensors*RANK_TWO_TENSOR_SIZE + nb_reals*REAL_SIZE)
+
+def runPeakMemory(command, cwd, log_filename):
+  ''' Run command, writing its output in log_filename
+      @return (returncode, peak resident memory in bytes)
+  '''
+  with open(log_filename, 'w') as log:
+    log.write(' '.join(command) + '\n')
+    log.flush()
+    process = subprocess.Popen(command, cwd=cwd, stdout=log, stderr=subprocess.STDOUT)
+    # rusage of this child only (RUSAGE_CHILDREN would give the max over all runs)
+    (pid, status, rusage) = os.wait4(process.pid, 0)
+    process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -1
+  return (process.returncode, rusage.ru_maxrss*1024) # ru_maxrss is in kB on Linux
+
+def countQuadraturePoints(exodus_filename):
+  ''' Number of quadrature points of the mesh of an Exodus file (2^dim per element) '''
+  exodus = ExodusFile(exodus_filename)
+  try:
+    return exodus.dimensions['num_elem']*2**exodus.dimensions['num_dim']
+  finally:
+    exodus.close()
+
+def measureBytesPerQp(input_filename, work_dir, executable=DEFAULT_EXECUTABLE, refinements=DEFAULT_REFINEMENTS,
+                      num_steps=2, compact=False):
+  ''' Fit peak memory against number of quadrature points over refined meshes
+      @return (bytes per quadrature point, list of (nb_qps, peak memory))
+  '''
+  (material_path, material_type, params) = findMechMaterial(input_filename)
+  input_filename = os.path.realpath(input_filename)
+  name = os.path.splitext(os.path.basename(input_filename))[0] + ('_compact' if compact else '')
+  samples = []
+  for refinement in refinements:
+    file_base = os.path.join(work_dir, '{0}_refine{1}'.format(name, refinement))
+    overrides = [('Mesh/uniform_refine', refinement),
+                 ('{0}/compact_storage'.format(material_path), 'true' if compact else 'false'),
+                 ('Executioner/num_steps', num_steps),
+                 ('Outputs/exodus', 'true')]
+    command = buildCommand(executable, input_filename, overrides, file_base)
+    (returncode, peak_memory) = runPeakMemory(command, os.path.dirname(input_filename), file_base + '.log')
+    if returncode != 0:
+      raise Exception, 'Run failed, see "{0}.log"'.format(file_base)
+    samples.append((countQuadraturePoints(file_base + '.e'), peak_memory))
+  samples.sort()
+  if len(samples) < 2:
+    raise Exception, 'At least two refinement levels are needed to fit the memory per quadrature point'
+  nb_qps = np.array([sample[0] for sample in samples], dtype=np.float64)
+  memory = np.array([sample[1] for sample in samples], dtype=np.float64)
+  return (np.polyfit(nb_qps, memory, 1)[0], samples)
+
+def runMemoryBenchmark(inputs, executable=DEFAULT_EXECUTABLE, refinements=DEFAULT_REFINEMENTS, num_steps=2,
+                       output_filename='material_memory.csv', work_dir='material_memory'):
+  ''' Measure the memory per quadrature point of all inputs, with and without compact storage
+      @return list of result dictionaries (keys: OUTPUT_COLUMNS)
+  '''
+  if not os.path.isdir(work_dir):
+    os.makedirs(work_dir)
+  work_dir = os.path.realpath(work_dir)
+  results = []
+  for input_filename in inputs:
+    (material_path, material_type, params) = findMechMaterial(input_filename)
+    damage = 'damage' in params
+    (bytes_per_qp, samples) = measureBytesPerQp(input_filename, work_dir, executable, refinements, num_steps)
+    (bytes_per_qp_compact, samples) = measureBytesPerQp(input_filename, work_dir, executable, refinements,
+                                                        num_steps, compact=True)
+    result = {'input':os.path.relpath(input_filename, REDBACK_DIR),
+              'flow_law':material_type[len('RedbackMechMaterial'):] or 'base',
+              'damage':int(damage),
+              'max_qps':samples[-1][0],
+              'bytes_per_qp':bytes_per_qp,
+              'bytes_per_qp_compact':bytes_per_qp_compact,
+              'stateful_bytes_per_qp':statefulBytesPerQp(False, damage),
+              'stateful_bytes_per_qp_compact':statefulBytesPerQp(True, damage)}
+    results.append(result)
+    print '{0}: {1} flow law, {2:.0f} bytes/qp, {3:.0f} bytes/qp with compact storage ' \
+      '(stateful properties: {4} -> {5} bytes/qp)'.format(result['input'], result['flow_law'], bytes_per_qp,
+                                                          bytes_per_qp_compact, result['stateful_bytes_per_qp'],
+                                                          result['stateful_bytes_per_qp_compact'])
+  with open(output_filename, 'w') as f:
+    f.write(','.join(OUTPUT_COLUMNS) + '\n')
+    for result in results:
+      f.write(','.join(str(result[column]) for column in OUTPUT_COLUMNS) + '\n')
+  return results
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Measure memory per quadrature point of RedbackMechMaterial')
+  parser.add_argument('inputs', nargs='*', default=DEFAULT_INPUTS, help='input files (default: benchmarks)')
+  parser.add_argument('--executable', default=DEFAULT_EXECUTABLE, help='redback executable')
+  parser.add_argument('--refinements', type=int, nargs='+', default=DEFAULT_REFINEMENTS,
+                      help='uniform refinement levels of the runs')
+  parser.add_argument('--num-steps', type=int, default=2, help='number of time steps of each run')
+  parser.add_argument('--output', default='material_memory.csv', help='csv file of results')
+  parser.add_argument('--work-dir', default='material_memory', help='directory of the outputs of the runs')
+  args = parser.parse_args()
+  runMemoryBenchmark(args.inputs, args.executable, args.refinements, args.num_steps, args.output, args.work_dir)
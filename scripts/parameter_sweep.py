@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+
+''' script to run a redback input over a grid of parameter values and to
+    gather the postprocessor csv files of all runs into one results store.
+    Requirements: numpy
+
+    Each parameter is given as "Block/.../param=v1,v2,..." (or
+    "Block/.../param=start:stop:num" for num values evenly spaced), and all
+    combinations of values are run. Each variant runs in its own directory
+    <output_dir>/variant_NNNN, either with command-line overrides (default)
+    or with its own copy of the input file (--write-inputs). Runs are started
+    from the directory of the base input, so that relative mesh files keep
+    working, and as many runs as fit in the core budget (--slots) are run at
+    the same time, each with --ranks MPI ranks and --threads threads.
+    Variants that already finished successfully are not run again (unless
+    --force).
+
+    Results are written in <output_dir>:
+      sweep.json: parameter grid and status of each variant
+      results.npz: one column per parameter and per postprocessor, one row
+        per time step of each variant ("variant" column = variant index)
+      results.csv: same data as text
+
+    Usage: python parameter_sweep.py <input.i> --param Block/param=v1,v2 ...
+             [--output-dir sweep] [--executable redback-opt] [--ranks 1]
+             [--threads 1] [--slots N] [--write-inputs] [--force]
+             [--collect-only]
+      e.g. python parameter_sweep.py ../tests/benchmark_1_T/bench1_a.i
+             --param Materials/adim_rock/gr=4e-6,5e-6 --param Materials/adim_rock/ar=8,10
+'''
+
+import os, re, sys, json, time, shlex, argparse, itertools, subprocess, multiprocessing
+from multiprocessing.pool import ThreadPool
+import numpy as np
+
+REDBACK_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+DEFAULT_EXECUTABLE = os.path.join(REDBACK_DIR, 'redback-opt')
+VARIANT_FORMAT = 'variant_{0:04d}'
+FILE_BASE = 'out' # postprocessors of each variant in variant_NNNN/out.csv
+SWEEP_FILENAME = 'sweep.json'
+
+def parseParameterSpec(spec):
+  ''' Parse "Block/.../param=v1,v2,..." or "Block/.../param=start:stop:num"
+      @return (parameter path, list of values as strings)
+  '''
+  if '=' not in spec:
+    raise Exception, 'Invalid parameter "{0}", expected Block/param=v1,v2,...'.format(spec)
+  (path, values) = spec.split('=', 1)
+  path = path.strip().strip('/')
+  if '/' not in path:
+    raise Exception, 'Parameter "{0}" has no block'.format(path)
+  range_match = re.match(r'^\s*([^:,]+):([^:,]+):(\d+)\s*$', values)
+  if range_match:
+    (start, stop, num) = range_match.groups()
+    values = ['{0:.12g}'.format(value) for value in np.linspace(float(start), float(stop), int(num))]
+  else:
+    values = [value.strip() for value in values.split(',')]
+  if not values or '' in values:
+    raise Exception, 'Parameter "{0}" has empty values'.format(path)
+  return (path, values)
+
+def buildVariants(grid):
+  ''' All combinations of the parameter values
+      @param[in] grid - list of (parameter path, list of values)
+      @return list of lists of (parameter path, value), last parameter varying fastest
+  '''
+  paths = [path for (path, values) in grid]
+  return [zip(paths, combination) for combination in itertools.product(*[values for (path, values) in grid])]
+
+def _formatValue(value):
+  return "'{0}'".format(value) if (' ' in value and not value.startswith("'")) else value
+
+def setInputParameter(lines, path, value):
+  ''' Set parameter "Block/.../param" in the lines of an input file
+      (GetPot format), adding the parameter or its blocks if missing.
+      @return new list of lines
+  '''
+  names = path.split('/')
+  (block_names, param) = (names[:-1], names[-1])
+  param_re = re.compile(r"^(\s*{0}\s*=\s*)('[^']*'|\S+)(.*)$".format(re.escape(param)))
+  stack = []
+  best = (0, None) # (depth of deepest existing block of the path, index of its closing line)
+  for (i, line) in enumerate(lines):
+    stripped = line.split('#', 1)[0].strip()
+    if stripped in ('[]', '[../]'):
+      if stack == block_names[:len(stack)] and len(stack) > best[0]:
+        best = (len(stack), i)
+      stack = stack[:-1]
+    elif stripped.startswith('[') and stripped.endswith(']'):
+      stack.append(stripped[1:-1].replace('./', ''))
+    elif stack == block_names:
+      match = param_re.match(line)
+      if match:
+        return lines[:i] + [match.group(1) + _formatValue(value) + match.group(3)] + lines[i + 1:]
+  # parameter not found: insert it (and its missing blocks) at the end of the deepest existing block
+  (depth, index) = best
+  if index is None:
+    index = len(lines)
+  new_lines = []
+  for (level, name) in enumerate(block_names[depth:], depth):
+    new_lines.append('  '*level + ('[{0}]' if level == 0 else '[./{0}]').format(name))
+  new_lines.append('  '*len(block_names) + '{0} = {1}'.format(param, _formatValue(value)))
+  for level in reversed(range(depth, len(block_names))):
+    new_lines.append('  '*level + ('[]' if level == 0 else '[../]'))
+  return lines[:index] + new_lines + lines[index:]
+
+def writeVariantInput(base_input, params, filename):
+  ''' Copy base input with the parameters of a variant '''
+  with open(base_input) as f:
+    lines = f.read().split('\n')
+  for (path, value) in params:
+    lines = setInputParameter(lines, path, value)
+  with open(filename, 'w') as f:
+    f.write('\n'.join(lines))
+
+def buildCommand(executable, input_filename, params, file_base, ranks=1, threads=1,
+                 mpiexec='mpiexec', use_cli=True):
+  ''' Command line of one run (list of arguments) '''
+  command = shlex.split(executable) + ['-i', input_filename]
+  if threads > 1:
+    command.append('--n-threads={0}'.format(threads))
+  if use_cli:
+    command += ['{0}={1}'.format(path, value) for (path, value) in params]
+  command.append('Outputs/file_base={0}'.format(file_base))
+  if ranks > 1:
+    command = shlex.split(mpiexec) + ['-n', str(ranks)] + command
+  return command
+
+def runCommand(command, cwd, log_filename):
+  ''' Run command, writing its output in log_filename
+      @return dictionary of status (returncode, wall_time)
+  '''
+  start = time.time()
+  with open(log_filename, 'w') as log:
+    log.write(' '.join(command) + '\n')
+    log.flush()
+    try:
+      returncode = subprocess.call(command, cwd=cwd, stdout=log, stderr=subprocess.STDOUT)
+    except OSError as e:
+      log.write('Could not run command: {0}\n'.format(e))
+      returncode = -1
+  return {'returncode':returncode, 'wall_time':time.time() - start}
+
+def _runVariant(job):
+  ''' Run one variant (in a pool thread)
+      @return dictionary of status
+  '''
+  (command, cwd, variant_dir) = job
+  return runCommand(command, cwd, os.path.join(variant_dir, 'log.txt'))
+
+def readCsvColumns(filename):
+  ''' Read csv file written by moose
+      @return (list of column names, 2D array of values)
+  '''
+  with open(filename, 'rb') as f:
+    header = f.readline()
+    text = f.read()
+  columns = [column.strip() for column in header.strip().split(',')]
+  values = np.fromstring(text.replace('\n', ','), sep=',') if text.strip() else np.empty(0)
+  if values.size % len(columns):
+    raise Exception, 'File "{0}" has incomplete lines'.format(filename)
+  return (columns, values.reshape(-1, len(columns)))
+
+def _toColumn(values):
+  ''' Numeric array if all values are numbers, else array of strings '''
+  try:
+    return np.array([float(value) for value in values])
+  except ValueError:
+    return np.array(values)
+
+def collectResults(output_dir, sweep):
+  ''' Gather the postprocessor csv files of all successful variants into
+      results.npz and results.csv (columnar, one row per time step of each
+      variant, missing postprocessors are NaN)
+      @return dictionary of columns (key=column name, value=numpy array)
+  '''
+  paths = [path for (path, values) in sweep['grid']]
+  tables = []
+  pp_columns = []
+  for variant in sweep['variants']:
+    csv_filename = os.path.join(output_dir, variant['name'], FILE_BASE + '.csv')
+    if variant.get('returncode') != 0 or not os.path.isfile(csv_filename):
+      continue
+    (columns, values) = readCsvColumns(csv_filename)
+    tables.append((variant, columns, values))
+    pp_columns += [column for column in columns if column not in pp_columns]
+  nb_rows = sum(values.shape[0] for (variant, columns, values) in tables)
+  results = {'variant':np.empty(nb_rows, dtype=int)}
+  param_values = dict([(path, []) for path in paths])
+  for column in pp_columns:
+    results[column] = np.full(nb_rows, np.nan)
+  row = 0
+  for (variant, columns, values) in tables:
+    nb = values.shape[0]
+    results['variant'][row:row + nb] = variant['index']
+    for (path, value) in variant['params']:
+      param_values[path] += [value]*nb
+    for (i, column) in enumerate(columns):
+      results[column][row:row + nb] = values[:, i]
+    row += nb
+  for path in paths:
+    results[path] = _toColumn(param_values[path])
+
+  column_names = ['variant'] + paths + pp_columns
+  with open(os.path.join(output_dir, 'results.npz'), 'wb') as f:
+    np.savez(f, __columns__=np.array(column_names), **results)
+  with open(os.path.join(output_dir, 'results.csv'), 'w') as f:
+    f.write(','.join(column_names) + '\n')
+    for i in range(nb_rows):
+      f.write(','.join(('{0:.14g}' if results[name].dtype.kind == 'f' else '{0}').format(results[name][i])
+                       for name in column_names) + '\n')
+  return results
+
+def loadResults(output_dir):
+  ''' Read results.npz of a sweep
+      @return (list of column names, dictionary of columns)
+  '''
+  with np.load(os.path.join(output_dir, 'results.npz')) as data:
+    column_names = list(data['__columns__'])
+    return (column_names, dict([(name, data[name]) for name in column_names]))
+
+def runSweep(base_input, grid, output_dir='sweep', executable=DEFAULT_EXECUTABLE, ranks=1, threads=1,
+             slots=None, mpiexec='mpiexec', write_inputs=False, force=False, collect_only=False):
+  ''' Run all variants of the parameter grid and collect their results
+      @param[in] grid - list of (parameter path, list of values)
+      @param[in] slots - int, number of cores to use (default: all cores)
+      @return dictionary of result columns (see collectResults)
+  '''
+  base_input = os.path.realpath(base_input)
+  if not os.path.isfile(base_input):
+    raise Exception, 'Input file "{0}" not found!'.format(base_input)
+  output_dir = os.path.realpath(output_dir)
+  if not os.path.isdir(output_dir):
+    os.makedirs(output_dir)
+  sweep_filename = os.path.join(output_dir, SWEEP_FILENAME)
+  previous = {}
+  if os.path.isfile(sweep_filename):
+    with open(sweep_filename) as f:
+      old_sweep = json.load(f)
+    if old_sweep['input'] == base_input and old_sweep['grid'] == [[path, values] for (path, values) in grid]:
+      previous = dict([(variant['name'], variant) for variant in old_sweep['variants']])
+  sweep = {'input':base_input, 'grid':[[path, values] for (path, values) in grid], 'variants':[]}
+  jobs = []
+  for (index, params) in enumerate(buildVariants(grid)):
+    name = VARIANT_FORMAT.format(index)
+    variant = {'index':index, 'name':name, 'params':[[path, value] for (path, value) in params]}
+    done = previous.get(name, {}).get('returncode') == 0
+    if done and not force or collect_only:
+      variant.update([(key, previous[name][key]) for key in ('returncode', 'wall_time') if key in previous.get(name, {})])
+    else:
+      variant_dir = os.path.join(output_dir, name)
+      if not os.path.isdir(variant_dir):
+        os.makedirs(variant_dir)
+      input_filename = base_input
+      if write_inputs:
+        input_filename = os.path.join(variant_dir, os.path.basename(base_input))
+        writeVariantInput(base_input, params, input_filename)
+      command = buildCommand(executable, input_filename, params, os.path.join(variant_dir, FILE_BASE),
+                             ranks, threads, mpiexec, use_cli=not write_inputs)
+      jobs.append((variant, (command, os.path.dirname(base_input), variant_dir)))
+    sweep['variants'].append(variant)
+
+  if jobs:
+    slots = slots or multiprocessing.cpu_count()
+    nb_workers = max(1, min(len(jobs), slots // (ranks*threads)))
+    print 'Running {0} variants ({1} at a time, {2} rank(s) x {3} thread(s) each)'.format(
+      len(jobs), nb_workers, ranks, threads)
+    pool = ThreadPool(nb_workers)
+    try:
+      for (i, status) in enumerate(pool.imap(_runVariant, [job for (variant, job) in jobs])):
+        variant = jobs[i][0]
+        variant.update(status)
+        print '{0} {1}: {2} ({3:.1f}s)'.format(variant['name'], ' '.join('{0}={1}'.format(*p) for p in variant['params']),
+                                               'OK' if status['returncode'] == 0 else 'FAILED', status['wall_time'])
+    finally:
+      pool.close()
+      pool.join()
+      with open(sweep_filename, 'w') as f:
+        json.dump(sweep, f, indent=1)
+  else:
+    with open(sweep_filename, 'w') as f:
+      json.dump(sweep, f, indent=1)
+
+  failed = [variant['name'] for variant in sweep['variants'] if variant.get('returncode') != 0]
+  if failed:
+    print >>sys.stderr, '{0} variants failed or not run: {1} (see log.txt)'.format(len(failed), ', '.join(failed))
+  return collectResults(output_dir, sweep)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Run redback over a grid of parameter values')
+  parser.add_argument('input', help='base input file')
+  parser.add_argument('--param', action='append', default=[], help='Block/.../param=v1,v2,... or =start:stop:num')
+  parser.add_argument('--output-dir', default='sweep')
+  parser.add_argument('--executable', default=DEFAULT_EXECUTABLE, help='command running redback')
+  parser.add_argument('--ranks', type=int, default=1, help='MPI ranks per run')
+  parser.add_argument('--threads', type=int, default=1, help='threads per rank')
+  parser.add_argument('--slots', type=int, default=None, help='total number of cores (default: all)')
+  parser.add_argument('--mpiexec', default='mpiexec')
+  parser.add_argument('--write-inputs', action='store_true', help='write one input file per variant')
+  parser.add_argument('--force', action='store_true', help='run again variants that already succeeded')
+  parser.add_argument('--collect-only', action='store_true', help='only gather the results of previous runs')
+  args = parser.parse_args()
+  if not args.param:
+    parser.error('at least one --param is needed')
+  grid = [parseParameterSpec(spec) for spec in args.param]
+  results = runSweep(args.input, grid, args.output_dir, args.executable, args.ranks, args.threads, args.slots,
+                     args.mpiexec, args.write_inputs, args.force, args.collect_only)
+  print 'Results of {0} rows written to "{1}"'.format(len(results['variant']),
+                                                       os.path.join(args.output_dir, 'results.npz'))
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+
+''' script to generate spatially correlated random fields on a regular grid,
+    written to a file that the random initial conditions
+    (FunctionWithRandomIC and FunctionTimesRandomIC, parameter field_file)
+    memory-map and interpolate.
+    Requirements: numpy
+
+    The field is a stationary Gaussian field with unit variance and a
+    Gaussian (exp(-r^2/l^2)) or exponential (exp(-r/l)) covariance of
+    correlation length l, built by circulant embedding: white noise is
+    filtered in Fourier space by the square root of the spectrum of the
+    covariance sampled on the (periodic) grid. The grid is padded by a few
+    correlation lengths before the FFT, so that opposite sides of the
+    field are not correlated. By default, the values are mapped to a uniform
+    marginal in [0, 1) (normal cumulative distribution function), which is
+    what the initial conditions expect: they scale the values to [min, max)
+    like the numbers of their random generators.
+    The white noise is drawn with the counter-based generator of the initial
+    conditions (counterUniform, same numbers as RedbackRandom::uniform), so
+    that a seed gives the same field on any platform.
+
+    File format: 72-byte little-endian header packed as "<8s4I6d" (magic
+    "RBRNDFLD", dim, nx, ny, nz, origin x/y/z, spacing x/y/z), followed by
+    the nz*ny*nx values as doubles (x fastest).
+
+    Usage: python random_field.py <output file> --shape nx [ny [nz]] --spacing h
+             --correlation-length l [--origin x y z] [--covariance gaussian]
+             [--seed 0] [--marginal uniform|gaussian] [--padding N]
+'''
+
+import os, sys, struct, argparse
+import numpy as np
+
+RANDOM_FIELD_MAGIC = 'RBRNDFLD'
+RANDOM_FIELD_HEADER_FORMAT = '<8s4I6d'
+RANDOM_FIELD_HEADER_SIZE = struct.calcsize(RANDOM_FIELD_HEADER_FORMAT) # 72 bytes
+COVARIANCES = {'gaussian':lambda r: np.exp(-r*r), 'exponential':lambda r: np.exp(-r)} # r in correlation lengths
+
+def _mix(x):
+  ''' SplitMix64 finaliser of an array of uint64 (same as RedbackRandom::mix) '''
+  x = x + np.uint64(0x9e3779b97f4a7c15)
+  x = (x ^ (x >> np.uint64(30)))*np.uint64(0xbf58476d1ce4e5b9)
+  x = (x ^ (x >> np.uint64(27)))*np.uint64(0x94d049bb133111eb)
+  return x ^ (x >> np.uint64(31))
+
+def counterUniform(seed, keys):
+  ''' Counter-based uniform numbers in [0, 1), one per key (same as RedbackRandom::uniform)
+      @param[in] seed - non-negative int
+      @param[in] keys - array of non-negative ints (e.g. pointKeys)
+  '''
+  keys = np.asarray(keys, dtype=np.uint64)
+  with np.errstate(over='ignore'):
+    bits = _mix(_mix(np.array([seed], dtype=np.uint64)) ^ keys)
+  return (bits >> np.uint64(11)).astype(np.float64)*(1./2**53)
+
+def pointKeys(points):
+  ''' Keys of points for counterUniform (same as RedbackRandom::pointKey)
+      @param[in] points - array (nb_points, 3) of coordinates
+  '''
+  # adding 0 turns -0 into +0, which have different bit patterns
+  coordinates = np.ascontiguousarray(np.asarray(points, dtype=np.float64).reshape(-1, 3) + 0.)
+  keys = np.zeros(len(coordinates), dtype=np.uint64)
+  with np.errstate(over='ignore'):
+    for i in range(3):
+      keys = _mix(keys ^ coordinates[:, i].copy().view(np.uint64))
+  return keys
+
+def gaussianNoise(seed, shape):
+  ''' Independent standard normal values on a grid (Box-Muller on counterUniform, key = 2*index) '''
+  size = int(np.prod(shape))
+  keys = 2*np.arange(size, dtype=np.uint64)
+  u1 = counterUniform(seed, keys)
+  u2 = counterUniform(seed, keys + np.uint64(1))
+  return (np.sqrt(-2.*np.log1p(-u1))*np.cos(2.*np.pi*u2)).reshape(shape)
+
+def normalCdf(x):
+  ''' Cumulative distribution function of the standard normal law (absolute error < 1e-7)
+      with the approximation 7.1.26 of Abramowitz and Stegun for erf
+  '''
+  z = np.abs(x)/np.sqrt(2.)
+  t = 1./(1. + 0.3275911*z)
+  erfc = t*(0.254829592 + t*(-0.284496736 + t*(1.421413741 + t*(-1.453152027 + t*1.061405429))))*np.exp(-z*z)
+  return np.where(x >= 0, 1. - 0.5*erfc, 0.5*erfc)
+
+def correlatedGaussianField(shape, spacing, correlation_length, covariance='gaussian', seed=0, padding=None):
+  ''' Stationary Gaussian field with unit variance (circulant embedding)
+      @param[in] shape - tuple (nz, ny, nx) (or (ny, nx) or (nx,)) of grid points
+      @param[in] spacing - tuple of grid spacings, same order as shape
+      @param[in] correlation_length - float, in the units of spacing
+      @param[in] covariance - 'gaussian' or 'exponential'
+      @param[in] padding - tuple of grid points added after each dimension before the
+        FFT (default: 3 correlation lengths)
+      @return numpy array of shape
+  '''
+  if covariance not in COVARIANCES:
+    raise Exception, 'Unknown covariance "{0}", expected one of {1}'.format(covariance, sorted(COVARIANCES.keys()))
+  if padding is None:
+    padding = [int(np.ceil(3.*correlation_length/h)) for h in spacing]
+  padded_shape = tuple(n + p for (n, p) in zip(shape, padding))
+  # distances (in correlation lengths) to the first grid point, periodic
+  distance2 = np.zeros(padded_shape)
+  for (axis, (n, h)) in enumerate(zip(padded_shape, spacing)):
+    index = np.arange(n)
+    offsets = np.minimum(index, n - index)*h/correlation_length
+    distance2 += (offsets**2).reshape([-1 if i == axis else 1 for i in range(len(padded_shape))])
+  spectrum = np.fft.rfftn(COVARIANCES[covariance](np.sqrt(distance2)))
+  del distance2
+  # the embedding may have small negative eigenvalues
+  amplitude = np.sqrt(np.maximum(spectrum.real, 0.))
+  del spectrum
+  field = np.fft.irfftn(np.fft.rfftn(gaussianNoise(seed, padded_shape))*amplitude, padded_shape)
+  return field[tuple(slice(0, n) for n in shape)]
+
+def writeRandomFieldFile(output_filename, values, origin, spacing):
+  ''' Write values on a grid to a random field file
+      @param[in] values - array (nz, ny, nx), (ny, nx) or (nx,)
+      @param[in] origin, spacing - sequences of x, y[, z] (missing dimensions: 0 and 1)
+  '''
+  values = np.asarray(values)
+  dim = values.ndim
+  grid = values.reshape((1,)*(3 - dim) + values.shape)
+  origin = list(origin) + [0.]*(3 - len(origin))
+  spacing = list(spacing) + [1.]*(3 - len(spacing))
+  (nz, ny, nx) = grid.shape
+  with open(output_filename, 'wb') as f:
+    f.write(struct.pack(RANDOM_FIELD_HEADER_FORMAT, RANDOM_FIELD_MAGIC, dim, nx, ny, nz, *(origin + spacing)))
+    # write slice by slice to avoid a full copy of the grid
+    for k in range(nz):
+      f.write(np.ascontiguousarray(grid[k], dtype='<f8').tostring())
+
+def openRandomFieldFile(input_filename):
+  ''' Memory-map a random field file
+      @return (dim, origin, spacing, values) with values a read-only (nz, ny, nx) view
+  '''
+  with open(input_filename, 'rb') as f:
+    header = f.read(RANDOM_FIELD_HEADER_SIZE)
+  if len(header) != RANDOM_FIELD_HEADER_SIZE or header[:8] != RANDOM_FIELD_MAGIC:
+    raise Exception, 'File "{0}" is not a random field file!'.format(input_filename)
+  fields = struct.unpack(RANDOM_FIELD_HEADER_FORMAT, header)
+  (dim, nx, ny, nz) = fields[1:5]
+  (origin, spacing) = (np.array(fields[5:8]), np.array(fields[8:11]))
+  expected_size = RANDOM_FIELD_HEADER_SIZE + nx*ny*nz*8
+  actual_size = os.path.getsize(input_filename)
+  if actual_size < expected_size:
+    raise Exception, 'File "{0}" has {1} bytes but header announces {2}'\
+      .format(input_filename, actual_size, expected_size)
+  values = np.memmap(input_filename, dtype='<f8', mode='r', offset=RANDOM_FIELD_HEADER_SIZE, shape=(nz, ny, nx))
+  return (dim, origin, spacing, values)
+
+def sampleRandomField(input_filename, points):
+  ''' Values of a random field file at points, interpolated like RedbackRandomField::value
+      @param[in] points - array (nb_points, 3)
+  '''
+  (dim, origin, spacing, values) = openRandomFieldFile(input_filename)
+  points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+  shape = values.shape[::-1] # (nx, ny, nz)
+  index = np.zeros((len(points), 3), dtype=np.int64)
+  weight = np.zeros((len(points), 3))
+  for i in range(dim):
+    if shape[i] < 2:
+      continue
+    x = np.clip(np.nan_to_num((points[:, i] - origin[i])/spacing[i]), 0, shape[i] - 1)
+    index[:, i] = np.minimum(x.astype(np.int64), shape[i] - 2)
+    weight[:, i] = x - index[:, i]
+  result = np.zeros(len(points))
+  for corner in range(8):
+    upper = [(corner >> i) & 1 for i in range(3)]
+    if any(upper[i] and shape[i] < 2 for i in range(3)):
+      continue
+    w = np.prod([weight[:, i] if upper[i] else 1. - weight[:, i] for i in range(3)], axis=0)
+    result += w*values[index[:, 2] + upper[2], index[:, 1] + upper[1], index[:, 0] + upper[0]]
+  return result
+
+def generateRandomFieldFile(output_filename, shape, spacing, correlation_length, origin=None,
+                            covariance='gaussian', seed=0, marginal='uniform', padding=None):
+  ''' Generate a correlated random field and write it to a random field file
+      @param[in] shape, spacing, origin - sequences in the order x, y[, z]
+      @param[in] marginal - 'uniform' (values in [0, 1)) or 'gaussian' (unit variance)
+      Other parameters: see correlatedGaussianField
+      @return (mean, standard deviation) of the written values
+  '''
+  if marginal not in ('uniform', 'gaussian'):
+    raise Exception, 'Unknown marginal "{0}", expected uniform or gaussian'.format(marginal)
+  origin = [0.]*len(shape) if origin is None else origin
+  field = correlatedGaussianField(tuple(shape[::-1]), tuple(spacing[::-1]), correlation_length, covariance, seed,
+                                  None if padding is None else tuple(padding[::-1]))
+  if marginal == 'uniform':
+    field = np.minimum(normalCdf(field), 1. - 2.**-53)
+  writeRandomFieldFile(output_filename, field, origin, spacing)
+  return (field.mean(), field.std())
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Generate a correlated random field file for the random ICs')
+  parser.add_argument('output', help='random field file to write')
+  parser.add_argument('--shape', type=int, nargs='+', required=True, help='number of grid points along x [y [z]]')
+  parser.add_argument('--spacing', type=float, nargs='+', required=True,
+                      help='grid spacing (one value, or one per dimension)')
+  parser.add_argument('--origin', type=float, nargs='+', default=None, help='coordinates of the first grid point')
+  parser.add_argument('--correlation-length', type=float, required=True, help='correlation length')
+  parser.add_argument('--covariance', default='gaussian', choices=sorted(COVARIANCES.keys()))
+  parser.add_argument('--seed', type=int, default=0, help='seed of the counter-based generator')
+  parser.add_argument('--marginal', default='uniform', choices=['uniform', 'gaussian'],
+                      help='uniform values in [0, 1) for the ICs, or the Gaussian field itself')
+  parser.add_argument('--padding', type=int, nargs='+', default=None,
+                      help='grid points added along each dimension for the FFT (default: 3 correlation lengths)')
+  args = parser.parse_args()
+  spacing = args.spacing*len(args.shape) if len(args.spacing) == 1 else args.spacing
+  (mean, std) = generateRandomFieldFile(args.output, args.shape, spacing, args.correlation_length, args.origin,
+                                        args.covariance, args.seed, args.marginal, args.padding)
+  print 'Wrote {0} field of {1} points to "{2}" (mean {3:.4f}, standard deviation {4:.4f})'\
+    .format(args.marginal, 'x'.join(map(str, args.shape)), args.output, mean, std)
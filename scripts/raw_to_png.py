@@ -1,19 +1,127 @@
 #!/usr/bin/env python
 
 ''' script to convert raw binary file to png
-    Requirements: Python Imaging Library (PIL) or pillow (more recent)
+    Requirements: Python Imaging Library (PIL) or pillow (more recent), numpy
     $ sudo easy_install pip
-    $ sudo pip install pillow
+    $ sudo pip install pillow numpy
+
+    Raw file format: 13-byte little-endian header (n_bit, nz, ny, nx) packed as
+    "<biii", followed by the nz*ny*nx voxels stored slice by slice (x fastest).
+    n_bit gives the voxel size: 0 for 1 byte, 1 for 2 bytes, 2 for 4 bytes.
 '''
 
-import os, sys, shutil, struct
+import os, sys, shutil, struct, time, tempfile
+import multiprocessing
+import numpy as np
 from PIL import Image
 
-def convertRawToPng(input_filename, output_base_dir):
+RAW_HEADER_FORMAT = '<biii'
+RAW_HEADER_SIZE = struct.calcsize(RAW_HEADER_FORMAT) # 13 bytes
+RAW_DTYPES = {0:np.dtype('<i1'), 1:np.dtype('<i2'), 2:np.dtype('<i4')} # key=n_bit
+
+def readRawHeader(input_filename):
+  ''' Read header of raw file
+      @param[in] input_filename - string, name of raw input file
+      @return (n_bit, nz, ny, nx)
+  '''
+  with open(input_filename, 'rb') as f:
+    header = f.read(RAW_HEADER_SIZE)
+  if len(header) != RAW_HEADER_SIZE:
+    raise Exception, 'File "{0}" is too short to be a raw file!'.format(input_filename)
+  return struct.unpack(RAW_HEADER_FORMAT, header)
+
+def openRawVolume(input_filename):
+  ''' Memory-map the voxels of a raw file, without reading them
+      @param[in] input_filename - string, name of raw input file
+      @return (n_bit, volume) where volume is a read-only (nz, ny, nx) numpy
+        view on the file content
+  '''
+  (n_bit, nz, ny, nx) = readRawHeader(input_filename)
+  if n_bit not in RAW_DTYPES:
+    raise Exception, 'Case n_bit={0} not implemented yet!'.format(n_bit)
+  dtype = RAW_DTYPES[n_bit]
+  expected_size = RAW_HEADER_SIZE + nz*ny*nx*dtype.itemsize
+  actual_size = os.path.getsize(input_filename)
+  if actual_size < expected_size:
+    raise Exception, 'File "{0}" has {1} bytes but header announces {2}'\
+      .format(input_filename, actual_size, expected_size)
+  volume = np.memmap(input_filename, dtype=dtype, mode='r',
+                     offset=RAW_HEADER_SIZE, shape=(nz, ny, nx))
+  return (n_bit, volume)
+
+def writeRawFile(output_filename, volume):
+  ''' Write (nz, ny, nx) numpy array to raw file
+      @param[in] output_filename - string, name of raw output file
+      @param[in] volume - 3D numpy array of int8, int16 or int32 (unsigned
+        or boolean arrays are accepted if their values fit in the signed type
+        of the same size, as the raw format stores signed voxels)
+  '''
+  volume = np.asarray(volume)
+  assert volume.ndim == 3, 'Volume must be a 3D array (nz, ny, nx)'
+  n_bit = None
+  for key, dtype in RAW_DTYPES.items():
+    if volume.dtype.itemsize == dtype.itemsize and volume.dtype.kind in 'iub':
+      n_bit = key
+  if n_bit is None:
+    raise Exception, 'Cannot write array of type {0} to raw file'.format(volume.dtype)
+  if volume.dtype.kind == 'u' and volume.size:
+    signed_max = np.iinfo(RAW_DTYPES[n_bit]).max
+    v_max = getValueRange(volume)[1]
+    if v_max > signed_max:
+      raise Exception, 'Cannot write array of type {0} to raw file: value {1} overflows {2}'\
+        .format(volume.dtype, v_max, RAW_DTYPES[n_bit])
+  (nz, ny, nx) = volume.shape
+  with open(output_filename, 'wb') as f:
+    f.write(struct.pack(RAW_HEADER_FORMAT, n_bit, nz, ny, nx))
+    # write slice by slice to avoid a full copy of the volume
+    for k in range(nz):
+      f.write(np.ascontiguousarray(volume[k], dtype=RAW_DTYPES[n_bit]).tostring())
+
+def getValueRange(volume, slab_size=64):
+  ''' Compute min and max of volume, reading it slab by slab to bound memory '''
+  v_min = None
+  v_max = None
+  for k in range(0, volume.shape[0], slab_size):
+    slab = volume[k:k + slab_size]
+    slab_min = slab.min()
+    slab_max = slab.max()
+    v_min = slab_min if v_min is None else min(v_min, slab_min)
+    v_max = slab_max if v_max is None else max(v_max, slab_max)
+  return (int(v_min), int(v_max))
+
+def sliceToImage(data, n_bit, value_range=None):
+  ''' Convert 2D slice (ny, nx) to PIL image
+      1-byte data is written as black & white image (positive is white,
+      zero and negative values are black),
+      2- and 4-byte data as 16-bit grey image rescaled on value_range.
+  '''
+  if n_bit == 0:
+    # one bit per pixel, each row padded to a whole byte
+    return Image.frombytes('1', (data.shape[1], data.shape[0]),
+                           np.packbits(data > 0, axis=1).tostring())
+  (v_min, v_max) = value_range
+  scale = 65535./(v_max - v_min) if v_max > v_min else 0.
+  grey = ((data.astype(np.float64) - v_min)*scale).astype(np.uint16)
+  return Image.frombytes('I;16', (data.shape[1], data.shape[0]), grey.astype('<u2').tostring())
+
+def _convertSlices(args):
+  ''' Worker converting slices [k_start, k_end) to png files '''
+  (input_filename, output_dir, k_start, k_end, value_range) = args
+  (n_bit, volume) = openRawVolume(input_filename)
+  for k in range(k_start, k_end):
+    im = sliceToImage(volume[k], n_bit, value_range)
+    im.save(os.path.join(output_dir, 'slice_{0:04d}.png'.format(k)))
+  return k_end - k_start
+
+def convertRawToPng(input_filename, output_base_dir, nb_processes=None, slices_per_task=8):
   ''' Convert raw data to stack of png images
       @param[in] input_filename - string, name of raw input file
       @param[in] output_base_dir - string, name of base directory in which
         a subdirectory will be created with all png files
+      @param[in] nb_processes - int, number of worker processes (default: all
+        cores, 1 to run serially)
+      @param[in] slices_per_task - int, number of slices sent to a worker at once
+      @return number of slices written
   '''
   # Check user input
   if not os.path.isfile(input_filename):
@@ -29,31 +137,61 @@ def convertRawToPng(input_filename, output_base_dir):
   if not os.path.isdir(output_dir):
     os.makedirs(output_dir)
 
-  # Read raw data
-  #import pdb;pdb.set_trace()
-  with open(input_filename, "rb") as f:
-    file_content = f.read()
-    (n_bit, nz, ny, nx) = struct.unpack("<biii", file_content[:13])
+  # Map raw data (nothing is read yet)
+  (n_bit, volume) = openRawVolume(input_filename)
+  nz = volume.shape[0]
+  value_range = None
+  if n_bit > 0:
+    # same grey scale for all slices
+    value_range = getValueRange(volume)
+  del volume
+
+  tasks = [(input_filename, output_dir, k, min(k + slices_per_task, nz), value_range)
+           for k in range(0, nz, slices_per_task)]
+  if nb_processes == 1 or len(tasks) < 2:
+    nb_slices = sum(map(_convertSlices, tasks))
+  else:
+    pool = multiprocessing.Pool(nb_processes)
+    try:
+      nb_slices = sum(pool.map(_convertSlices, tasks))
+    finally:
+      pool.close()
+      pool.join()
+  return nb_slices
+
+def benchmarkRawToPng(nx=256, ny=256, nz=256, n_bit=0, nb_processes=None):
+  ''' Measure conversion throughput on a synthetic volume (sphere in a box)
+      @return (elapsed time in s, throughput in MB/s)
+  '''
+  tmp_dir = tempfile.mkdtemp(prefix='raw_to_png_')
+  try:
+    z, y, x = np.ogrid[0:nz, 0:ny, 0:nx]
+    dist2 = ((x - nx/2.)/nx)**2 + ((y - ny/2.)/ny)**2 + ((z - nz/2.)/nz)**2
+    dtype = RAW_DTYPES[n_bit]
     if n_bit == 0:
-      length = 1 # data stored on 1 byte
-      for k in range(nz):
-        data = []
-        for j in range(ny):
-          for i in range(nx):
-            index_start = 13 + (k*(nx*ny) + j*(nx) + i)*length
-            index_end = index_start + length # data stored on 1 byte
-            out, = struct.unpack("<b", file_content[index_start:index_end])
-            data.append(out)
-        # write image to file
-        im = Image.new("1", (nx, ny))
-        im.putdata(map(int, data))
-        out_filename = os.path.join(output_dir, 'slice_{0:04d}.png'.format(k))
-        im.save(out_filename)
+      volume = (dist2 < 0.1).astype(dtype)
     else:
-      raise Exception, 'Case n_bit={0} not implemented yet!'.format(n_bit)
-
+      volume = (dist2*np.iinfo(dtype).max).astype(dtype)
+    input_filename = os.path.join(tmp_dir, 'synthetic.raw')
+    writeRawFile(input_filename, volume)
+    nb_bytes = volume.nbytes
+    del volume, dist2
+    start = time.time()
+    convertRawToPng(input_filename, os.path.join(tmp_dir, 'output'), nb_processes=nb_processes)
+    elapsed = time.time() - start
+  finally:
+    shutil.rmtree(tmp_dir)
+  throughput = nb_bytes/(1024.*1024.)/elapsed
+  print 'Converted {0}x{1}x{2} volume (n_bit={3}) in {4:.3f}s ({5:.1f} MB/s)'\
+    .format(nx, ny, nz, n_bit, elapsed, throughput)
+  return (elapsed, throughput)
 
 if __name__ == "__main__":
-  input_filename = os.path.join('input_files', 'CP10_L40.raw')
-  convertRawToPng(input_filename, 'output_files')
+  if '--benchmark' in sys.argv:
+    for n_bit in sorted(RAW_DTYPES.keys()):
+      benchmarkRawToPng(n_bit=n_bit, nb_processes=1)
+      benchmarkRawToPng(n_bit=n_bit)
+  else:
+    input_filename = os.path.join('input_files', 'CP10_L40.raw')
+    convertRawToPng(input_filename, 'output_files')
   print 'Finished'
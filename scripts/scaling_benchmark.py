@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+
+''' script to measure the strong and weak scaling of redback over MPI ranks
+    and threads on one multi-core machine, with the inputs of the test specs.
+    Requirements: numpy, matplotlib (figures)
+
+    The tests are read from the "tests" spec files of the given directories
+    (default: benchmark_10_TMC and benchmark_11_THMC); RunPy tests are
+    skipped, and the min_parallel/max_parallel/min_threads/max_threads
+    parameters of each test bound the rank and thread counts it is run with.
+    Input files can also be given directly (no bounds).
+
+    Every combination of --ranks and --threads using at most --max-cores
+    cores is run:
+      strong scaling: same mesh (uniform_refine = --refine) for all counts
+      weak scaling: the mesh is refined uniformly (2^dim more elements per
+        level) with the number of cores, so only counts equal to the
+        smallest count times a power of 2^dim are run (e.g. 1, 4, 16 cores
+        in 2D)
+    Each run is repeated --repeat times and the fastest run is kept. Runs are
+    sequential, as concurrent runs would compete for the cores and memory
+    bandwidth being measured. Runs that already succeeded are not run again
+    (unless --force).
+
+    Measures: wall time of the command, solve time (PerformanceData
+    postprocessor of the solve() event, added on the command line), number
+    of elements, and peak resident memory of the largest process (memory
+    of all ranks is estimated as ranks x peak).
+    Speedup and efficiency are relative to the smallest core count:
+      strong: speedup = T_ref/T, efficiency = speedup*cores_ref/cores
+      weak: efficiency = T_ref/T
+
+    Results are written in <output_dir>:
+      scaling.json: status and measures of each run
+      scaling.csv: efficiency table (one line per test, mode and count)
+      figures/<test>_<mode>_<measure>.<format>: speedup and efficiency
+        against the number of cores (plotFigure of create_figures), ideal
+        scaling drawn as reference
+
+    Usage: python scaling_benchmark.py [test dir | input.i ...] [--mode strong weak]
+             [--ranks 1 2 4] [--threads 1] [--max-cores N] [--refine 0] [--repeat 1]
+             [--num-steps N] [--executable redback-opt] [--mpiexec mpiexec]
+             [--output-dir scaling] [--figure-format pdf] [--force] [--dim N]
+      e.g. python scaling_benchmark.py ../tests/benchmark_4_TH --ranks 1 2 4 8 --threads 1 2 --num-steps 5
+'''
+
+import os, re, sys, json, math, time, argparse, multiprocessing
+import numpy as np
+from parameter_sweep import DEFAULT_EXECUTABLE, REDBACK_DIR, buildCommand, readCsvColumns
+from material_memory import runPeakMemory
+
+# plotFigure is shared with the documentation figures
+sys.path.append(os.path.join(REDBACK_DIR, 'doc', 'theory', 'data', 'create_figures'))
+
+DEFAULT_TEST_DIRS = [os.path.join(REDBACK_DIR, 'tests', name) for name in ['benchmark_10_TMC', 'benchmark_11_THMC']]
+SCALING_FILENAME = 'scaling.json'
+FILE_BASE = 'out'
+# postprocessors added to each run (names unlikely to clash with the input)
+SOLVE_TIME_PP = 'scaling_solve_time'
+NB_ELEMS_PP = 'scaling_nb_elems'
+OUTPUT_COLUMNS = ['test', 'mode', 'ranks', 'threads', 'cores', 'refine', 'nb_elems', 'wall_time', 'solve_time',
+                  'peak_rss_mb', 'total_rss_mb', 'speedup', 'efficiency', 'solve_efficiency']
+
+def readInputBlocks(filename):
+  ''' Parameters of the blocks of an input (or test spec) file
+      @return dictionary (key=block path, value=dictionary of parameters)
+  '''
+  path = []
+  blocks = {}
+  with open(filename, 'r') as f:
+    for line in f:
+      line = line.split('#', 1)[0].strip()
+      match = re.match(r'\[(?:\./)?([^\]]*)\]$', line)
+      if match:
+        if match.group(1) in ('', '../'):
+          path = path[:-1]
+        else:
+          path.append(match.group(1))
+          blocks.setdefault('/'.join(path), {})
+        continue
+      match = re.match(r'(\w+)\s*=\s*(.*)$', line)
+      if match and path:
+        blocks['/'.join(path)][match.group(1)] = match.group(2).strip().strip('\'"')
+  return blocks
+
+def findTests(paths):
+  ''' Tests to benchmark from test directories (spec file "tests") or input files
+      @return list of dictionaries (name, input, cli_args, min/max_parallel, min/max_threads)
+  '''
+  tests = []
+  for path in paths:
+    if os.path.isfile(path):
+      tests.append({'name':os.path.splitext(os.path.basename(path))[0], 'input':os.path.realpath(path),
+                    'cli_args':[], 'min_parallel':1, 'max_parallel':1000, 'min_threads':1, 'max_threads':16})
+      continue
+    spec_filename = os.path.join(path, 'tests')
+    if not os.path.isfile(spec_filename):
+      raise Exception, 'No test spec file "{0}" found!'.format(spec_filename)
+    for (block_path, specs) in sorted(readInputBlocks(spec_filename).items()):
+      if not block_path.startswith('Tests/') or specs.get('type') == 'RunPy' or \
+         not specs.get('input', '').endswith('.i'):
+        continue
+      tests.append({'name':'{0}.{1}'.format(os.path.basename(os.path.realpath(path)), block_path[len('Tests/'):]),
+                    'input':os.path.realpath(os.path.join(path, specs['input'])),
+                    'cli_args':specs.get('cli_args', '').split(),
+                    'min_parallel':int(specs.get('min_parallel', 1)),
+                    'max_parallel':int(specs.get('max_parallel', 1000)),
+                    'min_threads':int(specs.get('min_threads', 1)),
+                    'max_threads':int(specs.get('max_threads', 16))})
+  return tests
+
+def meshDimension(input_filename):
+  ''' Dimension of the mesh of an input (Mesh/dim, 3 for file meshes without dim) '''
+  return int(readInputBlocks(input_filename).get('Mesh', {}).get('dim', 3))
+
+def scalingRuns(test, mode, ranks_list, threads_list, max_cores, refine, dim):
+  ''' (ranks, threads, refine) of the runs of a test, sorted by number of cores '''
+  counts = sorted(set((ranks*threads, ranks, threads) for ranks in ranks_list for threads in threads_list
+                      if ranks*threads <= max_cores
+                      and test['min_parallel'] <= ranks <= test['max_parallel']
+                      and test['min_threads'] <= threads <= test['max_threads']))
+  if mode == 'strong':
+    return [(ranks, threads, refine) for (cores, ranks, threads) in counts]
+  runs = []
+  for (cores, ranks, threads) in counts:
+    # cores_ref * (2^dim)^level cores for level refinements
+    level = math.log(float(cores)/counts[0][0], 2**dim)
+    if abs(level - round(level)) < 1e-9:
+      runs.append((ranks, threads, refine + int(round(level))))
+  return runs
+
+def runName(mode, ranks, threads, refine):
+  return '{0}_r{1}_t{2}_l{3}'.format(mode, ranks, threads, refine)
+
+def runOnce(test, ranks, threads, refine, run_dir, executable, mpiexec, num_steps):
+  ''' Run a test once
+      @return dictionary of measures (returncode, wall_time, solve_time, nb_elems, peak_rss)
+  '''
+  overrides = [('Mesh/uniform_refine', refine),
+               ('Postprocessors/{0}/type'.format(SOLVE_TIME_PP), 'PerformanceData'),
+               ('Postprocessors/{0}/event'.format(SOLVE_TIME_PP), 'solve()'),
+               ('Postprocessors/{0}/column'.format(SOLVE_TIME_PP), 'total_time_with_sub'),
+               ('Postprocessors/{0}/type'.format(NB_ELEMS_PP), 'NumElems'),
+               ('Outputs/csv', 'true'),
+               ('Outputs/exodus', 'false')] # outputs are not part of the measure
+  if num_steps is not None:
+    overrides.append(('Executioner/num_steps', num_steps))
+  file_base = os.path.join(run_dir, FILE_BASE)
+  command = buildCommand(executable, test['input'], overrides, file_base, ranks, threads, mpiexec)
+  command[-1:-1] = test['cli_args'] # before file_base, which must stay last
+  start = time.time()
+  (returncode, peak_rss) = runPeakMemory(command, os.path.dirname(test['input']), os.path.join(run_dir, 'log.txt'))
+  result = {'returncode':returncode, 'wall_time':time.time() - start, 'peak_rss':peak_rss,
+            'solve_time':float('nan'), 'nb_elems':float('nan')}
+  if returncode == 0 and os.path.isfile(file_base + '.csv'):
+    (columns, values) = readCsvColumns(file_base + '.csv')
+    for (key, column) in [('solve_time', SOLVE_TIME_PP), ('nb_elems', NB_ELEMS_PP)]:
+      if column in columns and len(values):
+        result[key] = float(values[-1, columns.index(column)])
+  return result
+
+def computeEfficiency(runs, mode):
+  ''' Add speedup and efficiencies (relative to the run with fewest cores) to the runs of a test and mode '''
+  runs = sorted([run for run in runs if run.get('returncode') == 0], key=lambda run: run['cores'])
+  if not runs:
+    return []
+  reference = runs[0]
+  for run in runs:
+    ratio = float(reference['cores'])/run['cores']
+    run['speedup'] = reference['wall_time']/run['wall_time']
+    solve_speedup = reference['solve_time']/run['solve_time'] if run['solve_time'] else float('nan')
+    if mode == 'strong':
+      run['efficiency'] = run['speedup']*ratio
+      run['solve_efficiency'] = solve_speedup*ratio
+    else:
+      run['efficiency'] = run['speedup']
+      run['solve_efficiency'] = solve_speedup
+  return runs
+
+def plotScaling(runs, mode, figure_rootfilename, figure_format):
+  ''' Figures of speedup (strong scaling) and efficiency against number of cores
+      @return list of figure files
+  '''
+  import matplotlib
+  matplotlib.use('Agg') # figures are saved to file, no display needed
+  from utilities import plotFigure
+  cores = np.array([run['cores'] for run in runs], dtype=np.float64)
+  figures = []
+  measures = [('efficiency', 'Parallel efficiency', np.ones(len(cores)))]
+  if mode == 'strong':
+    measures.insert(0, ('speedup', 'Speedup', cores/cores[0]))
+  for (measure, label, ideal) in measures:
+    figures.append(plotFigure(cores, ideal, cores, np.array([run[measure] for run in runs]),
+                              x_label='Cores', y_label=label,
+                              figure_rootfilename='{0}_{1}'.format(figure_rootfilename, measure),
+                              figure_format=figure_format, analytical_label='Ideal scaling',
+                              numerical_label='Measured ({0} scaling)'.format(mode)))
+  return figures
+
+def runScalingBenchmark(paths, modes=('strong', 'weak'), ranks_list=None, threads_list=(1,), max_cores=None,
+                        refine=0, repeat=1, num_steps=None, executable=DEFAULT_EXECUTABLE, mpiexec='mpiexec',
+                        output_dir='scaling', figure_format='pdf', force=False, dim=None):
+  ''' Run the scaling study of all tests and write its tables and figures
+      @param[in] dim - mesh dimension for weak scaling (default: Mesh/dim of each input, else 3)
+      @return list of result dictionaries (keys: OUTPUT_COLUMNS)
+  '''
+  max_cores = max_cores or multiprocessing.cpu_count()
+  if ranks_list is None:
+    ranks_list = [2**i for i in range(int(math.log(max_cores, 2)) + 1)]
+  output_dir = os.path.realpath(output_dir)
+  if not os.path.isdir(output_dir):
+    os.makedirs(output_dir)
+  scaling_filename = os.path.join(output_dir, SCALING_FILENAME)
+  previous = {}
+  if os.path.isfile(scaling_filename):
+    with open(scaling_filename) as f:
+      previous = dict(((run['test'], run['name']), run) for run in json.load(f)['runs'])
+  all_runs = []
+  results = []
+  try:
+    for test in findTests(paths):
+      test_dim = dim or meshDimension(test['input'])
+      for mode in modes:
+        runs = []
+        for (ranks, threads, level) in scalingRuns(test, mode, ranks_list, threads_list, max_cores, refine,
+                                                   test_dim):
+          name = runName(mode, ranks, threads, level)
+          run = previous.get((test['name'], name))
+          if run is None or run.get('returncode') != 0 or force:
+            run_dir = os.path.join(output_dir, test['name'], name)
+            if not os.path.isdir(run_dir):
+              os.makedirs(run_dir)
+            measures = [runOnce(test, ranks, threads, level, run_dir, executable, mpiexec, num_steps)
+                        for i in range(repeat)]
+            failed = [measure for measure in measures if measure['returncode'] != 0]
+            run = dict(failed[0] if failed else min(measures, key=lambda measure: measure['wall_time']))
+            run.update({'test':test['name'], 'name':name, 'mode':mode, 'ranks':ranks, 'threads':threads,
+                        'cores':ranks*threads, 'refine':level})
+            print '{0} {1}: {2} ({3:.2f}s, solve {4:.2f}s, {5:.0f} MB)'.format(
+              test['name'], name, 'OK' if run['returncode'] == 0 else 'FAILED (see log.txt)', run['wall_time'],
+              run['solve_time'], run['peak_rss']/1024.**2)
+          runs.append(run)
+          all_runs.append(run)
+        runs = computeEfficiency([dict(run) for run in runs], mode)
+        for run in runs:
+          results.append(dict([(column, run.get(column)) for column in OUTPUT_COLUMNS[:-5]] +
+                              [('peak_rss_mb', run['peak_rss']/1024.**2),
+                               ('total_rss_mb', run['ranks']*run['peak_rss']/1024.**2),
+                               ('speedup', run['speedup']), ('efficiency', run['efficiency']),
+                               ('solve_efficiency', run['solve_efficiency'])]))
+        if len(runs) > 1 and figure_format:
+          plotScaling(runs, mode, os.path.join(output_dir, 'figures', '{0}_{1}'.format(test['name'], mode)),
+                      figure_format)
+  finally:
+    # runs of other tests are kept
+    done = set((run['test'], run['name']) for run in all_runs)
+    kept = [run for (key, run) in sorted(previous.items()) if key not in done]
+    with open(scaling_filename, 'w') as f:
+      json.dump({'runs':kept + all_runs}, f, indent=1)
+  with open(os.path.join(output_dir, 'scaling.csv'), 'w') as f:
+    f.write(','.join(OUTPUT_COLUMNS) + '\n')
+    for result in results:
+      f.write(','.join(('{0:.6g}' if isinstance(result[column], float) else '{0}').format(result[column])
+                       for column in OUTPUT_COLUMNS) + '\n')
+  printEfficiencyTable(results)
+  return results
+
+def printEfficiencyTable(results):
+  print '{0:40s} {1:6s} {2:>5s} {3:>7s} {4:>5s} {5:>10s} {6:>10s} {7:>8s} {8:>10s} {9:>10s}'.format(
+    'Test', 'Mode', 'Cores', 'Threads', 'Level', 'Wall (s)', 'Solve (s)', 'Speedup', 'Efficiency', 'Memory (MB)')
+  for result in results:
+    print '{0:40s} {1:6s} {2:5d} {3:7d} {4:5d} {5:10.2f} {6:10.2f} {7:8.2f} {8:10.2f} {9:10.0f}'.format(
+      result['test'], result['mode'], result['cores'], result['threads'], result['refine'], result['wall_time'],
+      result['solve_time'], result['speedup'], result['efficiency'], result['total_rss_mb'])
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Strong and weak scaling of redback over MPI ranks and threads')
+  parser.add_argument('paths', nargs='*', default=DEFAULT_TEST_DIRS,
+                      help='test directories (tests of their spec file) or input files')
+  parser.add_argument('--mode', nargs='+', default=['strong', 'weak'], choices=['strong', 'weak'])
+  parser.add_argument('--ranks', type=int, nargs='+', default=None, help='MPI ranks (default: powers of 2)')
+  parser.add_argument('--threads', type=int, nargs='+', default=[1], help='threads per rank')
+  parser.add_argument('--max-cores', type=int, default=None, help='largest ranks x threads (default: all cores)')
+  parser.add_argument('--refine', type=int, default=0, help='uniform refinement of the smallest run')
+  parser.add_argument('--repeat', type=int, default=1, help='runs per count, the fastest is kept')
+  parser.add_argument('--num-steps', type=int, default=None, help='number of time steps of each run')
+  parser.add_argument('--executable', default=DEFAULT_EXECUTABLE, help='command running redback')
+  parser.add_argument('--mpiexec', default='mpiexec', help='MPI launcher (e.g. "mpiexec --bind-to core")')
+  parser.add_argument('--output-dir', default='scaling')
+  parser.add_argument('--figure-format', default='pdf', help='pdf, png or eps ("" for no figures)')
+  parser.add_argument('--force', action='store_true', help='run again runs that already succeeded')
+  parser.add_argument('--dim', type=int, default=None,
+                      help='mesh dimension for weak scaling (default: Mesh/dim of the input, else 3)')
+  args = parser.parse_args()
+  runScalingBenchmark(args.paths, args.mode, args.ranks, args.threads, args.max_cores, args.refine, args.repeat,
+                      args.num_steps, args.executable, args.mpiexec, args.output_dir, args.figure_format, args.force,
+                      args.dim)
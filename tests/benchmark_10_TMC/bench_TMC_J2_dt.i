@@ -0,0 +1,434 @@
+[Mesh]
+  type = GeneratedMesh
+  dim = 2
+  nx = 10
+  ny = 6
+  xmin = -1.5
+  xmax = 1.5
+  ymin = -1
+[]
+
+[MeshModifiers]
+  [./middle_left]
+    type = AddExtraNodeset
+    new_boundary = 4
+    coord = '-1.5 0'
+  [../]
+[]
+
+[Variables]
+  [./disp_x]
+    order = FIRST
+    family = LAGRANGE
+  [../]
+  [./disp_y]
+    order = FIRST
+    family = LAGRANGE
+  [../]
+  [./disp_z]
+    order = FIRST
+    family = LAGRANGE
+  [../]
+  [./temp]
+  [../]
+[]
+
+[Materials]
+  [./mat_mech]
+    type = RedbackMechMaterialJ2
+    block = 0
+    disp_x = disp_x
+    disp_y = disp_y
+    disp_z = disp_z
+    temperature = temp
+    exponent = 1
+    youngs_modulus = 1000
+    poisson_ratio = 0.3
+    ref_pe_rate = 1
+    slope_yield_surface = -0.6
+    yield_stress = '0. 1 1. 1'
+    total_porosity = total_porosity
+  [../]
+  [./mat_nomech]
+    type = RedbackMaterial
+    block = 0
+    is_chemistry_on = true
+    is_mechanics_on = false
+    Aphi = 0
+    ar = 10
+    ar_F = 20
+    ar_R = 10
+    da_endo = 1e-6
+    gr = 1.362e-5 # 0.3*exp(-Ar), Ar=10
+    alpha_2 = 3
+    phi0 = 0.1
+    ref_lewis_nb = 1
+    temperature = temp
+    total_porosity = total_porosity
+  [../]
+[]
+
+[Functions]
+  active = 'downfunc'
+  [./upfunc]
+    type = ParsedFunction
+    value = t
+  [../]
+  [./downfunc]
+    type = ParsedFunction
+    value = -3e-2*t
+  [../]
+  [./spline_IC]
+    type = ConstantFunction
+  [../]
+[]
+
+[BCs]
+  active = 'constant_force_right temp_mid_pts left_disp rigth_disp_y left_disp_y'
+  [./left_disp]
+    type = DirichletBC
+    variable = disp_x
+    boundary = 3
+    value = 0
+  [../]
+  [./right_disp]
+    type = FunctionPresetBC
+    variable = disp_x
+    boundary = 1
+    function = downfunc
+  [../]
+  [./bottom_temp]
+    type = NeumannBC
+    variable = temp
+    boundary = 0
+    value = -1
+  [../]
+  [./top_temp]
+    type = NeumannBC
+    variable = temp
+    boundary = 2
+    value = -1
+  [../]
+  [./left_disp_y]
+    type = DirichletBC
+    variable = disp_y
+    boundary = 3
+    value = 0
+  [../]
+  [./temp_mid_pts]
+    type = DirichletBC
+    variable = temp
+    boundary = 4
+    value = 0
+  [../]
+  [./rigth_disp_y]
+    type = DirichletBC
+    variable = disp_y
+    boundary = 1
+    value = 0
+  [../]
+  [./temp_box]
+    type = DirichletBC
+    variable = temp
+    boundary = '0 1 2 3'
+    value = 0
+  [../]
+  [./constant_force_right]
+    type = NeumannBC
+    variable = disp_x
+    boundary = 1
+    value = -2
+  [../]
+[]
+
+[AuxVariables]
+  active = 'mech_porosity Mod_Gruntfest_number total_porosity mises_strain mises_strain_rate volumetric_strain_rate mises_stress volumetric_strain mean_stress'
+  [./stress_zz]
+    order = CONSTANT
+    family = MONOMIAL
+  [../]
+  [./peeq]
+    order = CONSTANT
+    family = MONOMIAL
+  [../]
+  [./pe11]
+    order = CONSTANT
+    family = MONOMIAL
+  [../]
+  [./pe22]
+    order = CONSTANT
+    family = MONOMIAL
+  [../]
+  [./pe33]
+    order = CONSTANT
+    family = MONOMIAL
+  [../]
+  [./mises_stress]
+    order = CONSTANT
+    family = MONOMIAL
+  [../]
+  [./mises_strain]
+    order = CONSTANT
+    family = MONOMIAL
+  [../]
+  [./mises_strain_rate]
+    order = CONSTANT
+    family = MONOMIAL
+    block = 0
+  [../]
+  [./Mod_Gruntfest_number]
+    order = CONSTANT
+    family = MONOMIAL
+    block = '0 1'
+  [../]
+  [./volumetric_strain]
+    order = CONSTANT
+    family = MONOMIAL
+  [../]
+  [./volumetric_strain_rate]
+    order = CONSTANT
+    family = MONOMIAL
+  [../]
+  [./mean_stress]
+    order = CONSTANT
+    family = MONOMIAL
+    block = 0
+  [../]
+  [./total_porosity]
+    order = FIRST
+    family = MONOMIAL
+  [../]
+  [./mech_porosity]
+    order = FIRST
+    family = MONOMIAL
+  [../]
+[]
+
+[Kernels]
+  [./td_temp]
+    type = TimeDerivative
+    variable = temp
+  [../]
+  [./temp_diff]
+    type = Diffusion
+    variable = temp
+  [../]
+  [./temp_dissip]
+    type = RedbackMechDissip
+    variable = temp
+  [../]
+  [./chem_endo_temperature]
+    type = RedbackChemEndo
+    variable = temp
+  [../]
+[]
+
+[AuxKernels]
+  active = 'mech_porosity volumetric_strain total_porosity mises_strain mises_strain_rate volumetric_strain_rate mises_stress mean_stress Gruntfest_Number'
+  [./stress_zz]
+    type = RankTwoAux
+    rank_two_tensor = stress
+    variable = stress_zz
+    index_i = 2
+    index_j = 2
+  [../]
+  [./pe11]
+    type = RankTwoAux
+    rank_two_tensor = plastic_strain
+    variable = pe11
+    index_i = 0
+    index_j = 0
+  [../]
+  [./pe22]
+    type = RankTwoAux
+    rank_two_tensor = plastic_strain
+    variable = pe22
+    index_i = 1
+    index_j = 1
+  [../]
+  [./pe33]
+    type = RankTwoAux
+    rank_two_tensor = plastic_strain
+    variable = pe33
+    index_i = 2
+    index_j = 2
+  [../]
+  [./eqv_plastic_strain]
+    type = FiniteStrainPlasticAux
+    variable = peeq
+  [../]
+  [./mises_stress]
+    type = MaterialRealAux
+    variable = mises_stress
+    property = mises_stress
+  [../]
+  [./mises_strain]
+    type = MaterialRealAux
+    variable = mises_strain
+    property = eqv_plastic_strain
+  [../]
+  [./mises_strain_rate]
+    type = MaterialRealAux
+    variable = mises_strain_rate
+    block = 0
+    property = mises_strain_rate
+  [../]
+  [./Gruntfest_Number]
+    type = MaterialRealAux
+    variable = Mod_Gruntfest_number
+    property = mod_gruntfest_number
+    block = 0
+  [../]
+  [./mean_stress]
+    type = MaterialRealAux
+    variable = mean_stress
+    property = mean_stress
+    block = 0
+  [../]
+  [./volumetric_strain]
+    type = MaterialRealAux
+    variable = volumetric_strain
+    property = volumetric_strain
+  [../]
+  [./volumetric_strain_rate]
+    type = MaterialRealAux
+    variable = volumetric_strain_rate
+    property = volumetric_strain_rate
+  [../]
+  [./total_porosity]
+    type = RedbackTotalPorosityAux
+    variable = total_porosity
+    mechanical_porosity = mech_porosity
+  [../]
+  [./mech_porosity]
+    type = MaterialRealAux
+    variable = mech_porosity
+    execute_on = timestep_end
+    property = mechanical_porosity
+  [../]
+[]
+
+[Postprocessors]
+  [./mises_stress]
+    type = PointValue
+    variable = mises_stress
+    point = '0 0 0'
+  [../]
+  [./mises_strain]
+    type = PointValue
+    variable = mises_strain
+    point = '0 0 0'
+  [../]
+  [./mises_strain_rate]
+    type = PointValue
+    variable = mises_strain_rate
+    point = '0 0 0'
+  [../]
+  [./temp_middle]
+    type = PointValue
+    variable = temp
+    point = '0 0 0'
+  [../]
+  [./mean_stress]
+    type = PointValue
+    variable = mean_stress
+    point = '0 0 0'
+  [../]
+  [./volumetric_strain]
+    type = PointValue
+    variable = volumetric_strain
+    point = '0 0 0'
+  [../]
+  [./volumetric_strain_rate]
+    type = PointValue
+    variable = volumetric_strain_rate
+    point = '0 0 0'
+  [../]
+  [./timestep]
+    type = TimestepSize
+  [../]
+  [./nl_its]
+    type = NumNonlinearIterations
+  [../]
+  [./max_returnmap_iter]
+    type = ReturnMapIterPercentile
+    statistics = returnmap_stats
+    percentile = 100
+  [../]
+  [./returnmap_iter_95]
+    type = ReturnMapIterPercentile
+    statistics = returnmap_stats
+    percentile = 95
+  [../]
+[]
+
+[UserObjects]
+  [./returnmap_stats]
+    type = ReturnMapIterStatistics
+    block = 0
+  [../]
+[]
+
+[Preconditioning]
+  # active = ''
+  [./SMP]
+    type = SMP
+    full = true
+  [../]
+[]
+
+[Executioner]
+  # Preconditioned JFNK (default)
+  start_time = 0.0
+  end_time = 1e-2
+  dtmax = 1
+  dtmin = 1e-7
+  type = Transient
+  l_max_its = 200
+  nl_max_its = 10
+  solve_type = PJFNK
+  petsc_options_iname = '-pc_type -pc_hypre_type -snes_linesearch_type -ksp_gmres_restart'
+  petsc_options_value = 'hypre boomeramg cp 201'
+  nl_abs_tol = 1e-10 # 1e-10 to begin with
+  reset_dt = true
+  line_search = basic
+  [./TimeStepper]
+    # threshold method, the predictive method is set on the command line
+    type = ReturnMapIterDT
+    dt = 1e-3
+    statistics = returnmap_stats
+    min_iter = 10
+    max_iter = 20
+    ratio = 0.5
+    dt_min = 1e-5
+    dt_max = 1e-2
+  [../]
+[]
+
+[Outputs]
+  file_base = bench_TMC_J2_threshold_dt_out
+  output_initial = true
+  csv = true
+  print_linear_residuals = true
+  [./console]
+    type = Console
+    perf_log = true
+  [../]
+[]
+
+[RedbackMechAction]
+  [./solid]
+    disp_z = disp_z
+    disp_y = disp_y
+    disp_x = disp_x
+  [../]
+[]
+
+[ICs]
+  [./temp_IC]
+    variable = temp
+    type = ConstantIC
+    value = 0
+  [../]
+[]
+
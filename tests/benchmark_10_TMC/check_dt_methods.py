@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+
+''' Check the time step histories of bench_TMC_J2_dt.i run with the
+    threshold and predictive methods of ReturnMapIterDT (see
+    ../timestepper/time_step_checks.py) and write the results to
+    dt_methods_checks.txt.
+'''
+
+import os, sys
+sys.path.append(os.path.join('..', 'timestepper'))
+from time_step_checks import writeChecks
+
+if __name__ == '__main__':
+  writeChecks([('threshold', 'bench_TMC_J2_threshold_dt_out.csv',
+                dict(method='threshold', end_time=1e-2, dt_min=1e-5, dt_max=1e-2, ratio=0.5, max_iter=20)),
+               ('predictive', 'bench_TMC_J2_predictive_dt_out.csv',
+                dict(method='predictive', end_time=1e-2, dt_min=1e-5, dt_max=1e-2))],
+              'dt_methods_checks.txt')
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+
+''' Trace the lumped Gruntfest S-curve with a stub executable: one segment
+    from the lower branch through the fold and one from the upper branch,
+    at the same time, and write the branch points and folds as text files.
+'''
+
+import os, sys, shutil
+sys.path.append(os.path.join('..', '..', 'scripts'))
+import arclength_continuation
+
+def writeTable(filename, rows, columns):
+  with open(filename, 'w') as f:
+    f.write(' '.join(columns) + '\n')
+    for row in rows:
+      f.write(' '.join('{0:.6g}'.format(row[column]) for column in columns) + '\n')
+
+if __name__ == '__main__':
+  if os.path.isdir('continuation'):
+    shutil.rmtree('continuation')
+  with open('upper_branch.e', 'w') as f:
+    f.write('3.5771520639573 0.1\n') # T*exp(-T) = 0.1
+  executable = '{0} {1}'.format(sys.executable, os.path.realpath('stub_redback.py'))
+  segments = [arclength_continuation.parseSegmentSpec('0.05,0.05'),
+              arclength_continuation.parseSegmentSpec('0.1,0.02,upper_branch.e')]
+  states = arclength_continuation.runContinuation('gruntfest_continuation.i', segments, 'continuation', slots=2,
+                                                  executable=executable, max_steps=30, ds_max=0.3,
+                                                  lambda_min=0.03, lambda_max=1.)
+  points = [dict(point['values'], segment=index, step=point['step'], ds=point['ds'], nl_its=point['nl_its'])
+            for (index, state) in enumerate(states) for point in state['points']]
+  writeTable('continuation_points.txt', points, ['segment', 'step', 'ds', 'nl_its', 'lambda', 'max_temp'])
+  folds = [dict(fold, segment=index) for (index, state) in enumerate(states) for fold in state['folds']]
+  writeTable('continuation_folds.txt', folds, ['segment', 'step', 'lambda', 'max_temp'])
@@ -0,0 +1,175 @@
+# Pseudo-arclength continuation of the Gruntfest problem (benchmark_1_T) on
+# the Gruebner number. One continuation point per run, run through
+# scripts/arclength_continuation.py which sets the ScalarKernels/continuation,
+# AuxScalarKernels/tangent and UserObjects/old(er)_solution parameters.
+[Mesh]
+  type = GeneratedMesh
+  dim = 1
+  nx = 10
+  xmin = -1
+[]
+
+[Variables]
+  [./temp]
+  [../]
+  [./lambda]
+    family = SCALAR
+    order = FIRST
+  [../]
+[]
+
+[AuxVariables]
+  [./temp_old]
+  [../]
+  [./temp_older]
+  [../]
+  [./temp_increment]
+  [../]
+  [./directional_derivative]
+    family = SCALAR
+    order = FIRST
+  [../]
+[]
+
+[Kernels]
+  [./diff_temp]
+    type = Diffusion
+    variable = temp
+  [../]
+  [./mh_temp]
+    type = RedbackMechDissip
+    variable = temp
+  [../]
+[]
+
+[ScalarKernels]
+  [./continuation]
+    type = RedbackContinuation
+    variable = lambda
+    directional_derivative = directional_derivative
+    ds = 0
+    ds_old = 1
+    continuation_parameter_old = 1
+    continuation_parameter_older = 0
+  [../]
+[]
+
+[AuxKernels]
+  [./temp_old]
+    type = SolutionAux
+    variable = temp_old
+    solution = old_solution
+  [../]
+  [./temp_older]
+    type = SolutionAux
+    variable = temp_older
+    solution = older_solution
+  [../]
+  [./temp_increment]
+    type = ParsedAux
+    variable = temp_increment
+    args = 'temp temp_old'
+    function = 'temp - temp_old'
+  [../]
+[]
+
+[AuxScalarKernels]
+  [./tangent]
+    type = RedbackContinuationTangentAux
+    variable = directional_derivative
+    sum_var_1 = temp
+    sum_var_old_1 = temp_old
+    sum_var_older_1 = temp_older
+    ds_old = 1
+  [../]
+[]
+
+[UserObjects]
+  [./old_solution]
+    type = SolutionUserObject
+    mesh = gruntfest_initial.e # replaced by the previous point
+    system_variables = temp
+    timestep = LATEST
+  [../]
+  [./older_solution]
+    type = SolutionUserObject
+    mesh = gruntfest_initial.e # replaced by the point before the previous one
+    system_variables = temp
+    timestep = LATEST
+  [../]
+[]
+
+[Functions]
+  [./old_solution_function]
+    type = SolutionFunction
+    solution = old_solution
+  [../]
+[]
+
+[ICs]
+  [./temp_ic]
+    type = FunctionIC
+    variable = temp
+    function = old_solution_function
+  [../]
+[]
+
+[BCs]
+  [./left_temp]
+    type = DirichletBC
+    variable = temp
+    boundary = left
+    value = 0
+  [../]
+  [./right_temp]
+    type = DirichletBC
+    variable = temp
+    boundary = right
+    value = 0
+  [../]
+[]
+
+[Materials]
+  [./adim_rock]
+    type = RedbackMaterial
+    block = 0
+    ar = 10
+    gr = 1 # multiplied by the continuation parameter
+    continuation_parameter = lambda
+    continuation_variable = Gruntfest
+    pore_pres = 0
+    temperature = temp
+    ref_lewis_nb = 1
+    ar_F = 40
+    ar_R = 1
+    phi0 = 0.1
+  [../]
+[]
+
+[Postprocessors]
+  [./max_temp]
+    type = NodalMaxValue
+    variable = temp
+  [../]
+  [./nl_its]
+    type = NumNonlinearIterations
+  [../]
+  [./increment_norm] # length of the secant to the previous point
+    type = NodalL2Norm
+    variable = temp_increment
+  [../]
+[]
+
+[Executioner]
+  type = Steady
+  petsc_options_iname = '-pc_type -pc_hypre_type'
+  petsc_options_value = 'hypre boomeramg'
+  nl_abs_tol = 1e-10
+[]
+
+[Outputs]
+  file_base = gruntfest_continuation
+  exodus = true
+  csv = true
+  checkpoint = true
+[]
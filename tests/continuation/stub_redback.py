@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+
+''' Stand-in for the redback executable, used to test
+    arclength_continuation.py without building the application. Solves
+    the lumped Gruntfest (Semenov) problem lambda*exp(T) = T for T and
+    lambda together with the pseudo-arclength equation of
+    RedbackContinuation, reading the old and older solutions and the
+    checkpoint given on the command line, and writes csv, "exodus" and
+    checkpoint files (plain text).
+'''
+
+import os, re, sys, math
+
+def readState(filename):
+  ''' (temperature, lambda) of a solution file, zero if there is none '''
+  if not os.path.isfile(filename):
+    return (0., 0.)
+  with open(filename) as f:
+    return tuple(float(value) for value in f.read().split())
+
+def writeState(filename, state):
+  with open(filename, 'w') as f:
+    f.write('{0!r} {1!r}\n'.format(*state))
+
+if __name__ == '__main__':
+  params = {'Outputs/file_base':'gruntfest_continuation'}
+  for arg in sys.argv[1:]:
+    if re.match(r'^\w[\w./]*=', arg):
+      (name, value) = arg.split('=', 1)
+      params[name] = value
+  kernel = 'ScalarKernels/continuation/'
+  (ds, ds_old) = (float(params[kernel + 'ds']), float(params[kernel + 'ds_old']))
+  (l_old, l_older) = (float(params[kernel + 'continuation_parameter_old']),
+                      float(params[kernel + 'continuation_parameter_older']))
+  (t_old, dummy) = readState(params.get('UserObjects/old_solution/mesh', ''))
+  (t_older, dummy) = readState(params.get('UserObjects/older_solution/mesh', ''))
+  if 'Problem/restart_file_base' in params:
+    (t, l) = readState(params['Problem/restart_file_base'] + '.xdr')
+  else:
+    (t, l) = (t_old, l_old) # initial condition from the old solution
+  # Newton on (lambda*exp(T) - T, tangent.(x - x_old) - ds)
+  converged = False
+  for it in range(10):
+    r1 = l*math.exp(t) - t
+    r2 = (t - t_old)*(t_old - t_older)/ds_old + (l_old - l_older)/ds_old*(l - l_old) - ds
+    norm = math.sqrt(r1*r1 + r2*r2)
+    print '{0:2d} Nonlinear |R| = {1:e}'.format(it, norm)
+    if norm < 1e-12:
+      converged = True
+      break
+    (a, b) = (l*math.exp(t) - 1, math.exp(t))
+    (c, d) = ((t_old - t_older)/ds_old, (l_old - l_older)/ds_old)
+    det = a*d - b*c
+    if det == 0:
+      break
+    t -= (d*r1 - b*r2)/det
+    l -= (a*r2 - c*r1)/det
+  if not converged:
+    print 'Solve Did NOT Converge!'
+    sys.exit(0)
+  file_base = params['Outputs/file_base']
+  with open(file_base + '.csv', 'w') as f:
+    f.write('time,increment_norm,lambda,max_temp\n0,0,0,0\n1,{0!r},{1!r},{2!r}\n'.format(abs(t - t_old), l, t))
+  writeState(file_base + '.e', (t, l))
+  os.makedirs(file_base + '_cp')
+  writeState(os.path.join(file_base + '_cp', '0001.xdr'), (t, l))
+  writeState(os.path.join(file_base + '_cp', '0001_mesh.cpr'), (t, l))
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+
+''' Stand-in for the redback executable, used to test convergence_study.py
+    without building the application. Reads the input file and the
+    command-line overrides and writes <Outputs/file_base>.csv with
+    middle_temp = time*(1 + h^2 + (dt/0.1)^2) on [0, 1], h = 2^-uniform_refine,
+    and the number of elements of the refined mesh (Mesh/nx).
+    Fails for the uniform_refine given in the STUB_FAIL_REFINE environment
+    variable.
+'''
+
+import os, sys, re
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'parameter_sweep'))
+from stub_redback import readInputParameters
+
+if __name__ == '__main__':
+  args = sys.argv[1:]
+  params = readInputParameters(args[args.index('-i') + 1])
+  for arg in args:
+    if re.match(r'^\w[\w./]*=', arg):
+      (name, value) = arg.split('=', 1)
+      params[name] = value
+  refine = int(params.get('Mesh/uniform_refine', 0))
+  if str(refine) == os.environ.get('STUB_FAIL_REFINE'):
+    print 'stub run failed with uniform_refine={0}'.format(refine)
+    sys.exit(1)
+  dt = float(params['Executioner/TimeStepper/dt'])
+  nb_elems = int(params['Mesh/nx'])*2**refine
+  with open(params['Outputs/file_base'] + '.csv', 'w') as f:
+    f.write('time,convergence_nb_elems,middle_temp\n')
+    for step in range(int(round(1/dt)) + 1):
+      time = step*dt
+      f.write('{0:.12g},{1},{2:.12g}\n'.format(time, nb_elems, time*(1 + 4.**-refine + (dt/0.1)**2)))
+  print 'stub run with uniform_refine={0} dt={1}'.format(refine, dt)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+''' Run small convergence studies of benchmark_1_T with a stub executable
+    and write the errors, the observed orders and the chosen level of each
+    study in a text file:
+      - mesh and time step refined against an analytical reference, with a
+        failed level (the orders are fitted over the successful levels)
+      - mesh only, against the finest level (no time step in the results)
+      - time step refinement of an input with an adaptive TimeStepper (error)
+'''
+
+import os, sys
+sys.path.append(os.path.join('..', '..', 'scripts'))
+import convergence_study
+
+def writeStudy(f, title, output_dir, study):
+  (levels, columns, norms, orders, global_orders, optimal, extra_levels) = study
+  f.write(title + '\n')
+  with open(os.path.join(output_dir, 'convergence.csv')) as csv:
+    names = csv.readline().strip().split(',')
+    f.write(' '.join(name for name in names if name != 'wall_time') + '\n')
+    for line in csv:
+      values = line.strip().split(',')
+      # the dt column stays empty when the time step is not refined
+      f.write(' '.join(value or '-' for (name, value) in zip(names, values) if name != 'wall_time') + '\n')
+  f.write('chosen level: {0}, extra levels: {1}\n'.format(optimal['name'] if optimal else None, extra_levels))
+
+if __name__ == '__main__':
+  executable = '{0} {1}'.format(sys.executable, os.path.realpath('stub_redback_levels.py'))
+  base_input = os.path.join('..', 'benchmark_1_T', 'bench1_a.i')
+  with open('analytical.csv', 'w') as f:
+    f.write('time,middle_temp\n')
+    for time in [0, 0.25, 0.5, 0.75, 1]:
+      f.write('{0},{0}\n'.format(time))
+  with open('study_results.txt', 'w') as f:
+    os.environ['STUB_FAIL_REFINE'] = '2'
+    study = convergence_study.runConvergenceStudy(base_input, 4, 'both', reference=os.path.realpath('analytical.csv'),
+                                                  tolerance=0.1, output_dir='study_both', executable=executable,
+                                                  slots=2, force=True)
+    writeStudy(f, 'both, analytical reference, level 2 failed', 'study_both', study)
+    del os.environ['STUB_FAIL_REFINE']
+    study = convergence_study.runConvergenceStudy(base_input, 4, 'space', tolerance=1e-3, output_dir='study_space',
+                                                  executable=executable, slots=2, force=True)
+    writeStudy(f, 'space, finest reference', 'study_space', study)
+    try:
+      convergence_study.buildLevels(os.path.join('..', 'timestepper', 'timestepper.i'), 2, 'time')
+      f.write('time ladder with ReturnMapIterDT: no error\n')
+    except Exception, e:
+      f.write('time ladder with ReturnMapIterDT: {0}\n'.format(e))
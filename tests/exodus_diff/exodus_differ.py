@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+''' Check that ExodusDiffer (PyExodiff tester) accepts an identical copy of
+    a gold Exodus file, and rejects a copy in which one value of the
+    temperature is perturbed unless the tolerance of this variable allows it.
+'''
+
+import os, sys, shutil, struct
+sys.path.append(os.path.join('..', '..', 'python', 'TestHarness', 'testers'))
+from ExodusDiffer import ExodusDiffer, parseTolerances
+from exodus import ExodusFile
+
+GOLD_FILENAME = os.path.join('..', 'timestepper', 'gold', 'timestep_out.e')
+PERTURBATION = 1e-3 # relative
+
+def perturbNodalValue(filename, name, point, step, factor):
+  ''' Multiply the value of a nodal variable at the node closest to point in
+      place, in the file (big-endian netCDF data) '''
+  with ExodusFile(filename) as exodus:
+    node = exodus.nearestNode(point)
+    step = range(exodus.nbTimeSteps())[step] # negative index counted from the last step
+    variable = exodus.variables['vals_nod_var{0}'.format(exodus.nodalVariableNames().index(name) + 1)]
+    offset = variable.begin + step*exodus.record_size + node*variable.dtype.itemsize
+    value = exodus.nodalVariable(name, step)[node]
+  with open(filename, 'r+b') as f:
+    f.seek(offset)
+    f.write(struct.pack('>d', value*factor))
+
+def checkResult(f, description, message, should_pass):
+  result = 'passed' if not message else 'failed'
+  f.write('{0}: {1} ({2})\n'.format(description, result, 'expected' if bool(message) != should_pass else 'UNEXPECTED'))
+
+if __name__ == '__main__':
+  shutil.copy(GOLD_FILENAME, 'identical.e')
+  shutil.copy(GOLD_FILENAME, 'perturbed.e')
+  perturbNodalValue('perturbed.e', 'temp', (0, 0, 0), -1, 1 + PERTURBATION)
+  with open('exodus_differ.txt', 'w') as f:
+    checkResult(f, 'identical copy', ExodusDiffer(GOLD_FILENAME, 'identical.e').diff(), True)
+    message = ExodusDiffer(GOLD_FILENAME, 'perturbed.e').diff()
+    checkResult(f, 'perturbed copy', message, False)
+    f.write('difference reported for temp: {0}\n'.format('temp' in message))
+    checkResult(f, 'perturbed copy, temp:1e-2 tolerance',
+                ExodusDiffer(GOLD_FILENAME, 'perturbed.e', tolerances=parseTolerances(['temp:1e-2'])).diff(), True)
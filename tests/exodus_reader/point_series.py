@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+
+''' Read the time series of the temperature at the centre of the domain
+    from the gold Exodus file of the timestepper test with
+    readExodusPointSeries, and compare it with the temp_centre
+    postprocessor (PointValue) of the gold csv file of the same run.
+'''
+
+import os, sys
+import numpy as np
+sys.path.append(os.path.join('..', '..', 'doc', 'theory', 'data', 'create_figures'))
+from utilities import readExodusPointSeries, parseCsv
+
+GOLD_DIR = os.path.join('..', 'timestepper', 'gold')
+TOLERANCE = 1e-12
+
+if __name__ == '__main__':
+  exodus_data = readExodusPointSeries(os.path.join(GOLD_DIR, 'timestep_out.e'), ['temp'], (0, 0, 0))
+  csv_data = parseCsv(os.path.join(GOLD_DIR, 'timestep_out.csv'), ['time', 'temp_centre'])
+  with open('point_series.txt', 'w') as f:
+    f.write('time temp\n')
+    for (time, temp) in zip(exodus_data['time'], exodus_data['temp']):
+      f.write('{0:.12g} {1:.12g}\n'.format(time, temp))
+    same_times = len(exodus_data['time']) == len(csv_data['time']) and \
+      np.allclose(exodus_data['time'], csv_data['time'], rtol=0, atol=TOLERANCE)
+    f.write('same times as csv: {0}\n'.format(same_times))
+    same_values = same_times and np.allclose(exodus_data['temp'], csv_data['temp_centre'], rtol=0, atol=TOLERANCE)
+    f.write('same values as csv: {0}\n'.format(same_values))
@@ -0,0 +1,14 @@
+#!/usr/bin/env python
+
+''' Same as mesh_generation_step2.i without redback: write the IDs of the
+    elements below the threshold of the image stack to idfile_from_images.txt
+'''
+
+import os, sys
+sys.path.append(os.path.join('..', '..', 'scripts'))
+import image_subdomain
+
+if __name__ == '__main__':
+  nb_ids = image_subdomain.writeImageSubdomainFile('gold/1block_mesh.e', 'stack/test_0', 'idfile_from_images.txt',
+                                                   threshold=90, value=0, block=0, file_range=(0, 3))
+  print 'End of second step, created file "idfile_from_images.txt" with {0} unique sorted indices'.format(nb_ids)
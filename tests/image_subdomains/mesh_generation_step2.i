@@ -1,5 +1,5 @@
 # second step of creating a mesh from CT scan image
-# This generates the file `idfile.txt` containing the list of element ids of the subdomain.
+# This generates the file `idfile.txt` containing the sorted list of unique element ids of the subdomain.
 
 [Mesh]
   type = FileMesh
@@ -32,11 +32,12 @@
   [../]
 []
 
-[Materials]
+[UserObjects]
   [./idfile_writer]
-    type = ImageProcessing
+    type = ElementIdFileWriter
     block = 0
     function = image_func
+    file = idfile.txt
   [../]
 []
 
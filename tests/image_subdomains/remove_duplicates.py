@@ -1,23 +1,46 @@
 #!/usr/bin/env python
 
-''' script to remove duplicates from file '''
-
-import os, sys, shutil
-
-input_filename = 'gold/idfile.txt'
-output_filename = 'idfile_unique.txt'
-
-with open(input_filename, 'rb') as f_in:
-    lines = f_in.readlines()
-
-# Remove duplicates
-assert len(lines) == 1
-tmp = lines[0].split()
-tmp2 = list(set(tmp))
-
-new_txt = ' '.join(sorted(tmp2, key=float))
-
-with open(output_filename, 'wb') as f_out:
-    f_out.write(new_txt)
-
-print 'End of third step, created file "{0}" with unique indices'.format(output_filename)
+''' script to remove duplicates from a file of element ids.
+    Not needed anymore with ElementIdFileWriter (mesh_generation_step2.i),
+    which directly writes unique sorted ids, but kept for files written by
+    the ImageProcessing material.
+    The file is read by chunks so that its size is not limited by memory
+    (only the unique ids are kept).
+    Usage: python remove_duplicates.py [input file] [output file]
+'''
+
+import sys
+import numpy as np
+
+CHUNK_SIZE = 16*1024*1024 # bytes read at once
+
+def readUniqueIds(input_filename, chunk_size=CHUNK_SIZE):
+    ''' Return sorted numpy array of the unique ids of a whitespace separated file '''
+    unique_ids = np.array([], dtype=np.int64)
+    rest = ''
+    with open(input_filename, 'rb') as f_in:
+        while True:
+            block = f_in.read(chunk_size)
+            tokens = (rest + block).split()
+            # the last id may continue in the next chunk
+            rest = tokens.pop() if block and tokens and not block[-1:].isspace() else ''
+            if tokens:
+                ids = np.array(tokens, dtype=np.int64)
+                unique_ids = np.union1d(unique_ids, ids)
+            if not block:
+                break
+    return unique_ids
+
+def writeIds(output_filename, ids, chunk_size=1024*1024):
+    ''' Write ids separated by spaces (no newline at the end) '''
+    with open(output_filename, 'wb') as f_out:
+        for start in range(0, len(ids), chunk_size):
+            if start:
+                f_out.write(' ')
+            f_out.write(' '.join(map(str, ids[start:start + chunk_size])))
+
+if __name__ == '__main__':
+    input_filename = sys.argv[1] if len(sys.argv) > 1 else 'idfile_with_duplicates.txt'
+    output_filename = sys.argv[2] if len(sys.argv) > 2 else 'idfile_unique.txt'
+    writeIds(output_filename, readUniqueIds(input_filename))
+    print 'End of third step, created file "{0}" with unique indices'.format(output_filename)
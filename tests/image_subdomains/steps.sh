@@ -5,7 +5,8 @@
 ~/projects/redback/redback-opt -i mesh_generation_step1.i > result.txt
 echo  end of first step, created adapted 1block mesh
 ~/projects/redback/redback-opt -i mesh_generation_step2.i >> result.txt
-echo  end of second step, created file "idfile.txt"
-python remove_duplicates.py
-~/projects/redback/redback-opt -i mesh_generation_step3.i >> result.txt
+echo  end of second step, created file "idfile.txt" with unique sorted indices
+# the second step can also be done without redback (no application launch for large images):
+# python ../../scripts/image_subdomain.py 1block_mesh.e stack/test_0 --threshold 90 --block 0 --output idfile.txt
+~/projects/redback/redback-opt -i mesh_generation_step3.i MeshModifiers/subdomain/file=idfile.txt >> result.txt
 echo  end of last step, created adapted 2blocks mesh
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+''' Stand-in for the redback executable, used to test parameter_sweep.py
+    without building the application. Reads the input file and the
+    command-line overrides the same way as redback and writes a small csv
+    file (<Outputs/file_base>.csv) depending on Materials/adim_rock/gr and
+    Executioner/TimeStepper/dt.
+'''
+
+import sys, re
+
+def readInputParameters(filename):
+  ''' Parameters of an input file (GetPot format)
+      @return dictionary (key=Block/.../param, value=string)
+  '''
+  params = {}
+  stack = []
+  with open(filename) as f:
+    for line in f:
+      line = line.split('#', 1)[0].strip()
+      if line in ('[]', '[../]'):
+        stack = stack[:-1]
+      elif line.startswith('[') and line.endswith(']'):
+        stack.append(line[1:-1].replace('./', ''))
+      elif '=' in line:
+        (name, value) = line.split('=', 1)
+        params['/'.join(stack + [name.strip()])] = value.strip().strip("'")
+  return params
+
+if __name__ == '__main__':
+  args = sys.argv[1:]
+  params = readInputParameters(args[args.index('-i') + 1])
+  for arg in args:
+    if re.match(r'^\w[\w./]*=', arg):
+      (name, value) = arg.split('=', 1)
+      params[name] = value
+  gr = float(params['Materials/adim_rock/gr'])
+  dt = float(params['Executioner/TimeStepper/dt'])
+  with open(params['Outputs/file_base'] + '.csv', 'w') as f:
+    f.write('time,middle_temp\n')
+    for step in range(4):
+      f.write('{0:.12g},{1:.12g}\n'.format(step*dt, gr*1e6*step*dt))
+  print 'stub run with gr={0} dt={1}'.format(gr, dt)
@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+
+''' Run a small parameter sweep of benchmark_1_T with a stub executable,
+    once with command-line overrides and once with one input file per
+    variant, and write the gathered results as text files.
+'''
+
+import os, sys
+sys.path.append(os.path.join('..', '..', 'scripts'))
+import parameter_sweep
+
+def writeResults(output_dir, filename):
+  (column_names, columns) = parameter_sweep.loadResults(output_dir)
+  with open(filename, 'w') as f:
+    f.write(' '.join(column_names) + '\n')
+    for i in range(len(columns['variant'])):
+      f.write(' '.join(str(columns[name][i]) for name in column_names) + '\n')
+
+if __name__ == '__main__':
+  executable = '{0} {1}'.format(sys.executable, os.path.realpath('stub_redback.py'))
+  grid = [parameter_sweep.parseParameterSpec('Materials/adim_rock/gr=4e-6,5e-6'),
+          parameter_sweep.parseParameterSpec('Executioner/TimeStepper/dt=0.5:1:2')]
+  base_input = os.path.join('..', 'benchmark_1_T', 'bench1_a.i')
+  parameter_sweep.runSweep(base_input, grid, 'sweep_cli', executable, slots=2, force=True)
+  writeResults('sweep_cli', 'sweep_cli_results.txt')
+  parameter_sweep.runSweep(base_input, grid, 'sweep_inputs', executable, slots=2, write_inputs=True, force=True)
+  writeResults('sweep_inputs', 'sweep_inputs_results.txt')
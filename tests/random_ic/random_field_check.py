@@ -0,0 +1,22 @@
+#!/usr/bin/env python
+
+''' Write the correlated random field file random_field.bin read by
+    random_field_ic.i, and random_field_check.txt with counter-based numbers
+    (same as RedbackRandom::uniform) and values of the field at a few points
+'''
+
+import os, sys
+sys.path.append(os.path.join('..', '..', 'scripts'))
+import random_field
+
+if __name__ == '__main__':
+  (mean, std) = random_field.generateRandomFieldFile('random_field.bin', [16, 16], [1./15, 1./15], 0.2, seed=5)
+  points = [[0.3, 0.7, 0.], [0., 0., 0.], [1., 1., 0.], [0.55, 0.25, 0.], [2., -1., 0.]]
+  with open('random_field_check.txt', 'w') as f:
+    f.write('mean {0:.6f} std {1:.6f}\n'.format(mean, std))
+    for (point, key, counter, field) in zip(points, random_field.pointKeys(points),
+                                            random_field.counterUniform(7, random_field.pointKeys(points)),
+                                            random_field.sampleRandomField('random_field.bin', points)):
+      f.write('point {0} key {1} counter {2:.6f} field {3:.6f}\n'.format(' '.join(map(str, point)), key, counter,
+                                                                        field))
+  print 'Created files "random_field.bin" and "random_field_check.txt"'
@@ -0,0 +1,66 @@
+# Random initial condition interpolated in the correlated random field file
+# written by random_field_check.py (see scripts/random_field.py)
+[Mesh]
+  type = GeneratedMesh
+  dim = 2
+  nx = 10
+  ny = 10
+[]
+
+[Variables]
+  [./w]
+  [../]
+[]
+
+[Functions]
+  [./w_function]
+    type = ParsedFunction
+    value = '1'
+  [../]
+[]
+
+[ICs]
+  [./w_ic]
+    type = FunctionTimesRandomIC
+    variable = w
+    function = w_function
+    min = -1
+    max = 1
+    field_file = random_field.bin
+  [../]
+[]
+
+[Kernels]
+  [./td_w]
+    type = TimeDerivative
+    variable = w
+  [../]
+[]
+
+[Postprocessors]
+  [./point_w]
+    type = PointValue
+    variable = w
+    point = '0.3 0.7 0'
+  [../]
+  [./max_w]
+    type = NodalMaxValue
+    variable = w
+  [../]
+  [./sum_w]
+    type = NodalSum
+    variable = w
+  [../]
+[]
+
+[Executioner]
+  type = Transient
+  num_steps = 1
+  dt = 1
+[]
+
+[Outputs]
+  file_base = random_field_ic_out
+  csv = true
+  execute_on = TIMESTEP_END
+[]
@@ -0,0 +1,96 @@
+# Counter-based random initial conditions: the values only depend on the seed
+# and on the coordinates of the nodes, so that the results are the same for
+# any number of processes and threads (see the parallel test).
+[Mesh]
+  type = GeneratedMesh
+  dim = 2
+  nx = 10
+  ny = 10
+[]
+
+[Variables]
+  [./u]
+  [../]
+  [./v]
+  [../]
+[]
+
+[Functions]
+  [./u_function]
+    type = ParsedFunction
+    value = 'x'
+  [../]
+  [./v_function]
+    type = ParsedFunction
+    value = '1+y'
+  [../]
+[]
+
+[ICs]
+  [./u_ic]
+    type = FunctionWithRandomIC
+    variable = u
+    function = u_function
+    min = -1
+    max = 1
+    seed = 7
+    generator = counter
+  [../]
+  [./v_ic]
+    type = FunctionTimesRandomIC
+    variable = v
+    function = v_function
+    min = 0
+    max = 2
+    seed = 3
+    generator = counter
+  [../]
+[]
+
+[Kernels]
+  [./td_u]
+    type = TimeDerivative
+    variable = u
+  [../]
+  [./td_v]
+    type = TimeDerivative
+    variable = v
+  [../]
+[]
+
+[Postprocessors]
+  [./point_u]
+    type = PointValue
+    variable = u
+    point = '0.3 0.7 0'
+  [../]
+  [./point_v]
+    type = PointValue
+    variable = v
+    point = '0.3 0.7 0'
+  [../]
+  [./max_u]
+    type = NodalMaxValue
+    variable = u
+  [../]
+  [./sum_u]
+    type = NodalSum
+    variable = u
+  [../]
+  [./sum_v]
+    type = NodalSum
+    variable = v
+  [../]
+[]
+
+[Executioner]
+  type = Transient
+  num_steps = 1
+  dt = 1
+[]
+
+[Outputs]
+  file_base = random_ic_out
+  csv = true
+  execute_on = TIMESTEP_END
+[]
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+''' Check the time step histories of the ReturnMapIterDT runs (threshold
+    and predictive methods) and write the results to time_step_checks.txt.
+    The checks do not depend on the exact number of steps (printed for the
+    comparison of the methods):
+    - the run reaches end_time,
+    - dt stays in [dt_min, dt_max] (except the last step, cut to end_time),
+    - threshold: dt is at least divided by 1/ratio after a step above
+      max_iter and grows by 1/ratio at most,
+    - predictive: dt grows by max_growth at most.
+'''
+
+import os, sys
+import numpy as np
+sys.path.append(os.path.join('..', '..', 'scripts'))
+from parameter_sweep import readCsvColumns
+
+TOLERANCE = 1e-9 # relative
+
+def checkTimeSteps(csv_filename, method, end_time, dt_min, dt_max, ratio=None, max_iter=None,
+                   max_growth=2., iter_column='max_returnmap_iter'):
+  ''' Check the time step history of a ReturnMapIterDT run
+      @param[in] csv_filename - string, csv file with time, timestep
+        (TimestepSize) and iter_column postprocessors
+      @return (number of steps, list of (check name, boolean))
+  '''
+  (columns, values) = readCsvColumns(csv_filename)
+  steps = values[values[:, columns.index('time')] > 0]
+  time = steps[:, columns.index('time')]
+  dt = steps[:, columns.index('timestep')]
+  (dt_prev, dt_next) = (dt[:-1], dt[1:])
+  checks = [('reaches end_time', abs(time[-1] - end_time) <= TOLERANCE*end_time),
+            ('dt in [dt_min, dt_max]', bool(np.all(dt[:-1] >= dt_min*(1 - TOLERANCE)) and
+                                            np.all(dt[:-1] <= dt_max*(1 + TOLERANCE))))]
+  if method == 'threshold':
+    iters = steps[:-1, columns.index(iter_column)]
+    above = iters > max_iter
+    reduced = dt_next[above] <= np.maximum(ratio*dt_prev[above], dt_min)*(1 + TOLERANCE)
+    checks += [('dt reduced above max_iter', bool(np.all(reduced))),
+               ('dt growth at most 1/ratio', bool(np.all(dt_next <= dt_prev/ratio*(1 + TOLERANCE))))]
+  else:
+    checks += [('dt growth at most max_growth', bool(np.all(dt_next <= dt_prev*max_growth*(1 + TOLERANCE))))]
+  return (len(steps), checks)
+
+def writeChecks(runs, filename):
+  ''' Check runs (list of (name, csv filename, keyword arguments of
+      checkTimeSteps)), write the results to filename and print the number
+      of steps of each run '''
+  with open(filename, 'w') as f:
+    for (name, csv_filename, kwargs) in runs:
+      (nb_steps, checks) = checkTimeSteps(csv_filename, **kwargs)
+      print '{0}: {1} steps'.format(name, nb_steps)
+      for (check, passed) in checks:
+        f.write('{0}: {1}: {2}\n'.format(name, check, 'passed' if passed else 'FAILED'))
+
+if __name__ == '__main__':
+  writeChecks([('threshold', 'timestep_out.csv',
+                dict(method='threshold', end_time=3e-2, dt_min=1e-5, dt_max=1e-1, ratio=0.5, max_iter=20)),
+               ('predictive', 'timestep_predictive_out.csv',
+                dict(method='predictive', end_time=3e-2, dt_min=1e-5, dt_max=1e-1))],
+              'time_step_checks.txt')
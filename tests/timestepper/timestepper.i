@@ -313,6 +313,14 @@
   [../]
 []
 
+[UserObjects]
+  # used by the predictive method of ReturnMapIterDT (test_timestep_predictive)
+  [./returnmap_stats]
+    type = ReturnMapIterStatistics
+    block = 0
+  [../]
+[]
+
 [Preconditioning]
   # active = ''
   [./SMP]
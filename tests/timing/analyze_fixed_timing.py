@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+
+''' Run analyze_timing.py on fixed timing files of two ranks: the
+    computeProperties counter of rank 1 takes twice as long (self time
+    outside of its returnMap child), which must show in the rank totals and
+    be flagged as load imbalance. Writes the summaries of the last step and
+    of the time since step 1, and the folded stacks.
+'''
+
+import os, sys
+sys.path.append(os.path.join('..', '..', 'scripts'))
+import analyze_timing
+
+def writeSummary(f, step=None, since=None):
+  (step, timings) = analyze_timing.readTimings('fixed_timing', step, since)
+  tree = analyze_timing.buildTree(timings)
+  stdout = sys.stdout
+  sys.stdout = f
+  try:
+    print 'Time step {0}, since {1}'.format(step, since)
+    flagged = analyze_timing.printTree(tree)
+    analyze_timing.printRankTotals(tree)
+    print 'Flagged: ' + ', '.join(';'.join(path) for path in sorted(flagged))
+  finally:
+    sys.stdout = stdout
+  return tree
+
+if __name__ == '__main__':
+  with open('analyze_timing.txt', 'w') as f:
+    tree = writeSummary(f)
+    writeSummary(f, since=1)
+  analyze_timing.writeFolded(tree, 'folded_timing.txt')
@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+
+''' Check the timing files written by RedbackTimingOutput in timing.i: the
+    counters of the instrumented material and kernels must be present and
+    called at the last time step. Writes the sorted counter names (the times
+    themselves are not reproducible).
+'''
+
+import os, sys
+sys.path.append(os.path.join('..', '..', 'scripts'))
+import analyze_timing
+
+if __name__ == '__main__':
+  (step, timings) = analyze_timing.readTimings('timing')
+  with open('timing_counters.txt', 'w') as f:
+    for counter in sorted(timings):
+      called = all(calls > 0 for (calls, seconds) in timings[counter])
+      f.write('{0} {1}\n'.format(counter, 'called' if called else 'NOT CALLED'))
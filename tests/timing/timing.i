@@ -0,0 +1,120 @@
+# benchmark_5_TC with the exothermic kernel and the timing of the
+# instrumented materials and kernels (timing.rank<N>.csv)
+[Mesh]
+  type = GeneratedMesh
+  dim = 1
+  nx = 10
+  xmin = -1
+[]
+
+[Variables]
+  [./temp]
+  [../]
+[]
+
+[AuxVariables]
+  [./total_porosity]
+    order = FIRST
+    family = MONOMIAL
+  [../]
+[]
+
+[Kernels]
+  [./td_temp]
+    type = TimeDerivative
+    variable = temp
+  [../]
+  [./diff_temp]
+    type = Diffusion
+    variable = temp
+  [../]
+  [./mh_temp]
+    type = RedbackMechDissip
+    variable = temp
+  [../]
+  [./chem_endo]
+    type = RedbackChemEndo
+    variable = temp
+  [../]
+  [./chem_exo]
+    type = RedbackChemExo
+    variable = temp
+  [../]
+[]
+
+[AuxKernels]
+  [./total_porosity]
+    type = RedbackTotalPorosityAux
+    variable = total_porosity
+  [../]
+[]
+
+[BCs]
+  [./left_temp]
+    type = DirichletBC
+    variable = temp
+    boundary = left
+    value = 0
+  [../]
+  [./right_temp]
+    type = DirichletBC
+    variable = temp
+    boundary = right
+    value = 0
+  [../]
+[]
+
+[Materials]
+  [./adim_rock]
+    type = RedbackMaterial
+    block = 0
+    Aphi = 0
+    ar = 10
+    ar_F = 20
+    ar_R = 10
+    da_endo = 1
+    gr = 9.08e-5 # 2*exp(-Ar), Ar=10
+    is_mechanics_on = false
+    is_chemistry_on = true
+    alpha_2 = 1
+    mu = 1e-3
+    ref_lewis_nb = 1
+    temperature = temp
+    total_porosity = total_porosity
+  [../]
+[]
+
+[UserObjects]
+  [./timing]
+    type = RedbackTimingOutput
+    file_base = timing
+    execute_on = timestep_end
+  [../]
+[]
+
+[Executioner]
+  type = Transient
+  num_steps = 5
+  petsc_options_iname = '-pc_type -pc_hypre_type'
+  petsc_options_value = 'hypre boomeramg'
+  scheme = bdf2
+  [./TimeStepper]
+    type = ConstantDT
+    dt = 1e-2
+  [../]
+[]
+
+[Outputs]
+  console = true
+  execute_on = TIMESTEP_END
+  file_base = timing_out
+[]
+
+[ICs]
+  [./temp_ic]
+    variable = temp
+    value = 0
+    type = ConstantIC
+    block = 0
+  [../]
+[]
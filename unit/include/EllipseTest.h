@@ -38,6 +38,7 @@ class EllipseTest : public CppUnit::TestFixture
   CPPUNIT_TEST(getDafaliasEllipseAxesAndCentreTest);
   CPPUNIT_TEST(isPointOutsideOfRotatedEllipseTestMajorAxisHorizontal);
   CPPUNIT_TEST(isPointOutsideOfRotatedEllipseTestMajorAxisVertical);
+  CPPUNIT_TEST(distanceCCWarmStartTest);
 
   CPPUNIT_TEST_SUITE_END();
 
@@ -57,6 +58,7 @@ public:
   void isPointOutsideOfEllipseTestMajorAxisVertical();
   void isPointOutsideOfRotatedEllipseTestMajorAxisHorizontal();
   void isPointOutsideOfRotatedEllipseTestMajorAxisVertical();
+  void distanceCCWarmStartTest();
 };
 
 #endif // ELLIPSETEST_H
@@ -0,0 +1,46 @@
+/****************************************************************/
+/*               DO NOT MODIFY THIS HEADER                      */
+/* MOOSE - Multiphysics Object Oriented Simulation Environment  */
+/*                                                              */
+/*           (c) 2010 Battelle Energy Alliance, LLC             */
+/*                   ALL RIGHTS RESERVED                        */
+/*                                                              */
+/*          Prepared by Battelle Energy Alliance, LLC           */
+/*            Under Contract No. DE-AC07-05ID14517              */
+/*            With the U. S. Department of Energy               */
+/*                                                              */
+/*            See COPYRIGHT for full restrictions               */
+/****************************************************************/
+
+#ifndef REDBACKARRHENIUSTABLETEST_H
+#define REDBACKARRHENIUSTABLETEST_H
+
+// CPPUnit includes
+#include "cppunit/extensions/HelperMacros.h"
+
+// Redback includes
+#include "RedbackArrheniusTable.h"
+
+class RedbackArrheniusTableTest : public CppUnit::TestFixture
+{
+
+  CPPUNIT_TEST_SUITE(RedbackArrheniusTableTest);
+
+  CPPUNIT_TEST(interpolationErrorTest);
+  CPPUNIT_TEST(outOfRangeTest);
+  CPPUNIT_TEST(exactTermsTest);
+  CPPUNIT_TEST(arrheniusMethodsTest);
+
+  CPPUNIT_TEST_SUITE_END();
+
+public:
+  RedbackArrheniusTableTest();
+  ~RedbackArrheniusTableTest();
+
+  void interpolationErrorTest();
+  void outOfRangeTest();
+  void exactTermsTest();
+  void arrheniusMethodsTest();
+};
+
+#endif // REDBACKARRHENIUSTABLETEST_H
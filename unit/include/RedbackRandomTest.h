@@ -0,0 +1,44 @@
+/****************************************************************/
+/*               DO NOT MODIFY THIS HEADER                      */
+/* MOOSE - Multiphysics Object Oriented Simulation Environment  */
+/*                                                              */
+/*           (c) 2010 Battelle Energy Alliance, LLC             */
+/*                   ALL RIGHTS RESERVED                        */
+/*                                                              */
+/*          Prepared by Battelle Energy Alliance, LLC           */
+/*            Under Contract No. DE-AC07-05ID14517              */
+/*            With the U. S. Department of Energy               */
+/*                                                              */
+/*            See COPYRIGHT for full restrictions               */
+/****************************************************************/
+
+#ifndef REDBACKRANDOMTEST_H
+#define REDBACKRANDOMTEST_H
+
+// CPPUnit includes
+#include "cppunit/extensions/HelperMacros.h"
+
+// Redback includes
+#include "RedbackRandom.h"
+
+class RedbackRandomTest : public CppUnit::TestFixture
+{
+
+  CPPUNIT_TEST_SUITE(RedbackRandomTest);
+
+  CPPUNIT_TEST(referenceValuesTest);
+  CPPUNIT_TEST(distributionTest);
+  CPPUNIT_TEST(fieldInterpolationTest);
+
+  CPPUNIT_TEST_SUITE_END();
+
+public:
+  RedbackRandomTest();
+  ~RedbackRandomTest();
+
+  void referenceValuesTest();
+  void distributionTest();
+  void fieldInterpolationTest();
+};
+
+#endif // REDBACKRANDOMTEST_H